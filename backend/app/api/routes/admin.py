@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.core.logging import get_logger
+from app.core.security import require_admin
+from app.services.profiler import ProfilerBusyError, stack_profiler
+
+logger = get_logger(__name__)
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval: float = Query(0.005, gt=0, description="Seconds between samples"),
+    all_threads: bool = Query(False, alias="allThreads", description="Sample every thread, not just the event loop"),
+    current_user: dict = Depends(require_admin),
+):
+    """Sample stacks for a while and return them folded, ready for flamegraph.pl or speedscope.
+
+    Samples the event loop thread by default, so the profile shows what blocks
+    or occupies the loop while the latency spike is happening.
+    """
+    logger.info("Profile requested", user_id=current_user["user_id"], seconds=seconds)
+    try:
+        result = await stack_profiler.profile(seconds, interval, all_threads)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return PlainTextResponse(
+        result["folded"],
+        headers={"X-Profile-Samples": str(result["samples"]), "X-Profile-Seconds": str(result["seconds"])},
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.auth import APIKeyCreate, APIKeyResponse, TokenRequest, TokenResponse
 from app.services.auth_service import AuthService
@@ -23,11 +23,13 @@ async def create_api_key(
 @router.post("/token", response_model=TokenResponse)
 async def create_token(
     request: TokenRequest,
+    http_request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Exchange API key for JWT token."""
     auth_service = AuthService(db)
-    token = await auth_service.create_access_token(request.apiKey)
+    client = http_request.client.host if http_request.client else None
+    token = await auth_service.create_access_token(request.apiKey, client)
 
     if not token:
         raise HTTPException(
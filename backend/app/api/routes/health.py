@@ -1,18 +1,43 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from typing import Any, Awaitable, Callable, Tuple
+from fastapi import APIRouter, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from redis import Redis
+from prometheus_client import CONTENT_TYPE_LATEST
+from redis.exceptions import RedisError
+from app.core.cache import TTLCache
 from app.core.database import get_database
+from app.core.redis_client import get_redis, redis_manager
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import QUEUE_DEPTH, RESOURCES, RUNS, render_latest
+from app.models.run import RunStatus
 from datetime import datetime
 
 logger = get_logger(__name__)
 router = APIRouter(tags=["health"])
 
+# Scrapers poll every few seconds per replica; share one DB pass between them
+_metrics_cache = TTLCache(maxsize=1, ttl=settings.METRICS_CACHE_TTL)
+_health_cache = TTLCache(maxsize=1, ttl=settings.HEALTH_CACHE_TTL)
 
-@router.get("/health")
-async def health_check(db: AsyncIOMotorDatabase = Depends(get_database)):
-    """Health check endpoint."""
+
+async def _probe(name: str, check: Callable[[], Awaitable[Any]]) -> Tuple[str, str]:
+    """Run one dependency probe under the health-check timeout."""
+    try:
+        await asyncio.wait_for(check(), timeout=settings.HEALTH_CHECK_TIMEOUT)
+        return name, "healthy"
+    except asyncio.TimeoutError:
+        return name, "unhealthy: timed out"
+    except Exception as e:
+        return name, f"unhealthy: {str(e)}"
+
+
+async def _ping_redis() -> None:
+    redis = await get_redis()
+    await redis.ping()
+
+
+async def _run_health_checks(db: AsyncIOMotorDatabase) -> dict:
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -21,70 +46,93 @@ async def health_check(db: AsyncIOMotorDatabase = Depends(get_database)):
         "checks": {}
     }
 
-    # Check MongoDB
-    try:
-        await db.client.admin.command('ping')
-        health_status["checks"]["mongodb"] = "healthy"
-    except Exception as e:
-        health_status["checks"]["mongodb"] = f"unhealthy: {str(e)}"
-        health_status["status"] = "degraded"
+    # Check MongoDB and Redis concurrently
+    results = await asyncio.gather(
+        _probe("mongodb", lambda: db.client.admin.command("ping")),
+        _probe("redis", _ping_redis),
+    )
 
-    # Check Redis
-    try:
-        redis_conn = Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-            socket_connect_timeout=2
-        )
-        redis_conn.ping()
-        health_status["checks"]["redis"] = "healthy"
-    except Exception as e:
-        health_status["checks"]["redis"] = f"unhealthy: {str(e)}"
-        health_status["status"] = "degraded"
+    for name, result in results:
+        health_status["checks"][name] = result
+        if result != "healthy":
+            health_status["status"] = "degraded"
 
     return health_status
 
 
+@router.get("/health")
+async def health_check(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Health check endpoint."""
+    # Concurrent probes share one in-flight check; results are reused briefly
+    return await _health_cache.get_or_load("health", lambda: _run_health_checks(db))
+
+
+async def _collect_counters(db: AsyncIOMotorDatabase) -> dict:
+    """Gather all counters with one aggregation over runs plus cheap collection counts."""
+    runs_by_status, workflows_count, targets_count, api_keys_count = await asyncio.gather(
+        db.runs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(None),
+        db.workflows.estimated_document_count(),
+        db.targets.estimated_document_count(),
+        db.api_keys.count_documents({"isActive": True}),
+    )
+
+    status_counts = {row["_id"]: row["count"] for row in runs_by_status}
+
+    counters = {"workflows_total": workflows_count}
+    counters["runs_total"] = sum(status_counts.values())
+    for run_status in RunStatus:
+        counters[f"runs_{run_status.value}"] = status_counts.get(run_status.value, 0)
+    counters["targets_total"] = targets_count
+    counters["api_keys_active"] = api_keys_count
+
+    return counters
+
+
+async def _get_counters(db: AsyncIOMotorDatabase) -> dict:
+    return await _metrics_cache.get_or_load("counters", lambda: _collect_counters(db))
+
+
 @router.get("/metrics")
 async def get_metrics(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get basic application metrics."""
+    counters = await _get_counters(db)
+
     metrics = {
         "timestamp": datetime.utcnow().isoformat(),
-        "counters": {}
+        "counters": counters
     }
 
-    # Count workflows
-    workflows_count = await db.workflows.count_documents({})
-    metrics["counters"]["workflows_total"] = workflows_count
-
-    # Count runs by status
-    runs_total = await db.runs.count_documents({})
-    runs_queued = await db.runs.count_documents({"status": "queued"})
-    runs_running = await db.runs.count_documents({"status": "running"})
-    runs_succeeded = await db.runs.count_documents({"status": "succeeded"})
-    runs_failed = await db.runs.count_documents({"status": "failed"})
-
-    metrics["counters"]["runs_total"] = runs_total
-    metrics["counters"]["runs_queued"] = runs_queued
-    metrics["counters"]["runs_running"] = runs_running
-    metrics["counters"]["runs_succeeded"] = runs_succeeded
-    metrics["counters"]["runs_failed"] = runs_failed
-
-    # Count targets
-    targets_count = await db.targets.count_documents({})
-    metrics["counters"]["targets_total"] = targets_count
-
-    # Count API keys
-    api_keys_count = await db.api_keys.count_documents({"isActive": True})
-    metrics["counters"]["api_keys_active"] = api_keys_count
-
     # Calculate success rate
+    runs_total = counters["runs_total"]
     if runs_total > 0:
-        success_rate = (runs_succeeded / runs_total) * 100
+        success_rate = (counters["runs_succeeded"] / runs_total) * 100
         metrics["success_rate"] = round(success_rate, 2)
     else:
         metrics["success_rate"] = 0.0
 
     return metrics
+
+
+async def _rq_queue_length() -> int:
+    if redis_manager.client is None:
+        return 0
+    try:
+        return await redis_manager.client.llen(f"rq:queue:{settings.RQ_QUEUE_NAME}")
+    except RedisError:
+        return 0
+
+
+@router.get("/metrics/prometheus")
+async def get_prometheus_metrics(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Expose metrics in Prometheus text format."""
+    counters = await _get_counters(db)
+
+    for run_status in RunStatus:
+        RUNS.labels(status=run_status.value).set(counters[f"runs_{run_status.value}"])
+    QUEUE_DEPTH.labels(queue="runs").set(counters["runs_queued"])
+    QUEUE_DEPTH.labels(queue=settings.RQ_QUEUE_NAME).set(await _rq_queue_length())
+    RESOURCES.labels(kind="workflows").set(counters["workflows_total"])
+    RESOURCES.labels(kind="targets").set(counters["targets_total"])
+    RESOURCES.labels(kind="api_keys_active").set(counters["api_keys_active"])
+
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
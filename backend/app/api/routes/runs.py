@@ -1,16 +1,23 @@
 # app/api/routes/runs.py
 import uuid
-import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Body
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
 
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.models.run import RunResponse, RunStatus
+from app.core.responses import FastJSONResponse, from_document
+from app.models.run import Run, RunPriority, RunResponse, RunStatus
+from app.models.target import TargetSelector
 from app.core.database import get_database
-from app.workers.run_executor import execute_run_async
+from app.services.run_scheduler import QueuedRun, classify, estimate_cost, run_scheduler
+from app.services.run_service import RunService
+from app.services.scope_index import TargetsOutOfScopeError, ensure_in_scope
+from app.services.target_selector import TargetSetNotFoundError, count_selected, is_empty
+from app.workers.simulation import InvalidSimulationError, validate_simulation
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -21,6 +28,7 @@ router = APIRouter()
 # -------------------------------
 @router.post("/execute", response_model=RunResponse, status_code=status.HTTP_201_CREATED)
 async def execute_inline_workflow(
+    request: Request,
     payload: Dict[str, Any] = Body(...),
     db: AsyncIOMotorDatabase = Depends(get_database),
 ):
@@ -36,9 +44,19 @@ async def execute_inline_workflow(
         "edges": [...]
       },
       "targets": ["127.0.0.1"],
+      "selector": {"tags": ["prod"], "excludeTags": ["fragile"]},
+      "exclusions": [],
       "runMode": "demo",
+      "priority": "interactive",
       "authorizeTargets": true
     }
+
+    ``selector`` picks authorized targets by tag or saved target set; they are
+    resolved by the executor, and only the selector and a match count are stored.
+    ``priority`` (interactive, scheduled or bulk) defaults from the run size.
+    ``runMode`` "simulate" replaces tools with synthetic results for load testing;
+    ``simulation`` overrides the configured profiles, e.g.
+    ``{"seed": 1, "nmap": {"latencyMs": 200, "failureRate": 0.05}}``.
     """
     if "workflow" not in payload:
         raise HTTPException(
@@ -48,15 +66,70 @@ async def execute_inline_workflow(
 
     workflow_doc = payload["workflow"]
     targets = payload.get("targets", [])
+    exclusions = payload.get("exclusions", [])
+    selector_doc = payload.get("selector")
     run_mode = payload.get("runMode", "demo")
     authorize = payload.get("authorizeTargets", False)
+    requested_priority = payload.get("priority")
+    simulation = payload.get("simulation")
 
-    if not isinstance(workflow_doc, dict) or not isinstance(targets, list):
+    if (
+        not isinstance(workflow_doc, dict)
+        or not isinstance(targets, list)
+        or not isinstance(exclusions, list)
+        or not isinstance(simulation, (dict, type(None)))
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid payload format",
         )
 
+    try:
+        validate_simulation(simulation, workflow_doc.get("nodes", []))
+    except InvalidSimulationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    try:
+        selector = TargetSelector(**selector_doc) if selector_doc is not None else None
+    except (TypeError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid target selector",
+        )
+    if is_empty(selector):
+        selector = None
+
+    try:
+        requested_priority = RunPriority(requested_priority) if requested_priority else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid priority, expected one of: {', '.join(p.value for p in RunPriority)}",
+        )
+
+    try:
+        await ensure_in_scope(db, targets, run_mode)
+    except TargetsOutOfScopeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"message": str(e), "outOfScope": e.targets[:100]},
+        )
+
+    try:
+        resolved_count = await count_selected(db, selector) if selector else None
+    except TargetSetNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    priority = classify(targets, selector, resolved_count, requested_priority)
+    # Inline runs are unauthenticated, so fairness is per client address
+    user_id = f"client:{request.client.host}" if request.client else "anonymous"
+
     run_id = str(uuid.uuid4())
     now = datetime.utcnow()
 
@@ -80,9 +153,19 @@ async def execute_inline_workflow(
         "workflowId": workflow_doc.get("id", f"inline-{run_id}"),
         "workflowName": workflow_doc.get("name", "Inline Workflow"),
         "targets": targets,
+        "selector": selector.dict() if selector else None,
+        "resolvedTargetCount": resolved_count,
+        "exclusions": exclusions,
         "runMode": run_mode,
+        "simulation": simulation,
+        "priority": priority.value,
+        "userId": user_id,
         "authorizeTargets": authorize,
         "status": RunStatus.QUEUED if hasattr(RunStatus, "QUEUED") else "queued",
+        "workflowSnapshot": workflow_doc,
+        # Start deadline: if the executor never claims the run, the reaper requeues it
+        "leaseExpiresAt": now + timedelta(seconds=settings.RUN_LEASE_SECONDS),
+        "attempts": 0,
         "createdAt": now,
         "startedAt": None,
         "endedAt": None,
@@ -91,12 +174,22 @@ async def execute_inline_workflow(
 
     await db.runs.insert_one(run_doc)
 
-    # Start async execution
-    asyncio.create_task(execute_run_async(run_id, workflow_doc, targets, run_mode))
+    # Queue for a fair share of executor slots
+    run_scheduler.submit(QueuedRun(
+        run_id=run_id,
+        user_id=user_id,
+        priority=priority,
+        cost=estimate_cost(targets, resolved_count),
+        workflow_doc=workflow_doc,
+        targets=targets,
+        run_mode=run_mode,
+        exclusions=exclusions,
+        selector=selector.dict() if selector else None,
+    ))
 
     logger.info(
         "Inline workflow execution started",
-        extra={"run_id": run_id, "workflow_name": run_doc["workflowName"]},
+        extra={"run_id": run_id, "workflow_name": run_doc["workflowName"], "priority": priority.value},
     )
 
     return RunResponse(
@@ -104,3 +197,43 @@ async def execute_inline_workflow(
         status=RunStatus.QUEUED if hasattr(RunStatus, "QUEUED") else "queued",
         message="Inline run started",
     )
+
+
+@router.get("/runs/{run_id}", response_model=Run)
+async def get_run(
+    run_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """Get a run; for a compacted run, logs and raw outputs come from its archive."""
+    run = await RunService(db).get_run(run_id)
+
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Run not found",
+        )
+
+    return FastJSONResponse(content=from_document(Run, run))
+
+
+@router.post("/runs/{run_id}/cancel", response_model=RunResponse)
+async def cancel_run(
+    run_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """Cancel a queued or running run, killing its scans and containers."""
+    run = await RunService(db).cancel_run(run_id)
+
+    if run is None:
+        existing = await db.runs.find_one({"id": run_id}, {"_id": 0, "status": 1})
+        if existing is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Run not found",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Run is already {existing.get('status')}",
+        )
+
+    return RunResponse(runId=run_id, status=RunStatus.CANCELLED, message="Run cancelled")
@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import uuid
+from datetime import datetime
+from app.models.schedule import Schedule, ScheduleCreate, ScheduleUpdate
+from app.core.database import get_database
+from app.core.logging import get_logger
+from app.core.responses import FastJSONResponse, from_document, from_documents
+from app.services.schedule_runner import first_fire
+from app.services.scope_index import TargetsOutOfScopeError, ensure_in_scope
+from app.services.target_selector import TargetSetNotFoundError, count_selected, is_empty
+
+logger = get_logger(__name__)
+router = APIRouter(prefix="/schedules", tags=["schedules"])
+
+
+@router.get("", response_model=List[Schedule])
+async def list_schedules(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """List recurring schedules, soonest first."""
+    cursor = db.schedules.find({}, {"_id": 0}).sort("nextRunAt", 1)
+    schedules = from_documents(Schedule, [doc async for doc in cursor])
+    return FastJSONResponse(content=schedules)
+
+
+@router.get("/{schedule_id}", response_model=Schedule)
+async def get_schedule(
+    schedule_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Get a schedule by ID."""
+    schedule = await db.schedules.find_one({"id": schedule_id}, {"_id": 0})
+
+    if not schedule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule not found"
+        )
+
+    return FastJSONResponse(content=from_document(Schedule, schedule))
+
+
+@router.post("", response_model=Schedule, status_code=status.HTTP_201_CREATED)
+async def create_schedule(
+    request: ScheduleCreate,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Create a recurring run of a workflow on a cron expression or fixed interval."""
+    workflow = await db.workflows.find_one({"id": request.workflowId}, {"_id": 1})
+    if not workflow:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workflow not found"
+        )
+
+    selector = None if is_empty(request.selector) else request.selector
+    try:
+        await ensure_in_scope(db, request.targets, request.runMode)
+        if selector:
+            await count_selected(db, selector)
+    except TargetsOutOfScopeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"message": str(e), "outOfScope": e.targets[:100]},
+        )
+    except TargetSetNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    schedule = Schedule(
+        id=str(uuid.uuid4()),
+        **request.dict(exclude={"selector"}),
+        selector=selector,
+        createdAt=datetime.utcnow()
+    )
+    schedule_doc = schedule.dict()
+    schedule_doc.update(first_fire(schedule_doc, schedule.createdAt))
+    await db.schedules.insert_one(schedule_doc)
+
+    logger.info("Schedule created", schedule_id=schedule.id, next_run_at=schedule_doc["nextRunAt"].isoformat())
+    schedule_doc.pop("_id", None)
+    return FastJSONResponse(content=from_document(Schedule, schedule_doc))
+
+
+@router.patch("/{schedule_id}", response_model=Schedule)
+async def update_schedule(
+    schedule_id: str,
+    request: ScheduleUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Pause or resume a schedule, or change its catch-up policy or jitter."""
+    schedule = await db.schedules.find_one({"id": schedule_id}, {"_id": 0})
+
+    if not schedule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule not found"
+        )
+
+    update = request.dict(exclude_unset=True)
+    resumed = update.get("enabled") and not schedule.get("enabled")
+    schedule.update(update)
+    if resumed or "jitterSeconds" in update:
+        # Fires missed while paused are not caught up
+        update.update(first_fire(schedule, datetime.utcnow()))
+        schedule.update(update)
+
+    if update:
+        await db.schedules.update_one({"id": schedule_id}, {"$set": update})
+        logger.info("Schedule updated", schedule_id=schedule_id, fields=sorted(update))
+
+    return FastJSONResponse(content=from_document(Schedule, schedule))
+
+
+@router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule(
+    schedule_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Delete a schedule; runs it already started are kept."""
+    result = await db.schedules.delete_one({"id": schedule_id})
+
+    if result.deleted_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule not found"
+        )
+
+    logger.info("Schedule deleted", schedule_id=schedule_id)
+    return None
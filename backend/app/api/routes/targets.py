@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import uuid
 from datetime import datetime
-from app.models.target import Target, TargetCreate, TargetBulkCreate
+from app.models.target import (
+    Target, TargetCreate, TargetBulkCreate, TargetImportProgress, TargetSet, TargetSetCreate
+)
 from app.core.database import get_database
+from app.core.responses import DuplexStreamingResponse, FastJSONResponse, dumps, from_documents
+from app.services.scope_index import scope_index
+from app.services.target_import import TargetImportService, iter_lines, parse_rows
 from app.core.security import get_current_user
 from app.core.logging import get_logger
 
@@ -18,14 +23,11 @@ async def list_targets(
     # current_user: dict = Depends(get_current_user)
 ):
     """List all authorized targets."""
-    targets = []
     cursor = db.targets.find()
-
-    async for target_doc in cursor:
-        targets.append(Target(**target_doc))
+    targets = from_documents(Target, [target_doc async for target_doc in cursor])
 
     logger.info("Targets listed", count=len(targets))
-    return targets
+    return FastJSONResponse(content=targets)
 
 
 @router.post("", response_model=Target, status_code=status.HTTP_201_CREATED)
@@ -51,6 +53,7 @@ async def create_target(
     )
 
     await db.targets.insert_one(new_target.dict())
+    await scope_index.apply_changes(added=[new_target.value])
 
     logger.info("Target created", target_id=new_target.id, value=target.value)
     return new_target
@@ -63,31 +66,111 @@ async def bulk_create_targets(
     # current_user: dict = Depends(get_current_user)
 ):
     """Bulk import targets."""
-    created_targets = []
+    import_service = TargetImportService(db)
+    created = []
+
+    async for _ in import_service.import_rows([(value, []) for value in request.targets], created):
+        pass
+    await scope_index.apply_changes(added=[doc["value"] for doc in created])
+
+    logger.info("Bulk targets created", count=len(created))
+    return FastJSONResponse(content=from_documents(Target, created), status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/import",
+    response_class=DuplexStreamingResponse,
+    responses={
+        200: {
+            "description": "One TargetImportProgress record per line, the last with done=true",
+            "content": {"application/x-ndjson": {"schema": TargetImportProgress.model_json_schema()}},
+        }
+    },
+)
+async def import_targets(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(lines|csv)$"),
+    tags: List[str] = Query(default_factory=list),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Stream-import targets from a newline or CSV file body.
+
+    The body is read incrementally and processed in chunks. The response is
+    NDJSON with one cumulative progress record per chunk; the last has done=true.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "lines"
+
+    import_service = TargetImportService(db)
+    rows = parse_rows(iter_lines(request.stream()), import_format, tags)
+
+    async def progress_stream():
+        created = []
+        async for progress in import_service.import_rows(rows, created):
+            await scope_index.apply_changes(added=[doc["value"] for doc in created])
+            created.clear()
+            yield dumps(progress) + b"\n"
+
+    return DuplexStreamingResponse(progress_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/sets", response_model=List[TargetSet])
+async def list_target_sets(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """List saved target sets."""
+    cursor = db.target_sets.find({}, {"_id": 0})
+    target_sets = from_documents(TargetSet, [doc async for doc in cursor])
+    return FastJSONResponse(content=target_sets)
+
+
+@router.post("/sets", response_model=TargetSet, status_code=status.HTTP_201_CREATED)
+async def create_target_set(
+    request: TargetSetCreate,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Save a named target selector for use in runs."""
+    existing = await db.target_sets.find_one({"name": request.name}, {"_id": 1})
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Target set already exists"
+        )
 
-    for target_value in request.targets:
-        # Skip if already exists
-        existing = await db.targets.find_one({"value": target_value})
-        if existing:
-            continue
+    target_set = TargetSet(
+        id=str(uuid.uuid4()),
+        name=request.name,
+        description=request.description,
+        selector=request.selector,
+        createdAt=datetime.utcnow()
+    )
+    await db.target_sets.insert_one(target_set.dict())
 
-        try:
-            new_target = Target(
-                id=str(uuid.uuid4()),
-                value=target_value.strip(),
-                tags=[],
-                createdAt=datetime.utcnow()
-            )
+    logger.info("Target set created", target_set_id=target_set.id, name=target_set.name)
+    return target_set
 
-            await db.targets.insert_one(new_target.dict())
-            created_targets.append(new_target)
 
-        except Exception as e:
-            logger.warning("Failed to create target", value=target_value, error=str(e))
-            continue
+@router.delete("/sets/{target_set_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_target_set(
+    target_set_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    # current_user: dict = Depends(get_current_user)
+):
+    """Delete a saved target set."""
+    result = await db.target_sets.delete_one({"id": target_set_id})
+
+    if result.deleted_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Target set not found"
+        )
 
-    logger.info("Bulk targets created", count=len(created_targets))
-    return created_targets
+    logger.info("Target set deleted", target_set_id=target_set_id)
+    return None
 
 
 @router.delete("/{target_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -97,13 +180,15 @@ async def delete_target(
     # current_user: dict = Depends(get_current_user)
 ):
     """Delete an authorized target."""
-    result = await db.targets.delete_one({"id": target_id})
+    deleted = await db.targets.find_one_and_delete({"id": target_id}, {"_id": 0, "value": 1})
 
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Target not found"
         )
 
+    await scope_index.apply_changes(removed=[deleted["value"]])
+
     logger.info("Target deleted", target_id=target_id)
     return None
@@ -1,50 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Awaitable, Callable, List, Optional, Union
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from redis.exceptions import RedisError
 import uuid
 from datetime import datetime
-from app.models.workflow import Workflow, WorkflowCreate, WorkflowUpdate
+from app.models.workflow import Workflow, WorkflowCreate, WorkflowSummary, WorkflowUpdate
+from app.core.cache import CachedResponse, TTLCache, conditional_response, make_etag
+from app.core.config import settings
+from app.core.responses import dumps, from_document, from_documents
 from app.core.database import get_database
+from app.core.redis_client import redis_manager
 from app.core.security import get_current_user
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/workflows", tags=["workflows"])
 
+# Rendered list/detail bodies; every write path below must invalidate
+workflow_cache = TTLCache(
+    maxsize=settings.WORKFLOW_CACHE_MAX_ENTRIES,
+    ttl=settings.WORKFLOW_CACHE_TTL
+)
 
-@router.get("", response_model=List[Workflow])
+_summary_projection = {"_id": 0, "nodes": 0, "edges": 0}
+
+
+# Bumped on every write so other replicas stop serving their cached bodies
+_CACHE_GENERATION_KEY = "reconcraft:cache:workflows:generation"
+
+
+async def _cache_generation() -> Optional[int]:
+    """Get the cross-replica cache generation, or None when Redis is unavailable."""
+    if redis_manager.client is None:
+        return None
+    try:
+        return int(await redis_manager.client.get(_CACHE_GENERATION_KEY) or 0)
+    except RedisError as e:
+        logger.warning("Failed to read workflow cache generation", error=str(e))
+        return None
+
+
+async def _load_cached(key: tuple, loader: Callable[[], Awaitable[Optional[CachedResponse]]]) -> Optional[CachedResponse]:
+    """Serve from the local cache only while other replicas' writes can be seen."""
+    generation = await _cache_generation()
+    if generation is None:
+        # A write elsewhere may not have been published; read the database instead
+        return await loader()
+    return await workflow_cache.get_or_load((generation, *key), loader)
+
+
+async def invalidate_workflow_cache() -> None:
+    """Drop cached workflow responses after a write."""
+    workflow_cache.clear()
+    if redis_manager.client is None:
+        return
+    try:
+        await redis_manager.client.incr(_CACHE_GENERATION_KEY)
+    except RedisError as e:
+        logger.warning("Failed to publish workflow cache invalidation", error=str(e))
+
+
+def _cached(body: bytes) -> CachedResponse:
+    return CachedResponse(body=body, etag=make_etag(body))
+
+
+@router.get("", response_model=Union[List[Workflow], List[WorkflowSummary]])
 async def list_workflows(
+    request: Request,
+    summary: bool = Query(False, description="List WorkflowSummary entries, without nodes and edges"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="All workflows when omitted"),
     db: AsyncIOMotorDatabase = Depends(get_database),
     # current_user: dict = Depends(get_current_user)
 ):
-    """List all workflows."""
-    workflows = []
-    cursor = db.workflows.find()
+    """List all workflows, or summaries of them with ``summary=true``."""
+
+    async def load() -> CachedResponse:
+        projection = _summary_projection if summary else None
+        cursor = db.workflows.find({}, projection).sort("createdAt", 1).skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
 
-    async for workflow_doc in cursor:
-        workflows.append(Workflow(**workflow_doc))
+        # Validated on read, so legacy documents still render every declared field
+        model = WorkflowSummary if summary else Workflow
+        items = from_documents(model, [doc async for doc in cursor])
 
-    logger.info("Workflows listed", count=len(workflows))
-    return workflows
+        logger.info("Workflows listed", count=len(items), summary=summary)
+        return _cached(dumps(items))
+
+    cached = await _load_cached(("list", summary, skip, limit), load)
+    return conditional_response(request, cached)
 
 
 @router.get("/{workflow_id}", response_model=Workflow)
 async def get_workflow(
     workflow_id: str,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database),
     # current_user: dict = Depends(get_current_user)
 ):
     """Get a specific workflow."""
-    workflow_doc = await db.workflows.find_one({"id": workflow_id})
 
-    if not workflow_doc:
+    async def load() -> Optional[CachedResponse]:
+        workflow_doc = await db.workflows.find_one({"id": workflow_id})
+        if not workflow_doc:
+            return None
+        return _cached(dumps(from_document(Workflow, workflow_doc)))
+
+    cached = await _load_cached(("detail", workflow_id), load)
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
 
     logger.info("Workflow retrieved", workflow_id=workflow_id)
-    return Workflow(**workflow_doc)
+    return conditional_response(request, cached)
 
 
 @router.post("", response_model=Workflow, status_code=status.HTTP_201_CREATED)
@@ -76,6 +147,7 @@ async def create_workflow(
             {"id": workflow_id},
             {"$set": updated_workflow.dict()}
         )
+        await invalidate_workflow_cache()
 
         logger.info("Workflow updated", workflow_id=workflow_id)
         return updated_workflow
@@ -92,6 +164,7 @@ async def create_workflow(
         )
 
         await db.workflows.insert_one(new_workflow.dict())
+        await invalidate_workflow_cache()
 
         logger.info("Workflow created (auth disabled)", workflow_id=new_workflow.id)
         return new_workflow
@@ -112,6 +185,7 @@ async def delete_workflow(
             detail="Workflow not found"
         )
 
+    await invalidate_workflow_cache()
     logger.info("Workflow deleted", workflow_id=workflow_id)
     return None
 
@@ -145,6 +219,7 @@ async def duplicate_workflow(
     )
 
     await db.workflows.insert_one(duplicated.dict())
+    await invalidate_workflow_cache()
 
     logger.info("Workflow duplicated", original_id=workflow_id, new_id=duplicated.id)
     return duplicated
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from fastapi import Request, Response, status
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, or default if missing or expired."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove a single entry if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Read-through lookup; concurrent misses for a key share one load."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another waiter may have filled the entry while we queued
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = await loader()
+                    self.set(key, value, ttl)
+                return value
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Rendered response body with its strong validator."""
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+
+def make_etag(body: bytes) -> str:
+    """Build a strong ETag from the response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_response(request: Request, cached: CachedResponse) -> Response:
+    """Return 304 when the client already holds the cached representation."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 import secrets
 
 
@@ -24,28 +24,153 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 2.0
 
     # Security
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    API_KEY_CACHE_SIZE: int = 1024
+    API_KEY_CACHE_TTL: int = 60
+    LEGACY_KEY_REJECT_TTL: int = 300  # remember keys that failed the legacy bcrypt scan
+    LEGACY_KEY_SCANS_PER_MINUTE: int = 5  # per client; each scan costs one bcrypt check per legacy key
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL: int = 300
+    ADMIN_USER_IDS: List[str] = []  # may use admin endpoints such as the profiler
 
     # Docker
     DOCKER_NETWORK: str = "reconcraft_network"
     DOCKER_MEMORY_LIMIT: str = "512m"
     DOCKER_CPU_LIMIT: float = 1.0
 
+    # Audit logging
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_OVERFLOW: str = "drop"  # "block", "drop" or "spill"
+    AUDIT_SPILL_PATH: str = "/tmp/reconcraft-audit-spill.jsonl"
+
+    # Targets
+    TARGET_IMPORT_CHUNK_SIZE: int = 1000
+    SCOPE_ENFORCEMENT: bool = True
+    SCOPE_INDEX_REFRESH_SECONDS: int = 300
+
+    # Run retention (policies: [{"workflowId"?, "status"?, "hotDays", "coldDays"}], coldDays 0 = forever)
+    RETENTION_ENABLED: bool = False  # when off, finished runs are kept forever
+    RETENTION_BACKFILL: bool = False  # also schedule runs that finished before retention was enabled
+    RETENTION_HOT_DAYS: int = 7
+    RETENTION_COLD_DAYS: int = 90
+    RETENTION_POLICIES: List[Dict[str, Any]] = []
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    RETENTION_BATCH_SIZE: int = 100
+    RETENTION_COMPRESSION: str = "zstd"  # "zstd" (needs zstandard) or "gzip"
+    RETENTION_ARCHIVE_BACKEND: str = "gridfs"  # "gridfs" or "disk" (single node, or a volume shared by all replicas)
+    RETENTION_ARCHIVE_DIR: str = "/var/lib/reconcraft/run-archives"
+
+    # Health
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+    HEALTH_CACHE_TTL: float = 2.0
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
+    LOG_QUEUE_ENABLED: bool = True  # render and write logs on a background thread
+    LOG_QUEUE_SIZE: int = 10000  # events waiting for the writer; overflow is dropped and counted
+    LOG_SAMPLE_RATES: Dict[str, float] = {"debug": 1.0}  # share of events kept, by level
+    LOG_RATE_LIMIT_PER_SECOND: int = 0  # repeats of one event per second, 0 = unlimited
+    LOG_RATE_LIMITED_LEVELS: List[str] = ["debug"]
+
+    # Tracing and profiling
+    SLOW_REQUEST_SECONDS: float = 1.0  # requests at least this slow are logged with a DB/handler breakdown
+    DB_COMMAND_MONITORING: bool = True  # time MongoDB commands per request
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_MIN_INTERVAL_SECONDS: float = 0.001
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:8080", "http://localhost:3000"]
 
+    # Responses
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 5  # 9 costs several times the CPU for a few percent smaller JSON
+    GZIP_EXCLUDED_MEDIA_TYPES: List[str] = ["application/x-ndjson", "text/event-stream"]
+
+    # Caching
+    WORKFLOW_CACHE_TTL: int = 300
+    WORKFLOW_CACHE_MAX_ENTRIES: int = 1024
+    METRICS_CACHE_TTL: int = 5
+
+    # Executor
+    SCAN_UNIT_MAX_ADDRESSES: int = 256
+    TARGET_SELECTOR_BATCH_SIZE: int = 1000
+    RUN_LEASE_SECONDS: int = 60
+    RUN_HEARTBEAT_SECONDS: int = 20
+    RUN_REAPER_INTERVAL_SECONDS: int = 30
+    RUN_MAX_ATTEMPTS: int = 3
+    STEP_TIMEOUT_SECONDS: int = 0  # default per-node limit, 0 = none
+    EXECUTOR_MAX_CONCURRENT_RUNS: int = 4
+    # Share of executor slots per priority class, and the DRR quantum per user
+    SCHEDULER_WEIGHTS: Dict[str, int] = {"interactive": 8, "scheduled": 3, "bulk": 1}
+    SCHEDULER_QUANTUM: int = 4
+    INTERACTIVE_MAX_TARGETS: int = 4
+    PROCESS_KILL_GRACE_SECONDS: float = 5.0
+    STEP_TIMING_KEEP_TARGETS: int = 100  # slowest per-target timings stored on each step
+    TOOL_USAGE_SAMPLE_SECONDS: float = 1.0  # how often tool CPU and memory are sampled
+
     # Worker
     RQ_QUEUE_NAME: str = "reconcraft_jobs"
     RQ_RESULT_TTL: int = 3600
 
+    # Schedules: recurring runs, started with jitter so they do not all fire at once
+    SCHEDULES_ENABLED: bool = True
+    SCHEDULE_TICK_SECONDS: int = 15
+    SCHEDULE_BATCH_SIZE: int = 100
+    SCHEDULE_MAX_CONCURRENT_RUNS: int = 4  # queued or running scheduled runs, all replicas
+    SCHEDULE_JITTER_FRACTION: float = 0.5  # of the period, when a schedule sets no jitter
+    SCHEDULE_MAX_JITTER_SECONDS: int = 1800
+    SCHEDULE_MISFIRE_GRACE_SECONDS: int = 300  # later than this counts as missed
+    SCHEDULE_MAX_CATCH_UP: int = 10  # missed fires replayed by the "all" policy
+
+    # Scan politeness: token buckets per target network and host, shared through Redis
+    SCAN_RATE_LIMIT_ENABLED: bool = True
+    SCAN_RATE_IPV4_PREFIX: int = 24
+    SCAN_RATE_IPV6_PREFIX: int = 64
+    SCAN_RATE_NETWORK_PER_SECOND: float = 64.0  # addresses per network per second
+    SCAN_RATE_NETWORK_BURST: int = 256
+    SCAN_RATE_HOST_PER_SECOND: float = 0.5  # scans per host per second
+    SCAN_RATE_HOST_BURST: int = 2
+
+    # Adaptive scanning: AIMD on per-step target concurrency and nmap timing
+    SCAN_ADAPTIVE_ENABLED: bool = True
+    SCAN_MIN_CONCURRENCY: int = 1
+    SCAN_MAX_CONCURRENCY: int = 16
+    SCAN_INITIAL_CONCURRENCY: int = 2
+    SCAN_DECREASE_FACTOR: float = 0.5
+    SCAN_ERROR_RATE_THRESHOLD: float = 0.1  # failed or timed-out share of recent units
+    SCAN_LATENCY_FACTOR: float = 2.0  # slowdown vs the best latency seen that counts as congestion
+    SCAN_CPU_LOAD_THRESHOLD: float = 0.9  # 1-minute load average per CPU
+    SCAN_TUNER_WINDOW: int = 20  # recent units considered
+
+    # Sharded scans: large scan steps fan out to RQ workers (needs `make worker`)
+    SHARDING_ENABLED: bool = False
+    SHARD_SIZE: int = 16  # scan units per shard
+    SHARD_MIN_UNITS: int = 32  # smaller steps run in-process
+    SHARD_MAX_RETRIES: int = 3
+    SHARD_RETRY_INTERVALS: List[int] = [10, 30, 60]
+    SHARD_JOB_TIMEOUT: int = 3600
+    SHARD_POLL_SECONDS: float = 2.0
+    SHARD_STATE_TTL: int = 7 * 24 * 3600
+
+    # Simulation run mode: synthetic tool results for load testing, no network access.
+    # Profiles by node kind ("default" applies to all); runs and nodes can override any key.
+    SIMULATION_PROFILES: Dict[str, Dict[str, Any]] = {
+        "default": {"latencyMs": 1000, "latencyJitter": 0.5, "outputBytes": 2048, "findingsPerTarget": 1.0,
+                    "failureRate": 0.0, "timeoutRate": 0.0, "timeoutSeconds": 30},
+        "nmap": {"latencyMs": 5000, "outputBytes": 4096, "findingsPerTarget": 2.0},
+        "httpProbe": {"latencyMs": 300, "outputBytes": 1024, "findingsPerTarget": 0.5},
+        "gitleaks": {"latencyMs": 2000, "outputBytes": 8192, "findingsPerTarget": 0.2},
+    }
+
     class Config:
         env_file = ".env"
         case_sensitive = True
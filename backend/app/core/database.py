@@ -2,10 +2,16 @@ from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Optional
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.tracing import command_timing_listener
 
 logger = get_logger(__name__)
 
 
+def database_name() -> str:
+    """Database name from MONGODB_URI (fallback to 'reconcraft')."""
+    return settings.MONGODB_URI.rsplit("/", 1)[-1].split("?")[0] or "reconcraft"
+
+
 class DatabaseManager:
     """MongoDB database manager using Motor (async)."""
 
@@ -16,10 +22,10 @@ class DatabaseManager:
     async def connect(self):
         """Connect to MongoDB."""
         try:
-            self.client = AsyncIOMotorClient(settings.MONGODB_URI)
+            listeners = [command_timing_listener] if settings.DB_COMMAND_MONITORING else []
+            self.client = AsyncIOMotorClient(settings.MONGODB_URI, event_listeners=listeners)
 
-            # Extract DB name from URI (fallback to 'reconcraft')
-            db_name = settings.MONGODB_URI.rsplit("/", 1)[-1].split("?")[0] or "reconcraft"
+            db_name = database_name()
             self.db = self.client[db_name]
 
             # Test the connection
@@ -52,12 +58,28 @@ class DatabaseManager:
         await self.db.runs.create_index("workflowId")
         await self.db.runs.create_index("status")
         await self.db.runs.create_index("startedAt")
+        await self.db.runs.create_index("leaseExpiresAt", sparse=True)
+        await self.db.runs.create_index("compactAfter", sparse=True)
+        await self.db.runs.create_index([("scheduleId", 1), ("status", 1)], sparse=True)
+        if settings.RETENTION_ENABLED:
+            # Retention: MongoDB deletes runs once expireAt passes
+            await self.db.runs.create_index("expireAt", expireAfterSeconds=0)
 
         await self.db.targets.create_index("id", unique=True)
         await self.db.targets.create_index("value", unique=True)
         await self.db.targets.create_index("tags")
 
+        await self.db.target_sets.create_index("id", unique=True)
+        await self.db.target_sets.create_index("name", unique=True)
+
+        await self.db.schedules.create_index("id", unique=True)
+        await self.db.schedules.create_index([("enabled", 1), ("nextRunAt", 1)])
+
         await self.db.api_keys.create_index("key", unique=True)
+        await self.db.api_keys.create_index(
+            "keyId", unique=True, partialFilterExpression={"keyId": {"$type": "string"}}
+        )
+        await self.db.api_keys.create_index("lookupDigest", sparse=True)
         await self.db.api_keys.create_index("userId")
 
         await self.db.audit_logs.create_index("timestamp")
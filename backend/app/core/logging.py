@@ -1,40 +1,181 @@
-import structlog
+import atexit
 import logging
+import queue
+import random
 import sys
-from typing import Any
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Optional, TextIO, Tuple
+import orjson
+import structlog
 from app.core.config import settings
+from app.core.metrics import LOG_EVENTS_DROPPED
+
+# Writer thread of the queued mode, and the handler feeding it
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+# Where the last setup_logging call sent output
+_stream: Optional[TextIO] = None
+
+
+def _dumps(event_dict: Dict[str, Any], **kwargs) -> str:
+    return orjson.dumps(event_dict, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _record_timestamp(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """ISO timestamp of when a stdlib record was logged, not when the writer got to it."""
+    created = event_dict["_record"].created if "_record" in event_dict else time.time()
+    event_dict["timestamp"] = datetime.fromtimestamp(created, timezone.utc).isoformat().replace("+00:00", "Z")
+    return event_dict
+
+
+class EventSampler:
+    """Drops a share of low-level events and caps how often one event repeats per second.
+
+    Keeps high-volume debug output (per target, per output line) from swamping
+    the writer; every drop is counted in ``reconcraft_log_events_dropped``.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limit: int = 0, limited_levels: Iterable[str] = ()):
+        self.sample_rates = {level.lower(): rate for level, rate in sample_rates.items()}
+        self.rate_limit = rate_limit
+        self.limited_levels = {level.lower() for level in limited_levels}
+        self._window = 0
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        level = "error" if method_name == "exception" else method_name
+        rate = self.sample_rates.get(level, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            LOG_EVENTS_DROPPED.labels(reason="sampled").inc()
+            raise structlog.DropEvent
+
+        if self.rate_limit and level in self.limited_levels:
+            window = int(time.monotonic())
+            if window != self._window:
+                # One window at a time keeps the counts bounded by a second's worth of events
+                self._window, self._counts = window, {}
+            key = (getattr(logger, "name", ""), str(event_dict.get("event")))
+            seen = self._counts.get(key, 0)
+            if seen >= self.rate_limit:
+                LOG_EVENTS_DROPPED.labels(reason="rate_limited").inc()
+                raise structlog.DropEvent
+            self._counts[key] = seen + 1
+
+        return event_dict
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread as they are; drops them if its queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the writer thread; only freeze arguments of stdlib records
+        if not isinstance(record.msg, dict) and record.args:
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_EVENTS_DROPPED.labels(reason="queue_full").inc()
+
 
+def shutdown_logging() -> None:
+    """Stop the writer thread after it has written everything already queued."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-def setup_logging() -> None:
-    """Configure structured logging."""
 
-    # Configure structlog
+def setup_logging(stream: Optional[TextIO] = None) -> None:
+    """Configure structured logging to ``stream`` (stdout by default).
+
+    With LOG_QUEUE_ENABLED, callers only build the event dict: rendering and
+    writing happen on a background thread behind a bounded queue, so log I/O
+    never blocks the event loop. Otherwise events are rendered and written on
+    the calling thread.
+    """
+    global _listener, _queue_handler, _stream
+    # Like basicConfig, a repeated call leaves the level and stream alone (benchmarks set their own)
+    configured = _queue_handler is not None
+    shutdown_logging()
+    stream = _stream = stream or _stream or sys.stdout
+
+    level = getattr(logging, settings.LOG_LEVEL.upper())
+    renderer = (
+        structlog.processors.JSONRenderer(serializer=_dumps) if settings.LOG_FORMAT == "json"
+        else structlog.dev.ConsoleRenderer()
+    )
+    processors = [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.filter_by_level,
+        EventSampler(settings.LOG_SAMPLE_RATES, settings.LOG_RATE_LIMIT_PER_SECOND, settings.LOG_RATE_LIMITED_LEVELS),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.StackInfoRenderer(),
+        # Exceptions must be formatted where they are caught, not on the writer thread
+        structlog.processors.format_exc_info,
+        structlog.processors.UnicodeDecoder(),
+    ]
+
+    if not settings.LOG_QUEUE_ENABLED:
+        # Configure structlog
+        structlog.configure(
+            processors=processors + [renderer],
+            wrapper_class=structlog.stdlib.BoundLogger,
+            context_class=dict,
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            cache_logger_on_first_use=True,
+        )
+
+        # Configure standard logging
+        logging.basicConfig(
+            format="%(message)s",
+            stream=stream,
+            level=level,
+        )
+        return
+
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.stdlib.filter_by_level,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer() if settings.LOG_FORMAT == "json"
-            else structlog.dev.ConsoleRenderer(),
-        ],
+        processors=processors + [structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
         wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
-    # Configure standard logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL.upper()),
-    )
+    # Runs on the writer thread; stdlib records (uvicorn, libraries) get the same format
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(structlog.stdlib.ProcessorFormatter(
+        processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, renderer],
+        foreign_pre_chain=[
+            _record_timestamp,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.format_exc_info,
+        ],
+    ))
+
+    records: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(records)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    if not configured:
+        root.setLevel(level)
+
+    _listener = QueueListener(records, writer)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
 
 
 def get_logger(name: str) -> Any:
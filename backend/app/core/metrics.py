@@ -0,0 +1,192 @@
+"""
+Prometheus instruments and request-latency middleware.
+"""
+import time
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+registry = CollectorRegistry(auto_describe=True)
+
+REQUEST_LATENCY = Histogram(
+    "reconcraft_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry=registry,
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "reconcraft_http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    registry=registry,
+)
+
+QUEUE_DEPTH = Gauge(
+    "reconcraft_queue_depth",
+    "Runs waiting to be executed.",
+    ["queue"],
+    registry=registry,
+)
+
+RUNS = Gauge(
+    "reconcraft_runs",
+    "Stored runs by status.",
+    ["status"],
+    registry=registry,
+)
+
+RESOURCES = Gauge(
+    "reconcraft_resources",
+    "Stored resources by kind.",
+    ["kind"],
+    registry=registry,
+)
+
+EXECUTOR_ACTIVE_RUNS = Gauge(
+    "reconcraft_executor_active_runs",
+    "Runs currently executing in this process.",
+    registry=registry,
+)
+
+EXECUTOR_ACTIVE_STEPS = Gauge(
+    "reconcraft_executor_active_steps",
+    "Workflow steps currently executing in this process.",
+    registry=registry,
+)
+
+EXECUTOR_RUNS_FINISHED = Counter(
+    "reconcraft_executor_runs_finished",
+    "Runs finished by this process, by final status.",
+    ["status"],
+    registry=registry,
+)
+
+SCHEDULER_QUEUED_RUNS = Gauge(
+    "reconcraft_scheduler_queued_runs",
+    "Runs waiting for an executor slot in this process, by priority.",
+    ["priority"],
+    registry=registry,
+)
+
+SCHEDULER_QUEUE_WAIT = Histogram(
+    "reconcraft_scheduler_queue_wait_seconds",
+    "Time runs waited for an executor slot, by priority.",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+    registry=registry,
+)
+
+SCAN_ADMISSION_WAIT = Histogram(
+    "reconcraft_scan_admission_wait_seconds",
+    "Time scan units waited for per-network and per-host rate limit tokens.",
+    buckets=(0.0, 0.1, 0.5, 1.0, 2.5, 5.0, 15.0, 30.0, 60.0, 300.0),
+    registry=registry,
+)
+
+STEP_PHASE_SECONDS = Histogram(
+    "reconcraft_step_phase_seconds",
+    "Time scan units spent per phase (queued, admission, spawn, firstOutput, runtime, parse, persist), "
+    "and whole steps (phase=step), by tool.",
+    ["tool", "phase"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+    registry=registry,
+)
+
+STEP_TOOL_CPU_SECONDS = Histogram(
+    "reconcraft_step_tool_cpu_seconds",
+    "CPU time used by one tool process or container, by tool.",
+    ["tool"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+    registry=registry,
+)
+
+STEP_TOOL_MAX_RSS_BYTES = Histogram(
+    "reconcraft_step_tool_max_rss_bytes",
+    "Peak resident memory of one tool process or container, by tool.",
+    ["tool"],
+    buckets=tuple(2 ** n * 1024 * 1024 for n in range(2, 13)),  # 4 MiB .. 4 GiB
+    registry=registry,
+)
+
+REQUEST_DB_SECONDS = Histogram(
+    "reconcraft_http_request_db_seconds",
+    "MongoDB command time spent per HTTP request, by route template.",
+    ["method", "route"],
+    buckets=(0.0, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+
+DB_COMMAND_SECONDS = Histogram(
+    "reconcraft_db_command_duration_seconds",
+    "MongoDB command latency, by command name.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    registry=registry,
+)
+
+AUDIT_EVENTS_DROPPED = Counter(
+    "reconcraft_audit_events_dropped",
+    "Audit events discarded because the sink queue was full or the write failed.",
+    registry=registry,
+)
+
+AUDIT_EVENTS_SPILLED = Counter(
+    "reconcraft_audit_events_spilled",
+    "Audit events written to the on-disk spill file.",
+    registry=registry,
+)
+
+LOG_EVENTS_DROPPED = Counter(
+    "reconcraft_log_events_dropped",
+    "Log events discarded by sampling, rate limiting or a full writer queue, by reason.",
+    ["reason"],
+    registry=registry,
+)
+
+
+def render_latest() -> bytes:
+    """Render every instrument in Prometheus text exposition format."""
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """Record per-route request latency.
+
+    Routes are labelled by their path template (``/api/workflows/{workflow_id}``)
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path_format", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
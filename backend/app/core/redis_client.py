@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Optional
+import redis
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RedisManager:
+    """Shared async Redis connection pool."""
+
+    def __init__(self):
+        self.pool: Optional[ConnectionPool] = None
+        self.client: Optional[Redis] = None
+
+    async def connect(self):
+        """Create the pool and verify Redis is reachable.
+
+        Redis backs optional features (caching, rate limiting, queue stats), so an
+        unreachable server is logged rather than failing startup.
+        """
+        self.pool = ConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=30,
+        )
+        self.client = Redis(connection_pool=self.pool)
+
+        try:
+            await self.client.ping()
+            logger.info("Connected to Redis", host=settings.REDIS_HOST, db=settings.REDIS_DB)
+        except RedisError as e:
+            logger.warning("Redis unavailable at startup", error=str(e))
+
+    async def disconnect(self):
+        """Close the pool."""
+        if self.client is not None:
+            await self.client.aclose()
+        if self.pool is not None:
+            await self.pool.disconnect()
+            logger.info("Disconnected from Redis")
+        self.client = None
+        self.pool = None
+
+
+# Global Redis instance
+redis_manager = RedisManager()
+
+
+async def get_redis() -> Redis:
+    """Get the shared Redis client."""
+    if redis_manager.client is None:
+        raise RuntimeError("Redis not initialized")
+    return redis_manager.client
+
+
+@lru_cache(maxsize=1)
+def get_sync_redis() -> redis.Redis:
+    """Synchronous client for RQ, which does not support asyncio connections."""
+    return redis.Redis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=30,
+    )
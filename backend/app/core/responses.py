@@ -0,0 +1,112 @@
+from typing import Any, Iterable, List, Type, TypeVar
+import anyio
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _has_serializers(model: Type[BaseModel]) -> bool:
+    decorators = model.__pydantic_decorators__
+    return bool(decorators.field_serializers or decorators.model_serializers)
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder for types orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        if _has_serializers(type(obj)):
+            return obj.model_dump(mode="json")
+        # Field values only; nested models and raw dicts recurse through orjson
+        return obj.__dict__
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def from_document(model: Type[ModelT], doc: dict) -> ModelT:
+    """Build a model from a database document.
+
+    The document is validated like the declared response_model would be, so
+    nested models get their defaults; pydantic-core makes this cheaper than the
+    jsonable_encoder pass it replaces.
+    """
+    return model.model_validate(doc)
+
+
+def from_documents(model: Type[ModelT], docs: Iterable[dict]) -> List[ModelT]:
+    """Build models from database documents, validating them."""
+    validate = model.model_validate
+    return [validate(doc) for doc in docs]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Returning this directly from a route bypasses response_model validation,
+    so content should be models built with from_document(s).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response whose generator is still reading the request body.
+
+    StreamingResponse normally consumes ``receive`` to watch for disconnects,
+    which would swallow body chunks; here the request stream sees the
+    disconnect instead.
+    """
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        await anyio.sleep_forever()
+
+
+class _StreamingAwareGZipResponder(GZipResponder):
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int, excluded: Iterable[str]):
+        super().__init__(app, minimum_size, compresslevel=compresslevel)
+        self.excluded = excluded
+
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            media_type = Headers(raw=message["headers"]).get("content-type", "").split(";")[0].strip()
+            if media_type in self.excluded:
+                # Sent as is, like a response that set its own Content-Encoding
+                self.content_encoding_set = True
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves progress streams uncompressed.
+
+    Starlette's gzip responder only emits what the compressor has flushed, so
+    an NDJSON or SSE stream would reach gzip-accepting clients in a few large
+    bursts instead of line by line. Responses of the excluded media types are
+    passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9,
+                 excluded_media_types: Iterable[str] = ()):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.excluded_media_types = frozenset(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _StreamingAwareGZipResponder(
+                self.app, self.minimum_size, self.compresslevel, self.excluded_media_types
+            )
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
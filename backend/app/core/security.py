@@ -1,14 +1,20 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Verified principals keyed by token digest; entries never outlive the token's exp
+_principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
@@ -48,9 +54,13 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Get the current authenticated user from JWT token."""
-    token = credentials.credentials
+def resolve_principal(token: str) -> dict:
+    """Resolve a bearer token to its principal, reusing recent verifications."""
+    digest = hashlib.sha256(token.encode()).digest()
+    principal = _principal_cache.get(digest)
+    if principal is not None:
+        return dict(principal)
+
     payload = decode_access_token(token)
 
     user_id: str = payload.get("sub")
@@ -61,7 +71,29 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return {"user_id": user_id, "api_key": payload.get("api_key")}
+    principal = {"user_id": user_id, "key_id": payload.get("kid")}
+
+    # decode_access_token already rejected expired tokens, so exp is in the future
+    ttl = min(float(settings.PRINCIPAL_CACHE_TTL), payload["exp"] - time.time())
+    if ttl > 0:
+        _principal_cache.set(digest, principal, ttl=ttl)
+
+    return dict(principal)
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get the current authenticated user from JWT token."""
+    return resolve_principal(credentials.credentials)
+
+
+async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    """Allow only users listed in ADMIN_USER_IDS."""
+    if current_user["user_id"] not in settings.ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
 
 
 def verify_api_key(api_key: str, hashed_key: str) -> bool:
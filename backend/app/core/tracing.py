@@ -0,0 +1,140 @@
+"""
+Request tracing: trace and span ids in the log context, MongoDB time per request, slow-request log.
+"""
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+import structlog
+from pymongo import monitoring
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import DB_COMMAND_SECONDS, REQUEST_DB_SECONDS
+
+logger = get_logger(__name__)
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class RequestTrace:
+    """Identity and database time of the request being handled."""
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    db_seconds: float = 0.0
+    db_commands: int = 0
+    slowest_command: Optional[Tuple[str, float]] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_command(self, name: str, seconds: float):
+        # Motor runs commands on executor threads, possibly several at once
+        with self._lock:
+            self.db_seconds += seconds
+            self.db_commands += 1
+            if self.slowest_command is None or seconds > self.slowest_command[1]:
+                self.slowest_command = (name, seconds)
+
+
+# Motor copies the context into its executor threads, so command listeners see this
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Trace id and parent span id from a W3C ``traceparent`` header."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2)
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """Charges MongoDB command time to the current request and the command histogram."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1_000_000
+        DB_COMMAND_SECONDS.labels(command=event.command_name).observe(seconds)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_command(event.command_name, seconds)
+
+
+class TracingMiddleware:
+    """Give each request a trace and span id, and log requests slower than SLOW_REQUEST_SECONDS.
+
+    An incoming ``traceparent`` header continues the caller's trace. The ids are
+    bound to the structlog context for every log line the request emits, and
+    returned in ``traceparent`` and ``X-Trace-Id`` response headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        trace = RequestTrace(
+            trace_id=parent[0] if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent[1] if parent else None,
+        )
+        token = current_trace.set(trace)
+        log_context = structlog.contextvars.bind_contextvars(trace_id=trace.trace_id, span_id=trace.span_id)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.setdefault("headers", [])
+                headers.append((b"traceparent", f"00-{trace.trace_id}-{trace.span_id}-01".encode()))
+                headers.append((b"x-trace-id", trace.trace_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path_format", "unmatched")
+            REQUEST_DB_SECONDS.labels(method=scope["method"], route=route).observe(trace.db_seconds)
+            if elapsed >= settings.SLOW_REQUEST_SECONDS:
+                slowest = trace.slowest_command
+                logger.warning(
+                    "Slow request",
+                    method=scope["method"],
+                    route=route,
+                    path=scope["path"],
+                    status=status_code,
+                    duration_ms=round(elapsed * 1000, 1),
+                    db_ms=round(trace.db_seconds * 1000, 1),
+                    # Concurrent commands can add up to more than the request took
+                    handler_ms=round(max(elapsed - trace.db_seconds, 0.0) * 1000, 1),
+                    db_commands=trace.db_commands,
+                    slowest_command=slowest[0] if slowest else None,
+                    slowest_command_ms=round(slowest[1] * 1000, 1) if slowest else None,
+                )
+            structlog.contextvars.reset_contextvars(**log_context)
+            current_trace.reset(token)
+
+
+# Registered on the Motor client in database.py
+command_timing_listener = CommandTimingListener()
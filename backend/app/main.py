@@ -2,9 +2,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.core.logging import setup_logging, get_logger
+from app.core.logging import setup_logging, shutdown_logging, get_logger
 from app.core.database import db_manager
-from app.api.routes import auth, workflows, runs, targets, integrations, health
+from app.core.redis_client import redis_manager
+from app.core.metrics import MetricsMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.responses import FastJSONResponse, StreamingAwareGZipMiddleware
+from app.services.audit_sink import audit_sink
+from app.services.retention import retention_service
+from app.services.run_reaper import run_reaper
+from app.services.run_scheduler import run_scheduler
+from app.services.schedule_runner import schedule_runner
+from app.api.routes import admin, auth, workflows, runs, schedules, targets, integrations, health
 
 # Setup logging
 setup_logging()
@@ -20,14 +29,46 @@ async def lifespan(app: FastAPI):
     # Connect to MongoDB
     await db_manager.connect()
 
+    # Start batched audit-log writer
+    await audit_sink.start(db_manager.db.audit_logs)
+
+    # Connect to Redis
+    await redis_manager.connect()
+
+    # Compact and expire old runs in the background
+    if settings.RETENTION_ENABLED:
+        retention_service.start(db_manager.db)
+
+    # Fair dispatch of queued runs, and resumption of runs whose executor died
+    run_scheduler.start(db_manager.db)
+    run_reaper.start(db_manager.db)
+
+    # Recurring runs
+    if settings.SCHEDULES_ENABLED:
+        schedule_runner.start(db_manager.db)
+
     yield
 
     # Shutdown
     logger.info("Shutting down ReconCraft Backend")
 
+    await schedule_runner.stop()
+    await run_reaper.stop()
+    await run_scheduler.stop()
+    await retention_service.stop()
+
+    # Disconnect from Redis
+    await redis_manager.disconnect()
+
+    # Flush queued audit events
+    await audit_sink.stop()
+
     # Disconnect from MongoDB
     await db_manager.disconnect()
 
+    # Write out queued log lines
+    shutdown_logging()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -35,6 +76,7 @@ app = FastAPI(
     description="Backend API for ReconCraft Studio - No-Code Security Reconnaissance Platform",
     version=settings.API_VERSION,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json"
@@ -48,13 +90,30 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Compress large payloads (workflow canvases, run logs), but not progress streams
+app.add_middleware(
+    StreamingAwareGZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
+    excluded_media_types=settings.GZIP_EXCLUDED_MEDIA_TYPES,
+)
+
+# Route-level latency histograms for /api/metrics/prometheus
+app.add_middleware(MetricsMiddleware)
+
+# Trace ids for every log line of a request, DB time per request, slow-request log
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(health.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(workflows.router, prefix="/api")
 app.include_router(runs.router, prefix="/api")
+app.include_router(schedules.router, prefix="/api")
 app.include_router(targets.router, prefix="/api")
 app.include_router(integrations.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 @app.get("/")
@@ -7,6 +7,8 @@ class APIKey(BaseModel):
     """API Key model."""
     id: str
     key: str  # This will be hashed
+    keyId: Optional[str] = None  # Public lookup id embedded in the raw key
+    lookupDigest: Optional[str] = None  # SHA-256 of legacy keys issued without keyId
     userId: str
     name: Optional[str] = None
     createdAt: datetime
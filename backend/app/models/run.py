@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from app.models.target import TargetSelector
 
 
 class RunStatus(str, Enum):
@@ -10,6 +11,7 @@ class RunStatus(str, Enum):
     RUNNING = "running"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class StepStatus(str, Enum):
@@ -18,6 +20,14 @@ class StepStatus(str, Enum):
     RUNNING = "running"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class RunPriority(str, Enum):
+    """Scheduling class of a run."""
+    INTERACTIVE = "interactive"
+    SCHEDULED = "scheduled"
+    BULK = "bulk"
 
 
 class FindingSeverity(str, Enum):
@@ -37,6 +47,7 @@ class Finding(BaseModel):
     service: Optional[str] = None
     port: Optional[int] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    fingerprint: Optional[str] = None
 
 
 class RunStep(BaseModel):
@@ -49,6 +60,10 @@ class RunStep(BaseModel):
     startedAt: Optional[datetime] = None
     completedAt: Optional[datetime] = None
     error: Optional[str] = None
+    completedTargets: List[str] = Field(default_factory=list)  # checkpoint for resumed runs
+    shards: Optional[Dict[str, int]] = None  # total/done/failed for sharded steps
+    tuning: Optional[Dict[str, Any]] = None  # concurrency and nmap timing chosen by the scan tuner
+    timings: Optional[Dict[str, Any]] = None  # phase totals, tool CPU/memory and the slowest targets
 
 
 class RunSeverityCounts(BaseModel):
@@ -72,8 +87,15 @@ class Run(BaseModel):
     workflowName: str
     status: RunStatus
     targets: List[str] = Field(default_factory=list)
+    selector: Optional[TargetSelector] = None
+    resolvedTargetCount: Optional[int] = None  # selector matches when the run was created
+    exclusions: List[str] = Field(default_factory=list)
+    targetPlan: Optional[Dict[str, int]] = None
     authorizeTargets: bool = False
-    runMode: str = "live"  # "live" or "demo"
+    runMode: str = "live"  # "live", "demo" or "simulate"
+    simulation: Optional[Dict[str, Any]] = None  # profile overrides by node kind, for "simulate" runs
+    priority: RunPriority = RunPriority.INTERACTIVE
+    scheduleId: Optional[str] = None  # set for runs started by a schedule
     startedAt: datetime = Field(default_factory=datetime.utcnow)
     endedAt: Optional[datetime] = None
     duration: Optional[int] = None  # in seconds
@@ -81,19 +103,28 @@ class Run(BaseModel):
     summary: Optional[RunSummary] = None
     userId: Optional[str] = None
     error: Optional[str] = None
-
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    workflowSnapshot: Optional[Dict[str, Any]] = None  # what a resumed run executes
+    leaseOwner: Optional[str] = None
+    leaseExpiresAt: Optional[datetime] = None
+    attempts: int = 0
+    resumedAt: Optional[datetime] = None
+    cancelledAt: Optional[datetime] = None
+    compactAfter: Optional[datetime] = None
+    compactedAt: Optional[datetime] = None
+    expireAt: Optional[datetime] = None
+    archive: Optional[Dict[str, Any]] = None  # where compacted logs and raw outputs live
 
 
 class RunCreate(BaseModel):
     """Create run request."""
     workflowId: str
-    targets: List[str]
+    targets: List[str] = Field(default_factory=list)
+    selector: Optional[TargetSelector] = None
+    exclusions: List[str] = Field(default_factory=list)
     authorizeTargets: bool = False
     runMode: str = "live"
+    simulation: Optional[Dict[str, Any]] = None
+    priority: Optional[RunPriority] = None  # derived from the run size when omitted
 
 
 class RunResponse(BaseModel):
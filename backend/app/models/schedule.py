@@ -0,0 +1,81 @@
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+from app.models.target import TargetSelector
+from app.services.cron import CronExpression
+
+
+class CatchUpPolicy(str, Enum):
+    """What to do with fire times missed while the backend was down or saturated."""
+    SKIP = "skip"  # drop missed fires, wait for the next one
+    ONCE = "once"  # run once for all missed fires
+    ALL = "all"  # run every missed fire, up to SCHEDULE_MAX_CATCH_UP
+
+
+class Schedule(BaseModel):
+    """Recurring run of a workflow."""
+    id: str
+    name: str
+    workflowId: str
+    cron: Optional[str] = None
+    intervalSeconds: Optional[int] = None
+    targets: List[str] = Field(default_factory=list)
+    selector: Optional[TargetSelector] = None
+    exclusions: List[str] = Field(default_factory=list)
+    authorizeTargets: bool = False
+    runMode: str = "live"
+    catchUp: CatchUpPolicy = CatchUpPolicy.ONCE
+    jitterSeconds: Optional[int] = None  # max start delay; derived from the period when omitted
+    enabled: bool = True
+    userId: Optional[str] = None
+    nominalRunAt: Optional[datetime] = None  # next fire time before jitter
+    nextRunAt: Optional[datetime] = None
+    lastRunAt: Optional[datetime] = None
+    lastRunId: Optional[str] = None
+    lastError: Optional[str] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ScheduleCreate(BaseModel):
+    """Create schedule request; exactly one of cron or intervalSeconds is required."""
+    name: str
+    workflowId: str
+    cron: Optional[str] = None
+    intervalSeconds: Optional[int] = Field(None, ge=60)
+    targets: List[str] = Field(default_factory=list)
+    selector: Optional[TargetSelector] = None
+    exclusions: List[str] = Field(default_factory=list)
+    authorizeTargets: bool = False
+    runMode: str = "live"
+    catchUp: CatchUpPolicy = CatchUpPolicy.ONCE
+    jitterSeconds: Optional[int] = Field(None, ge=0)
+    enabled: bool = True
+
+    @validator('cron')
+    def validate_cron(cls, v):
+        """Reject malformed or never-firing expressions."""
+        if v is not None:
+            CronExpression.parse(v).next_after(datetime.utcnow())
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def validate_trigger(cls, values):
+        """Exactly one trigger."""
+        if (values.get('cron') is None) == (values.get('intervalSeconds') is None):
+            raise ValueError("Specify exactly one of cron or intervalSeconds")
+        return values
+
+
+class ScheduleUpdate(BaseModel):
+    """Partial schedule update."""
+    enabled: Optional[bool] = None
+    catchUp: Optional[CatchUpPolicy] = None
+    jitterSeconds: Optional[int] = Field(None, ge=0)  # null goes back to the derived jitter
+
+    @validator('enabled', 'catchUp')
+    def reject_null(cls, v):
+        """Omit a field to leave it unchanged; null would be stored as is."""
+        if v is None:
+            raise ValueError("Cannot be null")
+        return v
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import ipaddress
 import re
@@ -8,7 +8,7 @@ import re
 class Target(BaseModel):
     """Authorized scan target."""
     id: str
-    value: str  # IP, CIDR, or hostname
+    value: str  # IP, CIDR, hostname, or *.hostname for its subdomains
     tags: List[str] = Field(default_factory=list)
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
@@ -31,17 +31,13 @@ class Target(BaseModel):
         except ValueError:
             pass
 
-        # Validate as hostname
+        # Validate as hostname; a leading "*." authorizes its subdomains
         hostname_pattern = r'^([a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?\.)*[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?$'
-        if re.match(hostname_pattern, v):
+        hostname = v[2:] if v.startswith("*.") else v
+        if re.match(hostname_pattern, hostname):
             return v
 
-        raise ValueError(f"Invalid target format: {v}. Must be IP, CIDR, or hostname")
-
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+        raise ValueError(f"Invalid target format: {v}. Must be IP, CIDR, hostname or *.hostname")
 
 
 class TargetCreate(BaseModel):
@@ -58,3 +54,45 @@ class TargetCreate(BaseModel):
 class TargetBulkCreate(BaseModel):
     """Bulk create targets request."""
     targets: List[str]
+
+
+class TargetImportProgress(BaseModel):
+    """Cumulative progress of a bulk target import."""
+    chunk: int = 0
+    received: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    failed: int = 0
+    done: bool = False
+
+
+class TargetSelector(BaseModel):
+    """Selects authorized targets by tag, optionally narrowing a saved target set."""
+    tags: List[str] = Field(default_factory=list)  # must have all
+    anyTags: List[str] = Field(default_factory=list)  # must have at least one
+    excludeTags: List[str] = Field(default_factory=list)  # must have none
+    targetSetId: Optional[str] = None
+
+
+class TargetSet(BaseModel):
+    """Saved, named target selector."""
+    id: str
+    name: str
+    description: Optional[str] = None
+    selector: TargetSelector
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TargetSetCreate(BaseModel):
+    """Create target set request."""
+    name: str
+    description: Optional[str] = None
+    selector: TargetSelector
+
+    @validator('selector')
+    def validate_selector(cls, v):
+        """Saved sets select by tag only, they cannot nest other sets."""
+        if v.targetSetId:
+            raise ValueError("A target set cannot reference another target set")
+        return v
@@ -41,6 +41,7 @@ class WorkflowNode(BaseModel):
     category: NodeCategory
     config: Dict[str, Any] = Field(default_factory=dict)
     position: Position
+    timeoutSeconds: Optional[int] = Field(None, gt=0)
 
 
 class WorkflowEdge(BaseModel):
@@ -64,10 +65,14 @@ class Workflow(BaseModel):
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
     authorizedTargets: bool = False
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+
+class WorkflowSummary(BaseModel):
+    """Workflow listing entry without the canvas (nodes and edges)."""
+    id: str
+    name: str
+    createdAt: datetime
+    updatedAt: datetime
+    authorizedTargets: bool = False
 
 
 class WorkflowCreate(BaseModel):
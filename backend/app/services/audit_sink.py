@@ -0,0 +1,206 @@
+"""
+Asynchronous, batched audit-log writer.
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import List, Optional
+import orjson
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import AUDIT_EVENTS_DROPPED, AUDIT_EVENTS_SPILLED
+from app.core.responses import dumps
+
+logger = get_logger(__name__)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP = "drop"
+OVERFLOW_SPILL = "spill"
+
+_DUPLICATE_KEY = 11000
+
+
+class AuditSink:
+    """Buffers audit events in a bounded queue and writes them with insert_many.
+
+    When the queue is full, ``overflow`` decides what happens: ``block`` waits for
+    room, ``drop`` discards the event and counts it, and ``spill`` appends it to a
+    JSON-lines file that is replayed on the next start. Events whose write fails
+    are spilled under ``spill`` and dropped otherwise.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = OVERFLOW_DROP,
+        spill_path: Optional[str] = None
+    ):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_SPILL):
+            raise ValueError(f"Unknown audit overflow policy: {overflow}")
+        if overflow == OVERFLOW_SPILL and not spill_path:
+            raise ValueError("Audit overflow policy 'spill' requires a spill path")
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.dropped = 0
+        self.spilled = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[dict] = []
+        self._pending: Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, collection: AsyncIOMotorCollection):
+        """Start the background writer, replaying any spilled events first."""
+        self._collection = collection
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        await self._replay_spill()
+        self._task = asyncio.create_task(self._run(), name="audit-sink")
+        logger.info("Audit sink started", overflow=self.overflow, batch_size=self.batch_size)
+
+    async def stop(self):
+        """Stop accepting events and flush everything still queued."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # A write cancelled mid-flight keeps going under shield; wait for it
+        if self._pending is not None and not self._pending.done():
+            await self._pending
+
+        remaining, self._batch = self._batch, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._write(remaining[start:start + self.batch_size])
+
+        logger.info("Audit sink stopped", flushed=len(remaining), dropped=self.dropped)
+
+    async def put(self, event: dict):
+        """Queue an event for writing without waiting on the database."""
+        if self.overflow == OVERFLOW_BLOCK:
+            await self._queue.put(event)
+            return
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if self.overflow == OVERFLOW_SPILL:
+                await self._spill([event])
+            else:
+                self.dropped += 1
+                AUDIT_EVENTS_DROPPED.inc()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+
+            # Give a burst a moment to accumulate into one insert_many
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._batch = self._batch, []
+            self._pending = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._pending)
+
+    async def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            await self._collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Unordered, so only the listed events failed; a duplicate key means one was already stored
+            failed = [
+                batch[error["index"]] for error in e.details.get("writeErrors", [])
+                if error.get("code") != _DUPLICATE_KEY
+            ]
+            if failed:
+                logger.error("Failed to write audit events", count=len(failed), error=str(e))
+                await self._write_failed(failed)
+        except PyMongoError as e:
+            logger.error("Failed to write audit events", count=len(batch), error=str(e))
+            await self._write_failed(batch)
+
+    async def _write_failed(self, events: List[dict]):
+        if self.overflow == OVERFLOW_SPILL:
+            await self._spill(events)
+        else:
+            self.dropped += len(events)
+            AUDIT_EVENTS_DROPPED.inc(len(events))
+
+    async def _spill(self, events: List[dict]):
+        # Keep any _id insert_many assigned, so a replay cannot store an event twice
+        lines = b"".join(dumps(e) + b"\n" for e in events)
+        await asyncio.to_thread(_append, self.spill_path, lines)
+        self.spilled += len(events)
+        AUDIT_EVENTS_SPILLED.inc(len(events))
+
+    async def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+
+        data = await asyncio.to_thread(_read_and_remove, self.spill_path)
+        events = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            event = orjson.loads(line)
+            if "_id" in event:
+                event["_id"] = ObjectId(event["_id"])
+            if isinstance(event.get("timestamp"), str):
+                event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+            events.append(event)
+
+        for start in range(0, len(events), self.batch_size):
+            await self._write(events[start:start + self.batch_size])
+
+        logger.info("Replayed spilled audit events", count=len(events))
+
+
+def _append(path: str, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def _read_and_remove(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+
+# Global audit sink instance
+audit_sink = AuditSink(
+    max_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    overflow=settings.AUDIT_OVERFLOW,
+    spill_path=settings.AUDIT_SPILL_PATH or None
+)
@@ -1,14 +1,65 @@
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import secrets
+import time
 import uuid
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.auth import APIKey, APIKeyCreate, APIKeyResponse, TokenResponse, AuditLog
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import get_password_hash, verify_password, create_access_token
 from app.core.logging import get_logger
+from app.services.audit_sink import audit_sink
 
 logger = get_logger(__name__)
 
+API_KEY_PREFIX = "rcs"
+
+# Recently verified keys, keyed by digest of the raw key, so hot clients skip bcrypt
+_verified_keys = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.API_KEY_CACHE_TTL)
+
+# Legacy-format keys that matched nothing, so repeating one does not rescan
+_rejected_legacy_keys = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.LEGACY_KEY_REJECT_TTL)
+
+# Legacy scans per client in the current one-minute window: (count, window end)
+_legacy_scans = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=60)
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """Generate a raw API key of the form rcs_<keyid>_<secret>; returns (key_id, raw_key)."""
+    key_id = secrets.token_hex(8)
+    return key_id, f"{API_KEY_PREFIX}_{key_id}_{secrets.token_urlsafe(32)}"
+
+
+def parse_key_id(api_key: str) -> Optional[str]:
+    """Extract the public key id from a raw API key, if it has one."""
+    parts = api_key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX:
+        return None
+
+    key_id = parts[1]
+    if len(key_id) != 16 or any(c not in "0123456789abcdef" for c in key_id):
+        return None
+    return key_id
+
+
+def _key_digest(api_key: str) -> str:
+    # Keys carry 256 bits of entropy, so a plain digest is safe as a lookup handle
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _allow_legacy_scan(client: str) -> bool:
+    """Count a legacy scan against the client's per-minute budget."""
+    now = time.monotonic()
+    count, window_end = _legacy_scans.get(client) or (0, now + 60)
+    if count >= settings.LEGACY_KEY_SCANS_PER_MINUTE:
+        logger.warning("Legacy API key scan rate limited", client=client)
+        return False
+    _legacy_scans.set(client, (count + 1, window_end), ttl=window_end - now)
+    return True
+
 
 class AuthService:
     """Authentication service."""
@@ -21,12 +72,13 @@ class AuthService:
     async def create_api_key(self, request: APIKeyCreate) -> APIKeyResponse:
         """Create a new API key."""
         # Generate a secure API key
-        raw_key = f"rcs_{secrets.token_urlsafe(32)}"
-        hashed_key = get_password_hash(raw_key)
+        key_id, raw_key = generate_api_key()
+        hashed_key = await asyncio.to_thread(get_password_hash, raw_key)
 
         api_key = APIKey(
             id=str(uuid.uuid4()),
             key=hashed_key,
+            keyId=key_id,
             userId=request.userId,
             name=request.name,
             createdAt=datetime.utcnow(),
@@ -47,33 +99,93 @@ class AuthService:
             createdAt=api_key.createdAt
         )
 
-    async def verify_api_key(self, api_key: str) -> Optional[APIKey]:
-        """Verify an API key and return the associated key object."""
-        # Find all active keys
-        cursor = self.api_keys_collection.find({"isActive": True})
+    async def verify_api_key(self, api_key: str, client: Optional[str] = None) -> Optional[APIKey]:
+        """Verify an API key and return the associated key object.
+
+        ``client`` (the caller's address) bounds how often it may trigger the
+        bcrypt scan over legacy keys.
+        """
+        digest = _key_digest(api_key)
+        cached = _verified_keys.get(digest)
+        if cached is not None and not self._is_expired(cached):
+            # Indexed lookup only, so a deactivated key stops working immediately
+            if await self.api_keys_collection.find_one({"id": cached.id, "isActive": True}, {"_id": 1}):
+                return cached
+            _verified_keys.pop(digest)
+            return None
+
+        key_id = parse_key_id(api_key)
+        if key_id:
+            # One indexed lookup and a single bcrypt check off the event loop
+            key_doc = await self.api_keys_collection.find_one({"keyId": key_id, "isActive": True})
+            if not key_doc or not await asyncio.to_thread(verify_password, api_key, key_doc["key"]):
+                return None
+        else:
+            key_doc = await self._find_legacy_key(api_key, digest, client)
+            if not key_doc:
+                return None
+
+        verified = APIKey(**key_doc)
+        if self._is_expired(verified):
+            return None
+
+        # Update last used timestamp (once per cache window)
+        await self.api_keys_collection.update_one(
+            {"id": verified.id},
+            {"$set": {"lastUsedAt": datetime.utcnow()}}
+        )
+
+        _verified_keys.set(digest, verified)
+        return verified
 
+    async def _find_legacy_key(self, api_key: str, digest: str, client: Optional[str]) -> Optional[dict]:
+        """Find and verify a key issued before key ids existed.
+
+        Migrated legacy keys match by digest. Unmigrated ones still need a
+        bcrypt scan, after which the digest is stored so the scan happens once.
+        Keys that fail the scan are remembered for LEGACY_KEY_REJECT_TTL, and
+        each client may start LEGACY_KEY_SCANS_PER_MINUTE scans.
+        """
+        # Legacy keys were rcs_ followed by token_urlsafe(32), i.e. 43 characters
+        if not api_key.startswith(f"{API_KEY_PREFIX}_") or len(api_key) != 47:
+            return None
+
+        key_doc = await self.api_keys_collection.find_one({"lookupDigest": digest, "isActive": True})
+        if key_doc:
+            return key_doc
+
+        if _rejected_legacy_keys.get(digest) or not _allow_legacy_scan(client or ""):
+            return None
+
+        cursor = self.api_keys_collection.find(
+            {"isActive": True, "keyId": None, "lookupDigest": None}
+        )
         async for key_doc in cursor:
-            if verify_password(api_key, key_doc["key"]):
-                # Update last used timestamp
+            if await asyncio.to_thread(verify_password, api_key, key_doc["key"]):
                 await self.api_keys_collection.update_one(
                     {"id": key_doc["id"]},
-                    {"$set": {"lastUsedAt": datetime.utcnow()}}
+                    {"$set": {"lookupDigest": digest}}
                 )
+                logger.info("Legacy API key migrated to digest lookup", key_id=key_doc["id"])
+                return key_doc
 
-                return APIKey(**key_doc)
-
+        _rejected_legacy_keys.set(digest, True)
         return None
 
-    async def create_access_token(self, api_key: str) -> Optional[TokenResponse]:
+    @staticmethod
+    def _is_expired(api_key: APIKey) -> bool:
+        return api_key.expiresAt is not None and api_key.expiresAt <= datetime.utcnow()
+
+    async def create_access_token(self, api_key: str, client: Optional[str] = None) -> Optional[TokenResponse]:
         """Create JWT token from API key."""
-        verified_key = await self.verify_api_key(api_key)
+        verified_key = await self.verify_api_key(api_key, client)
 
         if not verified_key:
             return None
 
         # Create JWT token
         access_token = create_access_token(
-            data={"sub": verified_key.userId, "api_key": api_key}
+            data={"sub": verified_key.userId, "kid": verified_key.id}
         )
 
         logger.info("Access token created", user_id=verified_key.userId)
@@ -81,7 +193,7 @@ class AuthService:
         return TokenResponse(
             accessToken=access_token,
             tokenType="bearer",
-            expiresIn=30 * 60  # 30 minutes
+            expiresIn=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         )
 
     async def log_audit_event(
@@ -105,7 +217,11 @@ class AuthService:
             ipAddress=ip_address
         )
 
-        await self.audit_logs_collection.insert_one(audit_log.dict())
+        # Batched off the request path when the sink runs (API process)
+        if audit_sink.running:
+            await audit_sink.put(audit_log.dict())
+        else:
+            await self.audit_logs_collection.insert_one(audit_log.dict())
 
         logger.info(
             "Audit event logged",
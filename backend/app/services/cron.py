@@ -0,0 +1,106 @@
+"""
+Minimal five-field cron expressions (minute hour day-of-month month day-of-week).
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import FrozenSet, Tuple
+
+# (min, max) per field
+_FIELDS: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# Every valid expression fires at least once in this many days (Feb 29 on a given weekday)
+_SEARCH_DAYS = 366 * 28
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step: {step_text}")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"Value out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronExpression:
+    """Parsed cron expression; day-of-month and day-of-week combine with OR as in cron(8)."""
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]  # 0 = Sunday
+    days_restricted: bool
+    weekdays_restricted: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronExpression":
+        """Parse an expression, raising ValueError if it is malformed."""
+        text = _ALIASES.get(expression.strip().lower(), expression)
+        parts = text.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {len(parts)}: {expression!r}")
+
+        try:
+            fields = [_parse_field(part, low, high) for part, (low, high) in zip(parts, _FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+
+        weekdays = frozenset(d % 7 for d in fields[4])  # 7 is also Sunday
+        return cls(
+            minutes=fields[0],
+            hours=fields[1],
+            days=fields[2],
+            months=fields[3],
+            weekdays=weekdays,
+            days_restricted=parts[2] != "*",
+            weekdays_restricted=parts[4] != "*",
+        )
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.isoweekday() % 7) in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after`` (naive UTC)."""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+
+        for _ in range(_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError("Cron expression never fires")
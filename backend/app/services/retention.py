@@ -0,0 +1,408 @@
+"""
+Run retention: compact old runs into compressed archives and expire them.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis_client import redis_manager
+from app.core.responses import dumps
+from app.models.run import RunStatus
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+logger = get_logger(__name__)
+
+FINISHED_STATUSES = [RunStatus.SUCCEEDED.value, RunStatus.FAILED.value, RunStatus.CANCELLED.value]
+
+# Only one replica sweeps at a time
+RETENTION_LOCK_KEY = "reconcraft:retention:lock"
+
+
+@dataclass
+class RetentionPolicy:
+    """How long runs stay hot (full documents) and cold (compacted) before deletion.
+
+    A cold_days of 0 keeps compacted runs forever.
+    """
+    hot_days: int
+    cold_days: int
+    workflow_id: Optional[str] = None
+    status: Optional[str] = None
+
+    @property
+    def specificity(self) -> int:
+        return (2 if self.workflow_id else 0) + (1 if self.status else 0)
+
+    def matches(self, workflow_id: Optional[str], status: Optional[str]) -> bool:
+        return (
+            (self.workflow_id is None or self.workflow_id == workflow_id)
+            and (self.status is None or self.status == status)
+        )
+
+
+def load_policies() -> List[RetentionPolicy]:
+    """Configured policies, most specific first, ending with the default."""
+    policies = [
+        RetentionPolicy(
+            hot_days=int(p.get("hotDays", settings.RETENTION_HOT_DAYS)),
+            cold_days=int(p.get("coldDays", settings.RETENTION_COLD_DAYS)),
+            workflow_id=p.get("workflowId"),
+            status=p.get("status"),
+        )
+        for p in settings.RETENTION_POLICIES
+    ]
+    policies.sort(key=lambda p: p.specificity, reverse=True)
+    policies.append(RetentionPolicy(settings.RETENTION_HOT_DAYS, settings.RETENTION_COLD_DAYS))
+    return policies
+
+
+def policy_for(
+    workflow_id: Optional[str],
+    status: Optional[str],
+    policies: Optional[List[RetentionPolicy]] = None
+) -> RetentionPolicy:
+    """Pick the most specific policy matching a run."""
+    policies = policies or load_policies()
+    for policy in policies:
+        if policy.matches(workflow_id, status):
+            return policy
+    return policies[-1]
+
+
+def retention_schedule(
+    workflow_id: Optional[str],
+    status: Optional[str],
+    ended_at: datetime,
+    policies: Optional[List[RetentionPolicy]] = None
+) -> Dict[str, Optional[datetime]]:
+    """Fields to stamp on a finished run: when to compact it and when it expires.
+
+    Nothing is stamped while retention is disabled, so those runs are kept.
+    """
+    if not settings.RETENTION_ENABLED:
+        return {}
+    policy = policy_for(workflow_id, status, policies)
+    return {
+        "compactAfter": ended_at + timedelta(days=policy.hot_days),
+        "expireAt": ended_at + timedelta(days=policy.cold_days) if policy.cold_days else None,
+    }
+
+
+def compress(data: bytes) -> Tuple[bytes, str]:
+    """Compress with zstd when configured and installed, otherwise gzip."""
+    if settings.RETENTION_COMPRESSION == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), "zstd"
+    return gzip.compress(data, compresslevel=6), "gzip"
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this archive")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def finding_fingerprint(finding: Dict[str, Any]) -> str:
+    """Stable identity of a finding across runs."""
+    key = "|".join(
+        str(finding.get(field) or "") for field in ("severity", "title", "service", "port")
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def summarize_findings(steps: List[dict]) -> Dict[str, Any]:
+    """RunSummary document built from step findings."""
+    severities = {"low": 0, "medium": 0, "high": 0, "critical": 0}
+    for step in steps:
+        for finding in step.get("findings", []):
+            severity = finding.get("severity")
+            if severity in severities:
+                severities[severity] += 1
+    return {"findingsCount": sum(severities.values()), "severities": severities}
+
+
+def compact_run(run: dict) -> Dict[str, Any]:
+    """Fields replacing a run's bulky content once it is archived.
+
+    Logs are dropped and findings keep their identity and fingerprint but not
+    raw tool output.
+    """
+    steps = []
+    for step in run.get("steps", []):
+        findings = [
+            {
+                **{k: v for k, v in finding.items() if k != "metadata"},
+                "metadata": {},
+                "fingerprint": finding.get("fingerprint") or finding_fingerprint(finding),
+            }
+            for finding in step.get("findings", [])
+        ]
+        steps.append({**step, "logs": [], "findings": findings, "completedTargets": []})
+
+    compacted = {"steps": steps, "summary": run.get("summary") or summarize_findings(run.get("steps", []))}
+    if run.get("error"):
+        # Keep the last line of the traceback; the full text is archived
+        compacted["error"] = run["error"].strip().splitlines()[-1]
+    return compacted
+
+
+class GridFSArchiveStore:
+    """Run archives stored in a GridFS bucket."""
+
+    backend = "gridfs"
+
+    def __init__(self, db: AsyncIOMotorDatabase, bucket_name: str = "run_archives"):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+    async def save(self, run_id: str, data: bytes, codec: str, expire_at: Optional[datetime]) -> str:
+        file_id = await self.bucket.upload_from_stream(
+            f"{run_id}.json.{codec}",
+            data,
+            metadata={"runId": run_id, "codec": codec, "expireAt": expire_at},
+        )
+        return str(file_id)
+
+    async def load(self, location: str) -> bytes:
+        stream = await self.bucket.open_download_stream(ObjectId(location))
+        return await stream.read()
+
+    async def purge(self, now: datetime) -> int:
+        """Delete archives whose runs have expired."""
+        purged = 0
+        cursor = self.bucket.find({"metadata.expireAt": {"$lte": now}})
+        async for grid_out in cursor:
+            await self.bucket.delete(grid_out._id)
+            purged += 1
+        return purged
+
+
+class DiskArchiveStore:
+    """Run archives stored on local disk, grouped by expiry date.
+
+    Single-node only: every replica serving the API must see the same
+    directory, so with several replicas it has to be a shared volume mounted
+    at RETENTION_ARCHIVE_DIR on each of them. Use GridFS otherwise.
+    """
+
+    backend = "disk"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    async def save(self, run_id: str, data: bytes, codec: str, expire_at: Optional[datetime]) -> str:
+        bucket = expire_at.strftime("%Y-%m-%d") if expire_at else "keep"
+        location = os.path.join(bucket, f"{run_id}.json.{codec}")
+        await asyncio.to_thread(_write_file, os.path.join(self.root, location), data)
+        return location
+
+    async def load(self, location: str) -> bytes:
+        return await asyncio.to_thread(_read_file, os.path.join(self.root, location))
+
+    async def purge(self, now: datetime) -> int:
+        """Remove whole expiry-date directories that are in the past."""
+        return await asyncio.to_thread(_purge_dirs, self.root, now.strftime("%Y-%m-%d"))
+
+
+def _write_file(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _purge_dirs(root: str, today: str) -> int:
+    if not os.path.isdir(root):
+        return 0
+    purged = 0
+    for name in os.listdir(root):
+        # Date-named directories sort lexically; "keep" never expires
+        if name != "keep" and name < today:
+            path = os.path.join(root, name)
+            purged += len(os.listdir(path))
+            shutil.rmtree(path, ignore_errors=True)
+    return purged
+
+
+class RetentionService:
+    """Periodically schedules, compacts and purges old runs.
+
+    Finished runs are stamped with ``compactAfter`` and ``expireAt``. Runs past
+    ``compactAfter`` have their logs and raw outputs archived and removed from
+    the document; MongoDB's TTL monitor deletes runs once ``expireAt`` passes.
+    Runs that finished before retention was enabled are only stamped with
+    RETENTION_BACKFILL, since older ones would be deleted right away.
+    """
+
+    def __init__(self, interval: int = 3600, batch_size: int = 100):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.store = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the background sweep loop."""
+        self.db = db
+        self.store = _make_store(db)
+        self._task = asyncio.create_task(self._run(), name="run-retention")
+        logger.info("Run retention started", interval=self.interval, backend=self.store.backend)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if await self._acquire_lock():
+                    await self.run_once()
+            except Exception as e:
+                logger.error("Run retention sweep failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    async def _acquire_lock(self) -> bool:
+        if redis_manager.client is None:
+            return True
+        try:
+            return bool(await redis_manager.client.set(RETENTION_LOCK_KEY, "1", nx=True, ex=self.interval))
+        except RedisError:
+            return True
+
+    async def _extend_lock(self):
+        # A sweep working through a backlog can outlast the interval
+        if redis_manager.client is None:
+            return
+        try:
+            await redis_manager.client.expire(RETENTION_LOCK_KEY, self.interval)
+        except RedisError:
+            pass
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """One full sweep: schedule unstamped runs, compact due runs, purge archives."""
+        now = now or datetime.utcnow()
+        result = {
+            "scheduled": await self.schedule_unstamped() if settings.RETENTION_BACKFILL else 0,
+            "compacted": await self.compact_due(now),
+            "purged": await self.store.purge(now),
+        }
+        logger.info("Run retention sweep finished", **result)
+        return result
+
+    async def schedule_unstamped(self) -> int:
+        """Stamp finished runs that predate retention (or missed it) with a schedule."""
+        policies = load_policies()
+        scheduled = 0
+        while True:
+            # Stamped runs drop out of the query, so each batch picks up where the last ended
+            cursor = self.db.runs.find(
+                {"status": {"$in": FINISHED_STATUSES}, "compactAfter": {"$exists": False}, "compactedAt": {"$exists": False}},
+                {"_id": 0, "id": 1, "workflowId": 1, "status": 1, "endedAt": 1, "startedAt": 1},
+            ).limit(self.batch_size)
+
+            batch = 0
+            async for run in cursor:
+                ended_at = run.get("endedAt") or run.get("startedAt") or datetime.utcnow()
+                schedule = retention_schedule(run.get("workflowId"), run.get("status"), ended_at, policies)
+                await self.db.runs.update_one({"id": run["id"]}, {"$set": schedule})
+                batch += 1
+            scheduled += batch
+            if batch < self.batch_size:
+                return scheduled
+            await self._extend_lock()
+
+    async def compact_due(self, now: datetime) -> int:
+        """Archive and compact runs whose hot window has passed, batch after batch until none are due."""
+        compacted = 0
+        while True:
+            cursor = self.db.runs.find(
+                {"compactAfter": {"$lte": now}, "compactedAt": {"$exists": False}},
+                {"_id": 0},
+            ).sort("compactAfter", 1).limit(self.batch_size)
+
+            batch = 0
+            async for run in cursor:
+                await self.compact(run, now)
+                batch += 1
+            compacted += batch
+            if batch < self.batch_size:
+                return compacted
+            await self._extend_lock()
+
+    async def compact(self, run: dict, now: datetime):
+        """Archive one run's full steps and error, then slim the document down."""
+        raw = dumps({"id": run["id"], "steps": run.get("steps", []), "error": run.get("error")})
+        data, codec = compress(raw)
+        location = await self.store.save(run["id"], data, codec, run.get("expireAt"))
+
+        update = compact_run(run)
+        update["archive"] = {
+            "backend": self.store.backend,
+            "location": location,
+            "codec": codec,
+            "size": len(data),
+            "originalSize": len(raw),
+        }
+        update["compactedAt"] = now
+        await self.db.runs.update_one(
+            {"id": run["id"], "compactedAt": {"$exists": False}},
+            {"$set": update, "$unset": {"compactAfter": ""}},
+        )
+
+    async def load_archive(self, run: dict, db: Optional[AsyncIOMotorDatabase] = None) -> Optional[dict]:
+        """Read back the archived steps and error of a compacted run.
+
+        The archive is read from the backend it was written to, which works
+        even where the sweep is not running or the configured backend changed.
+        """
+        archive = run.get("archive")
+        if not archive:
+            return None
+        store = self.store
+        if store is None or store.backend != archive.get("backend", store.backend):
+            store = archive_store(db if db is not None else self.db, archive.get("backend"))
+        data = await store.load(archive["location"])
+        return orjson.loads(decompress(data, archive["codec"]))
+
+
+def archive_store(db: AsyncIOMotorDatabase, backend: Optional[str]):
+    if backend == "disk":
+        return DiskArchiveStore(settings.RETENTION_ARCHIVE_DIR)
+    return GridFSArchiveStore(db)
+
+
+def _make_store(db: AsyncIOMotorDatabase):
+    return archive_store(db, settings.RETENTION_ARCHIVE_BACKEND)
+
+
+# Global retention service instance
+retention_service = RetentionService(
+    interval=settings.RETENTION_INTERVAL_SECONDS,
+    batch_size=settings.RETENTION_BATCH_SIZE
+)
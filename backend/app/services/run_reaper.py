@@ -0,0 +1,119 @@
+"""
+Detects runs whose executor lease expired and requeues them.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.run import RunPriority, RunStatus
+from app.services.retention import retention_schedule
+from app.services.run_scheduler import QueuedRun, estimate_cost, run_scheduler
+
+logger = get_logger(__name__)
+
+
+class RunReaper:
+    """Requeues queued/running runs whose lease lapsed, e.g. after a crash or deploy.
+
+    A requeued run resumes from its checkpoints. Runs that keep losing their
+    lease are failed after ``max_attempts``.
+    """
+
+    def __init__(self, interval: int = 30, max_attempts: int = 3, batch_size: int = 100):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the background reaper loop."""
+        self.db = db
+        self._task = asyncio.create_task(self._run(), name="run-reaper")
+        logger.info("Run reaper started", interval=self.interval, max_attempts=self.max_attempts)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reap_once()
+            except Exception as e:
+                logger.error("Run reaper sweep failed", error=str(e))
+
+    async def reap_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Requeue or fail every run whose lease has expired."""
+        now = now or datetime.utcnow()
+        result = {"requeued": 0, "failed": 0}
+
+        cursor = self.db.runs.find(
+            {
+                "status": {"$in": [RunStatus.QUEUED, RunStatus.RUNNING]},
+                "leaseExpiresAt": {"$lt": now},
+            },
+            {"_id": 0, "id": 1, "workflowId": 1, "workflowSnapshot": 1, "targets": 1, "exclusions": 1,
+             "selector": 1, "runMode": 1, "attempts": 1, "userId": 1, "priority": 1, "resolvedTargetCount": 1},
+        ).limit(self.batch_size)
+
+        async for run in cursor:
+            workflow_doc = run.get("workflowSnapshot")
+            if workflow_doc is None:
+                workflow_doc = await self.db.workflows.find_one({"id": run.get("workflowId")}, {"_id": 0})
+
+            if run.get("attempts", 0) >= self.max_attempts or workflow_doc is None:
+                reason = "workflow no longer exists" if workflow_doc is None else "too many attempts"
+                if await self._fail(run, now, f"Run lease expired; not resumed: {reason}"):
+                    result["failed"] += 1
+                continue
+
+            self._resume(run, workflow_doc)
+            result["requeued"] += 1
+
+        if result["requeued"] or result["failed"]:
+            logger.info("Run reaper sweep finished", **result)
+        return result
+
+    def _resume(self, run: dict, workflow_doc: dict):
+        # The executor re-acquires the lease atomically, so replicas racing here are safe
+        targets = run.get("targets", [])
+        run_scheduler.submit(QueuedRun(
+            run_id=run["id"],
+            user_id=run.get("userId") or "anonymous",
+            priority=RunPriority(run.get("priority") or RunPriority.BULK),
+            cost=estimate_cost(targets, run.get("resolvedTargetCount")),
+            workflow_doc=workflow_doc,
+            targets=targets,
+            run_mode=run.get("runMode", "live"),
+            exclusions=run.get("exclusions"),
+            selector=run.get("selector"),
+        ))
+        logger.info("Requeued run with expired lease", run_id=run["id"], attempts=run.get("attempts", 0))
+
+    async def _fail(self, run: dict, now: datetime, error: str) -> bool:
+        update = {"status": RunStatus.FAILED, "endedAt": now, "error": error}
+        update.update(retention_schedule(run.get("workflowId"), RunStatus.FAILED.value, now))
+        result = await self.db.runs.update_one(
+            {"id": run["id"], "leaseExpiresAt": {"$lt": now}},
+            {"$set": update, "$unset": {"leaseOwner": "", "leaseExpiresAt": ""}},
+        )
+        if result.modified_count:
+            logger.warning("Failed run with expired lease", run_id=run["id"], error=error)
+        return bool(result.modified_count)
+
+
+# Global run reaper instance
+run_reaper = RunReaper(
+    interval=settings.RUN_REAPER_INTERVAL_SECONDS,
+    max_attempts=settings.RUN_MAX_ATTEMPTS
+)
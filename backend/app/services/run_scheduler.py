@@ -0,0 +1,224 @@
+"""
+Priority- and user-fair dispatch of runs onto a bounded number of executor slots.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import SCHEDULER_QUEUE_WAIT, SCHEDULER_QUEUED_RUNS
+from app.models.run import RunPriority, RunStatus
+from app.services.target_planner import plan_targets
+from app.workers.run_executor import execute_run_async
+
+logger = get_logger(__name__)
+
+# Bounds the DRR loop; anything larger waits as if it were this big
+MAX_COST_QUANTA = 64
+
+
+def estimate_cost(targets: List[str], resolved_count: Optional[int] = None) -> int:
+    """Rough size of a run: distinct addresses and hostnames it will scan."""
+    plan = plan_targets(targets)
+    return max(1, plan.address_count + len(plan.hostnames) + (resolved_count or 0))
+
+
+def classify(
+    targets: List[str],
+    selector: Optional[Any] = None,
+    resolved_count: Optional[int] = None,
+    requested: Optional[RunPriority] = None
+) -> RunPriority:
+    """Priority for a new run: as requested, else interactive for small explicit runs, else bulk."""
+    if requested is not None:
+        return RunPriority(requested)
+    if selector is None and estimate_cost(targets, resolved_count) <= settings.INTERACTIVE_MAX_TARGETS:
+        return RunPriority.INTERACTIVE
+    return RunPriority.BULK
+
+
+@dataclass
+class QueuedRun:
+    """A run waiting for an executor slot, with the arguments to execute it."""
+    run_id: str
+    user_id: str
+    priority: RunPriority
+    cost: int
+    workflow_doc: dict
+    targets: List[str]
+    run_mode: str
+    exclusions: Optional[List[str]] = None
+    selector: Optional[dict] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _ClassQueue:
+    """Deficit round-robin across users within one priority class."""
+
+    def __init__(self, quantum: int):
+        self.quantum = quantum
+        self.users: "OrderedDict[str, Deque[QueuedRun]]" = OrderedDict()
+        self.deficits: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.users.values())
+
+    def push(self, run: QueuedRun):
+        self.users.setdefault(run.user_id, deque()).append(run)
+        self.deficits.setdefault(run.user_id, 0)
+
+    def pop(self) -> Optional[QueuedRun]:
+        while self.users:
+            user_id, runs = next(iter(self.users.items()))
+            head = runs[0]
+            cost = min(head.cost, self.quantum * MAX_COST_QUANTA)
+
+            if self.deficits[user_id] < cost:
+                # Not enough credit yet: top up and give the next user a turn
+                self.deficits[user_id] += self.quantum
+                self.users.move_to_end(user_id)
+                continue
+
+            runs.popleft()
+            self.deficits[user_id] -= cost
+            if not runs:
+                # Idle users do not bank credit
+                del self.users[user_id]
+                del self.deficits[user_id]
+            return head
+        return None
+
+    def remove(self, run_id: str) -> bool:
+        for user_id, runs in self.users.items():
+            for run in runs:
+                if run.run_id == run_id:
+                    runs.remove(run)
+                    if not runs:
+                        del self.users[user_id]
+                        del self.deficits[user_id]
+                    return True
+        return False
+
+
+class RunScheduler:
+    """Dispatches queued runs onto at most ``max_concurrent`` executor tasks.
+
+    Priority classes share free slots by smooth weighted round-robin, so
+    interactive runs jump ahead of bulk scans without starving them. Within a
+    class, users are served by deficit round-robin weighted by run cost, so one
+    user's large batch cannot monopolize the class.
+    """
+
+    def __init__(self, max_concurrent: int = 4, weights: Optional[Dict[str, int]] = None, quantum: int = 4):
+        self.max_concurrent = max_concurrent
+        self.weights = {p: int((weights or {}).get(p.value, 1)) for p in RunPriority}
+        self.queues = {p: _ClassQueue(quantum) for p in RunPriority}
+        self._current = {p: 0 for p in RunPriority}
+        self._running: Set[asyncio.Task] = set()
+        self._queued_ids: Set[str] = set()
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._renewer: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def queued(self, priority: Optional[RunPriority] = None) -> int:
+        if priority is not None:
+            return len(self.queues[priority])
+        return len(self._queued_ids)
+
+    def submit(self, run: QueuedRun):
+        """Queue a run and dispatch it as soon as a slot is free."""
+        if run.run_id in self._queued_ids:
+            return
+        self.queues[run.priority].push(run)
+        self._queued_ids.add(run.run_id)
+        SCHEDULER_QUEUED_RUNS.labels(priority=run.priority.value).inc()
+        self._dispatch()
+
+    def discard(self, run_id: str) -> bool:
+        """Drop a run that is still waiting, e.g. because it was cancelled."""
+        if run_id not in self._queued_ids:
+            return False
+        for priority, queue in self.queues.items():
+            if queue.remove(run_id):
+                self._queued_ids.discard(run_id)
+                SCHEDULER_QUEUED_RUNS.labels(priority=priority.value).dec()
+                return True
+        return False
+
+    def _next(self) -> Optional[QueuedRun]:
+        # Smooth weighted round-robin over classes that have work
+        ready = [p for p in RunPriority if len(self.queues[p])]
+        if not ready:
+            return None
+        total = sum(self.weights[p] for p in ready)
+        for p in ready:
+            self._current[p] += self.weights[p]
+        chosen = max(ready, key=lambda p: self._current[p])
+        self._current[chosen] -= total
+        return self.queues[chosen].pop()
+
+    def _dispatch(self):
+        while self.running < self.max_concurrent:
+            run = self._next()
+            if run is None:
+                return
+            self._queued_ids.discard(run.run_id)
+            SCHEDULER_QUEUED_RUNS.labels(priority=run.priority.value).dec()
+            SCHEDULER_QUEUE_WAIT.labels(priority=run.priority.value).observe(time.monotonic() - run.enqueued_at)
+
+            task = asyncio.create_task(
+                execute_run_async(
+                    run.run_id, run.workflow_doc, run.targets, run.run_mode, run.exclusions, run.selector
+                )
+            )
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        self._dispatch()
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Keep the start deadline of queued runs fresh so the reaper leaves them alone."""
+        self.db = db
+        self._renewer = asyncio.create_task(self._renew_queued(), name="run-scheduler-renewer")
+        logger.info("Run scheduler started", max_concurrent=self.max_concurrent, weights=self.weights)
+
+    async def stop(self):
+        if self._renewer is None:
+            return
+        self._renewer.cancel()
+        try:
+            await self._renewer
+        except asyncio.CancelledError:
+            pass
+        self._renewer = None
+
+    async def _renew_queued(self):
+        while True:
+            await asyncio.sleep(settings.RUN_HEARTBEAT_SECONDS)
+            if not self._queued_ids:
+                continue
+            try:
+                await self.db.runs.update_many(
+                    {"id": {"$in": list(self._queued_ids)}, "status": RunStatus.QUEUED},
+                    {"$set": {"leaseExpiresAt": datetime.utcnow() + timedelta(seconds=settings.RUN_LEASE_SECONDS)}},
+                )
+            except PyMongoError as e:
+                logger.warning("Failed to renew queued runs", count=len(self._queued_ids), error=str(e))
+
+
+# Global run scheduler instance
+run_scheduler = RunScheduler(
+    max_concurrent=settings.EXECUTOR_MAX_CONCURRENT_RUNS,
+    weights=settings.SCHEDULER_WEIGHTS,
+    quantum=settings.SCHEDULER_QUANTUM
+)
@@ -1,12 +1,20 @@
 # app/services/run_service.py
-import asyncio
 import uuid
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models.run import Run, RunStatus, RunStep, StepStatus
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from app.models.run import Run, RunPriority, RunStatus, RunStep, StepStatus
+from app.models.target import TargetSelector
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.workers.run_executor import execute_run_async  # we'll reuse the same async runner
+from app.services.retention import retention_schedule, retention_service
+from app.services.run_scheduler import QueuedRun, classify, estimate_cost, run_scheduler
+from app.services.scope_index import ensure_in_scope
+from app.services.target_selector import count_selected, is_empty
+from app.workers.run_executor import cancel_local_run
+from app.workers.simulation import validate_simulation
 
 logger = get_logger(__name__)
 
@@ -24,13 +32,32 @@ class RunService:
         targets: List[str],
         authorize_targets: bool,
         run_mode: str,
-        user_id: str
+        user_id: str,
+        exclusions: Optional[List[str]] = None,
+        selector: Optional[TargetSelector] = None,
+        priority: Optional[RunPriority] = None,
+        schedule_id: Optional[str] = None,
+        simulation: Optional[Dict[str, Any]] = None
     ) -> Run:
-        """Create a run and execute it in background."""
+        """Create a run and queue it for execution in background.
+
+        Raises TargetsOutOfScopeError if any explicit target is outside authorized
+        scope, TargetSetNotFoundError for an unknown target set, and
+        InvalidSimulationError for malformed simulation overrides.
+        """
+        await ensure_in_scope(self.db, targets, run_mode)
+
+        # Selected targets come from db.targets, so they are in scope by definition
+        if is_empty(selector):
+            selector = None
+        resolved_count = await count_selected(self.db, selector) if selector else None
+        priority = classify(targets, selector, resolved_count, priority)
+
         run_id = str(uuid.uuid4())
 
         # Fetch workflow and init steps
-        workflow_doc = await self.db.workflows.find_one({"id": workflow_id})
+        workflow_doc = await self.db.workflows.find_one({"id": workflow_id}, {"_id": 0})
+        validate_simulation(simulation, workflow_doc.get("nodes", []))
         steps = [
             RunStep(
                 nodeId=node["id"],
@@ -48,19 +75,84 @@ class RunService:
             workflowName=workflow_name,
             status=RunStatus.QUEUED,
             targets=targets,
+            selector=selector,
+            resolvedTargetCount=resolved_count,
+            exclusions=exclusions or [],
             authorizeTargets=authorize_targets,
             runMode=run_mode,
+            priority=priority,
+            scheduleId=schedule_id,
+            simulation=simulation,
             startedAt=datetime.utcnow(),
             steps=steps,
-            userId=user_id
+            userId=user_id,
+            workflowSnapshot=workflow_doc,
+            # Start deadline: if the executor never claims the run, the reaper requeues it
+            leaseExpiresAt=datetime.utcnow() + timedelta(seconds=settings.RUN_LEASE_SECONDS)
         )
 
         await self.runs_collection.insert_one(run.dict())
-        logger.info("Run created", run_id=run_id)
+        logger.info("Run created", run_id=run_id, priority=priority.value)
+
+        # 🔹 Queue for a fair share of executor slots (non-blocking)
+        run_scheduler.submit(QueuedRun(
+            run_id=run_id,
+            user_id=user_id,
+            priority=priority,
+            cost=estimate_cost(targets, resolved_count),
+            workflow_doc=workflow_doc,
+            targets=targets,
+            run_mode=run_mode,
+            exclusions=exclusions,
+            selector=selector.dict() if selector else None,
+        ))
+
+        return run
+
+    async def get_run(self, run_id: str) -> Optional[dict]:
+        """Get a run, with the steps and error of a compacted run read back from its archive.
+
+        If the archive cannot be read, the compacted document is returned as is.
+        """
+        run = await self.runs_collection.find_one({"id": run_id}, {"_id": 0})
+        if run is None or not run.get("archive"):
+            return run
+
+        try:
+            archived = await retention_service.load_archive(run, self.db)
+        except (OSError, PyMongoError, RuntimeError, ValueError) as e:
+            logger.warning("Failed to read run archive", run_id=run_id, error=str(e))
+            return run
+
+        run["steps"] = archived.get("steps", run.get("steps", []))
+        if archived.get("error"):
+            run["error"] = archived["error"]
+        return run
+
+    async def cancel_run(self, run_id: str) -> Optional[dict]:
+        """Cancel a queued or running run; returns None if it is not active.
+
+        Dropping the lease stops executors in other processes at their next
+        heartbeat; one running here is cancelled immediately.
+        """
+        now = datetime.utcnow()
+        run = await self.runs_collection.find_one_and_update(
+            {"id": run_id, "status": {"$in": [RunStatus.QUEUED, RunStatus.RUNNING]}},
+            {
+                "$set": {"status": RunStatus.CANCELLED, "endedAt": now, "cancelledAt": now},
+                "$unset": {"leaseOwner": "", "leaseExpiresAt": ""},
+            },
+            projection={"_id": 0, "id": 1, "workflowId": 1, "status": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if run is None:
+            return None
 
-        # 🔹 Start async background task (non-blocking)
-        asyncio.create_task(
-            execute_run_async(run_id, workflow_doc, targets, run_mode)
+        await self.runs_collection.update_one(
+            {"id": run_id},
+            {"$set": retention_schedule(run.get("workflowId"), RunStatus.CANCELLED.value, now)}
         )
+        cancelled_here = run_scheduler.discard(run_id) or cancel_local_run(run_id)
 
+        logger.info("Run cancelled", run_id=run_id, local=cancelled_here)
         return run
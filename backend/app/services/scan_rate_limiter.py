@@ -0,0 +1,213 @@
+"""
+Token-bucket admission of scan units per target network and per host.
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import SCAN_ADMISSION_WAIT
+from app.core.redis_client import get_sync_redis, redis_manager
+from app.services.scope_index import normalize_hostname, parse_network
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "reconcraft:ratelimit"
+
+# Takes from every bucket or from none. Returns 0 when admitted, else the
+# milliseconds until the emptiest bucket has enough tokens.
+# KEYS: bucket keys; ARGV: rate (tokens/s), burst, cost for each key in turn
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[3 * i - 2])
+    local burst = tonumber(ARGV[3 * i - 1])
+    local cost = tonumber(ARGV[3 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, math.ceil((cost - tokens) * 1000 / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[3 * i - 2])
+    local burst = tonumber(ARGV[3 * i - 1])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - tonumber(ARGV[3 * i])), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000)
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """One token bucket a scan unit must draw from."""
+    key: str
+    rate: float
+    burst: float
+    cost: float
+
+
+class _LocalBuckets:
+    """In-process buckets used when Redis is unavailable; limits only this process."""
+
+    def __init__(self):
+        self._levels: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets: List[Bucket]) -> float:
+        """Same contract as the Lua script, in seconds."""
+        now = time.monotonic()
+        with self._lock:
+            levels, wait = [], 0.0
+            for b in buckets:
+                tokens, ts = self._levels.get(b.key, (b.burst, now))
+                tokens = min(b.burst, tokens + (now - ts) * b.rate)
+                levels.append(tokens)
+                if tokens < b.cost:
+                    wait = max(wait, (b.cost - tokens) / b.rate)
+            if wait:
+                return wait
+            for b, tokens in zip(buckets, levels):
+                self._levels[b.key] = (tokens - b.cost, now)
+            return 0.0
+
+
+class ScanRateLimiter:
+    """Admits scan units so no single network or host is scanned in bursts.
+
+    A unit draws its address count from the bucket of its enclosing network
+    (``ipv4_prefix``/``ipv6_prefix``), or from each of the networks it covers
+    when it is wider than the prefix; single hosts and hostnames also draw
+    one token from their own bucket. Buckets live in Redis so the limits hold
+    across steps, runs and worker processes.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ipv4_prefix: int = 24,
+        ipv6_prefix: int = 64,
+        network_rate: float = 64.0,
+        network_burst: int = 256,
+        host_rate: float = 0.5,
+        host_burst: int = 2
+    ):
+        self.enabled = enabled
+        self.prefixes = {4: ipv4_prefix, 6: ipv6_prefix}
+        self.network_rate = network_rate
+        self.network_burst = network_burst
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self._local = _LocalBuckets()
+        self._script = None
+        self._script_client = None
+        self._sync_script = None
+
+    def buckets(self, target: str) -> List[Bucket]:
+        """Buckets a scan unit (address, CIDR or hostname) draws from."""
+        network = parse_network(target)
+        if network is None:
+            host = normalize_hostname(target)
+            return [Bucket(f"{KEY_PREFIX}:host:{host}", self.host_rate, self.host_burst, 1)]
+
+        prefix = self.prefixes[network.version]
+        if network.prefixlen >= prefix:
+            parts = [(network.supernet(new_prefix=prefix), network.num_addresses)]
+        else:
+            # A unit wider than the prefix spends its addresses in every network it covers
+            parts = [(part, part.num_addresses) for part in network.subnets(new_prefix=prefix)]
+        # A cost larger than the burst would never be admitted
+        buckets = [
+            Bucket(f"{KEY_PREFIX}:net:{part}", self.network_rate, self.network_burst, min(addresses, self.network_burst))
+            for part, addresses in parts
+        ]
+        if network.num_addresses == 1:
+            host = network.network_address
+            buckets.append(Bucket(f"{KEY_PREFIX}:host:{host}", self.host_rate, self.host_burst, 1))
+        return buckets
+
+    @staticmethod
+    def _script_args(buckets: List[Bucket]) -> Tuple[List[str], List[float]]:
+        args = []
+        for b in buckets:
+            args += [b.rate, b.burst, b.cost]
+        return [b.key for b in buckets], args
+
+    async def _take(self, buckets: List[Bucket]) -> float:
+        client = redis_manager.client
+        if client is None:
+            return self._local.take(buckets)
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(_TAKE_SCRIPT)
+            self._script_client = client
+        keys, args = self._script_args(buckets)
+        try:
+            return int(await self._script(keys=keys, args=args)) / 1000
+        except RedisError as e:
+            logger.warning("Rate limiter falling back to local buckets", error=str(e))
+            return self._local.take(buckets)
+
+    def _take_sync(self, buckets: List[Bucket]) -> float:
+        if self._sync_script is None:
+            self._sync_script = get_sync_redis().register_script(_TAKE_SCRIPT)
+        keys, args = self._script_args(buckets)
+        try:
+            return int(self._sync_script(keys=keys, args=args)) / 1000
+        except RedisError as e:
+            logger.warning("Rate limiter falling back to local buckets", error=str(e))
+            return self._local.take(buckets)
+
+    async def acquire(self, target: str) -> float:
+        """Wait until the target may be scanned; returns the seconds waited."""
+        if not self.enabled:
+            return 0.0
+        buckets = self.buckets(target)
+        start = time.monotonic()
+        while True:
+            wait = await self._take(buckets)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - start
+        SCAN_ADMISSION_WAIT.observe(waited)
+        return waited
+
+    def acquire_sync(self, target: str) -> float:
+        """Blocking variant of acquire for RQ jobs."""
+        if not self.enabled:
+            return 0.0
+        buckets = self.buckets(target)
+        start = time.monotonic()
+        while True:
+            wait = self._take_sync(buckets)
+            if not wait:
+                break
+            time.sleep(wait)
+        waited = time.monotonic() - start
+        SCAN_ADMISSION_WAIT.observe(waited)
+        return waited
+
+
+# Global scan rate limiter instance
+scan_rate_limiter = ScanRateLimiter(
+    enabled=settings.SCAN_RATE_LIMIT_ENABLED,
+    ipv4_prefix=settings.SCAN_RATE_IPV4_PREFIX,
+    ipv6_prefix=settings.SCAN_RATE_IPV6_PREFIX,
+    network_rate=settings.SCAN_RATE_NETWORK_PER_SECOND,
+    network_burst=settings.SCAN_RATE_NETWORK_BURST,
+    host_rate=settings.SCAN_RATE_HOST_PER_SECOND,
+    host_burst=settings.SCAN_RATE_HOST_BURST
+)
@@ -0,0 +1,179 @@
+"""
+AIMD tuning of per-step scan concurrency and nmap timing from observed results.
+"""
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+from app.core.config import settings
+
+# Nmap timing levels, most conservative first
+TIMING_LEVELS: List[List[str]] = [
+    ["-T2", "--max-retries", "3"],
+    ["-T3", "--max-retries", "2"],
+    ["-T4", "--max-retries", "1"],
+]
+DEFAULT_TIMING_LEVEL = 1
+
+
+def cpu_load() -> float:
+    """One-minute load average per CPU (0 where unsupported)."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def has_manual_timing(cmd: List[str]) -> bool:
+    """Whether a workflow already pins nmap timing, which the tuner then leaves alone."""
+    return any(arg.startswith("-T") or arg.startswith("--max-retries") for arg in cmd)
+
+
+@dataclass
+class ScanSample:
+    """Outcome of one scan unit."""
+    seconds_per_address: float
+    failed: bool
+    timed_out: bool
+
+
+class ScanTuner:
+    """Adjusts how many units a step scans at once, and how hard nmap pushes.
+
+    Additive increase: concurrency grows by one after a full round of clean
+    completions. Multiplicative decrease: it is cut by ``decrease_factor`` on
+    congestion (failures or host timeouts above ``error_threshold``, latency
+    per address above ``latency_factor`` times the best seen, or host CPU
+    load above ``cpu_threshold``). Failures and timeouts also step the nmap
+    timing template down; a clean window at full speed steps it back up.
+    """
+
+    def __init__(
+        self,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        initial_concurrency: int = 2,
+        decrease_factor: float = 0.5,
+        error_threshold: float = 0.1,
+        latency_factor: float = 2.0,
+        cpu_threshold: float = 0.9,
+        window: int = 20,
+        adaptive: bool = True,
+        tune_timing: bool = True
+    ):
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+        self.cpu_threshold = cpu_threshold
+        self.adaptive = adaptive
+        self.tune_timing = tune_timing and adaptive
+        self.timing_level = DEFAULT_TIMING_LEVEL
+
+        self.samples: Deque[ScanSample] = deque(maxlen=max(window, 1))
+        self.latency: Optional[float] = None  # EWMA seconds per address
+        self.best_latency: Optional[float] = None
+        self.completed = 0
+        self.increases = 0
+        self.decreases = 0
+        self.last_reason: Optional[str] = None
+        self._credit = 0.0
+        self._cooldown = 0
+        self._clean_streak = 0
+
+    @classmethod
+    def for_node(cls, config: Dict[str, Any], base_cmd: List[str]) -> "ScanTuner":
+        """Tuner for a scan node; config can cap concurrency or disable adaptation."""
+        adaptive = bool(config.get("adaptive", settings.SCAN_ADAPTIVE_ENABLED))
+        max_concurrency = int(config.get("maxConcurrency", settings.SCAN_MAX_CONCURRENCY))
+        initial = int(config.get("concurrency", settings.SCAN_INITIAL_CONCURRENCY if adaptive else 1))
+        return cls(
+            min_concurrency=settings.SCAN_MIN_CONCURRENCY,
+            max_concurrency=max_concurrency,
+            initial_concurrency=initial,
+            decrease_factor=settings.SCAN_DECREASE_FACTOR,
+            error_threshold=settings.SCAN_ERROR_RATE_THRESHOLD,
+            latency_factor=settings.SCAN_LATENCY_FACTOR,
+            cpu_threshold=settings.SCAN_CPU_LOAD_THRESHOLD,
+            window=settings.SCAN_TUNER_WINDOW,
+            adaptive=adaptive,
+            tune_timing=not has_manual_timing(base_cmd),
+        )
+
+    def timing_args(self) -> List[str]:
+        """Nmap options for the current timing level."""
+        return list(TIMING_LEVELS[self.timing_level]) if self.tune_timing else []
+
+    def _rate(self, attr: str) -> float:
+        return sum(getattr(s, attr) for s in self.samples) / len(self.samples)
+
+    def _congestion(self) -> Optional[str]:
+        if len(self.samples) >= 5:
+            if self._rate("failed") > self.error_threshold:
+                return "errors"
+            if self._rate("timed_out") > self.error_threshold:
+                return "timeouts"
+        if self.best_latency and self.latency > self.best_latency * self.latency_factor:
+            return "latency"
+        if cpu_load() > self.cpu_threshold:
+            return "cpu"
+        return None
+
+    def record(self, seconds: float, addresses: int = 1, failed: bool = False, timed_out: bool = False):
+        """Feed one finished scan unit and adjust concurrency and timing."""
+        per_address = seconds / max(addresses, 1)
+        self.samples.append(ScanSample(per_address, failed, timed_out))
+        self.completed += 1
+        if not failed:
+            self.latency = per_address if self.latency is None else 0.8 * self.latency + 0.2 * per_address
+            self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+
+        if not self.adaptive:
+            return
+        if self._cooldown > 0:
+            # Completions of units started before the last cut say nothing new
+            self._cooldown -= 1
+            return
+
+        reason = self._congestion()
+        if reason:
+            self.concurrency = max(self.min_concurrency, int(self.concurrency * self.decrease_factor))
+            if reason in ("errors", "timeouts") and self.tune_timing:
+                self.timing_level = max(0, self.timing_level - 1)
+            self.decreases += 1
+            self.last_reason = reason
+            self._credit = 0.0
+            self._clean_streak = 0
+            self._cooldown = self.concurrency
+            return
+
+        self._credit += 1 / self.concurrency
+        if self._credit >= 1 and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self.increases += 1
+            self._credit = 0.0
+
+        clean = not (failed or timed_out)
+        self._clean_streak = self._clean_streak + 1 if clean else 0
+        if (self.tune_timing and self._clean_streak >= self.samples.maxlen
+                and self.timing_level < len(TIMING_LEVELS) - 1):
+            self.timing_level += 1
+            self._clean_streak = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Parameters and signals recorded on the run step."""
+        return {
+            "adaptive": self.adaptive,
+            "concurrency": self.concurrency,
+            "timing": " ".join(self.timing_args()) or None,
+            "completed": self.completed,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "lastDecreaseReason": self.last_reason,
+            "latencyPerAddressMs": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "errorRate": round(self._rate("failed"), 3) if self.samples else 0.0,
+            "timeoutRate": round(self._rate("timed_out"), 3) if self.samples else 0.0,
+            "cpuLoad": round(cpu_load(), 2),
+        }
@@ -0,0 +1,242 @@
+"""
+Fires recurring schedules as runs, spread over time by deterministic jitter.
+"""
+import asyncio
+import hashlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.run import RunPriority, RunStatus
+from app.models.schedule import CatchUpPolicy
+from app.models.target import TargetSelector
+from app.services.cron import CronExpression
+from app.services.run_service import RunService
+from app.services.scope_index import TargetsOutOfScopeError
+from app.services.target_selector import TargetSetNotFoundError
+from app.workers.simulation import InvalidSimulationError
+
+logger = get_logger(__name__)
+
+# Bounds the walk over missed cron fire times after a long outage
+MAX_MISSED_SCAN = 10_000
+
+
+def next_nominal(schedule: dict, after: datetime) -> datetime:
+    """First fire time strictly after ``after``, before jitter.
+
+    Interval schedules fire on a fixed grid anchored at creation, so restarts
+    do not drift them.
+    """
+    if schedule.get("cron"):
+        return CronExpression.parse(schedule["cron"]).next_after(after)
+
+    interval = timedelta(seconds=schedule["intervalSeconds"])
+    anchor = schedule["createdAt"].replace(microsecond=0)
+    if after < anchor:
+        return anchor
+    return anchor + ((after - anchor) // interval + 1) * interval
+
+
+def period_seconds(schedule: dict) -> float:
+    """Shortest gap between fires, sampled from the first few after creation."""
+    if schedule.get("intervalSeconds"):
+        return float(schedule["intervalSeconds"])
+    fires = [next_nominal(schedule, schedule["createdAt"])]
+    for _ in range(4):
+        fires.append(next_nominal(schedule, fires[-1]))
+    return min((b - a).total_seconds() for a, b in zip(fires, fires[1:]))
+
+
+def jitter_offset(schedule: dict) -> timedelta:
+    """Stable per-schedule start delay, uniform over the jitter window.
+
+    Hashing the id spreads schedules sharing a cron expression evenly instead
+    of starting them all on the same minute.
+    """
+    period = period_seconds(schedule)
+    window = schedule.get("jitterSeconds")
+    if window is None:
+        window = min(settings.SCHEDULE_MAX_JITTER_SECONDS, period * settings.SCHEDULE_JITTER_FRACTION)
+    # Never delay a fire past the next one
+    window = int(min(window, period - 1))
+    if window <= 0:
+        return timedelta(0)
+
+    digest = hashlib.sha256(schedule["id"].encode()).digest()
+    return timedelta(seconds=int.from_bytes(digest[:8], "big") % (window + 1))
+
+
+def first_fire(schedule: dict, now: datetime) -> Dict[str, datetime]:
+    """nominalRunAt/nextRunAt of the first fire that starts after ``now``."""
+    offset = jitter_offset(schedule)
+    nominal = next_nominal(schedule, now - offset)
+    return {"nominalRunAt": nominal, "nextRunAt": nominal + offset}
+
+
+@dataclass
+class FirePlan:
+    """Outcome of a due schedule: whether to start a run now, and the next fire."""
+    fire: bool
+    missed: int
+    nominal_run_at: datetime
+    next_run_at: datetime
+
+
+def plan_fire(schedule: dict, now: datetime) -> FirePlan:
+    """Apply the catch-up policy to a schedule whose nextRunAt has passed."""
+    offset = jitter_offset(schedule)
+    late = now - schedule["nextRunAt"] > timedelta(seconds=settings.SCHEDULE_MISFIRE_GRACE_SECONDS)
+
+    # Fires after the due one that have also already passed
+    missed = deque(maxlen=max(settings.SCHEDULE_MAX_CATCH_UP, 1))
+    count = 0
+    nominal = next_nominal(schedule, schedule["nominalRunAt"])
+    while nominal + offset <= now and count < MAX_MISSED_SCAN:
+        missed.append(nominal)
+        count += 1
+        nominal = next_nominal(schedule, nominal)
+
+    policy = CatchUpPolicy(schedule.get("catchUp") or CatchUpPolicy.ONCE)
+    if policy == CatchUpPolicy.ALL and missed:
+        # Work through the backlog one fire per tick, dropping all but the newest
+        following = missed[0]
+    else:
+        following = next_nominal(schedule, now - offset)
+
+    fire = policy != CatchUpPolicy.SKIP or not late
+    return FirePlan(fire=fire, missed=count, nominal_run_at=following, next_run_at=following + offset)
+
+
+class ScheduleRunner:
+    """Polls for due schedules and starts their runs with the scheduled priority.
+
+    A fire is claimed by a compare-and-set on ``nextRunAt``, so replicas never
+    start the same fire twice. At most ``max_concurrent`` scheduled runs are
+    queued or running across the deployment; due schedules beyond that wait
+    for the next tick.
+    """
+
+    def __init__(self, interval: int = 15, max_concurrent: int = 4, batch_size: int = 100):
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.batch_size = batch_size
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the background schedule loop."""
+        self.db = db
+        self._task = asyncio.create_task(self._run(), name="schedule-runner")
+        logger.info("Schedule runner started", interval=self.interval, max_concurrent=self.max_concurrent)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick_once()
+            except Exception as e:
+                logger.error("Schedule tick failed", error=str(e))
+
+    async def _active_runs(self) -> int:
+        return await self.db.runs.count_documents({
+            "scheduleId": {"$ne": None},
+            "status": {"$in": [RunStatus.QUEUED, RunStatus.RUNNING]},
+        })
+
+    async def tick_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Fire every due schedule the concurrency cap allows."""
+        now = now or datetime.utcnow()
+        result = {"fired": 0, "skipped": 0, "deferred": 0}
+
+        cursor = self.db.schedules.find(
+            {"enabled": True, "nextRunAt": {"$lte": now}}, {"_id": 0}
+        ).sort("nextRunAt", 1).limit(self.batch_size)
+        due: List[dict] = [doc async for doc in cursor]
+        if not due:
+            return result
+
+        active = await self._active_runs()
+        for schedule in due:
+            plan = plan_fire(schedule, now)
+            if plan.fire and active >= self.max_concurrent:
+                result["deferred"] += 1
+                continue
+
+            claimed = await self.db.schedules.find_one_and_update(
+                {"id": schedule["id"], "enabled": True, "nextRunAt": schedule["nextRunAt"]},
+                {"$set": {"nominalRunAt": plan.nominal_run_at, "nextRunAt": plan.next_run_at}},
+                projection={"_id": 1},
+            )
+            if claimed is None:
+                continue  # another replica fired it
+
+            if not plan.fire:
+                result["skipped"] += 1
+                logger.info("Skipped missed schedule fire", schedule_id=schedule["id"], missed=plan.missed + 1)
+                continue
+
+            if await self._fire(schedule, now):
+                active += 1
+                result["fired"] += 1
+
+        if result["deferred"]:
+            logger.warning("Scheduled runs at concurrency cap", active=active, **result)
+        return result
+
+    async def _fire(self, schedule: dict, now: datetime) -> bool:
+        update = {"lastRunAt": now, "lastError": None}
+        run_id = None
+        try:
+            workflow = await self.db.workflows.find_one({"id": schedule["workflowId"]}, {"_id": 0, "name": 1})
+            if workflow is None:
+                raise LookupError(f"Workflow not found: {schedule['workflowId']}")
+
+            selector = schedule.get("selector")
+            run = await RunService(self.db).create_run(
+                workflow_id=schedule["workflowId"],
+                workflow_name=workflow["name"],
+                targets=schedule.get("targets", []),
+                authorize_targets=schedule.get("authorizeTargets", False),
+                run_mode=schedule.get("runMode", "live"),
+                user_id=schedule.get("userId") or f"schedule:{schedule['id']}",
+                exclusions=schedule.get("exclusions"),
+                selector=TargetSelector(**selector) if selector else None,
+                priority=RunPriority.SCHEDULED,
+                schedule_id=schedule["id"],
+            )
+            run_id = update["lastRunId"] = run.id
+        except (LookupError, TargetsOutOfScopeError, TargetSetNotFoundError, InvalidSimulationError) as e:
+            update["lastError"] = str(e)
+            logger.warning("Scheduled run not started", schedule_id=schedule["id"], error=str(e))
+
+        try:
+            await self.db.schedules.update_one({"id": schedule["id"]}, {"$set": update})
+        except PyMongoError as e:
+            logger.warning("Failed to record schedule fire", schedule_id=schedule["id"], error=str(e))
+
+        if run_id:
+            logger.info("Scheduled run started", schedule_id=schedule["id"], run_id=run_id)
+        return run_id is not None
+
+
+# Global schedule runner instance
+schedule_runner = ScheduleRunner(
+    interval=settings.SCHEDULE_TICK_SECONDS,
+    max_concurrent=settings.SCHEDULE_MAX_CONCURRENT_RUNS,
+    batch_size=settings.SCHEDULE_BATCH_SIZE
+)
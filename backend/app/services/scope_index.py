@@ -0,0 +1,276 @@
+"""
+In-memory index of authorized scope for fast target containment checks.
+"""
+import asyncio
+import ipaddress
+import time
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis_client import redis_manager
+
+logger = get_logger(__name__)
+
+# Bumped on every scope change so other replicas reload their index
+SCOPE_GENERATION_KEY = "reconcraft:scope:generation"
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class TargetsOutOfScopeError(ValueError):
+    """Raised when a run names targets outside authorized scope."""
+
+    def __init__(self, targets: List[str]):
+        self.targets = targets
+        super().__init__(f"{len(targets)} target(s) are outside authorized scope")
+
+
+def parse_network(value: str) -> Optional[Network]:
+    """Parse an IP or CIDR into a network, or None for hostnames."""
+    try:
+        return ipaddress.ip_network(value.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def normalize_hostname(value: str) -> str:
+    """Lowercase a hostname and strip any trailing root dot."""
+    return value.strip().rstrip(".").lower()
+
+
+class IntervalSet:
+    """Sorted, non-overlapping integer intervals with O(log n) containment."""
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    @classmethod
+    def build(cls, intervals: Iterable[Tuple[int, int]]) -> "IntervalSet":
+        """Build from arbitrary intervals, merging overlapping and adjacent ones."""
+        merged = cls()
+        for start, end in sorted(intervals):
+            if merged.ends and start <= merged.ends[-1] + 1:
+                merged.ends[-1] = max(merged.ends[-1], end)
+            else:
+                merged.starts.append(start)
+                merged.ends.append(end)
+        return merged
+
+    def add(self, start: int, end: int) -> None:
+        """Insert an interval, merging it with any neighbours it touches."""
+        lo = bisect_right(self.ends, start - 2)  # first interval that could touch
+        hi = bisect_right(self.starts, end + 1)  # past the last one that could touch
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def contains(self, start: int, end: int) -> bool:
+        """Whether [start, end] lies entirely within one interval."""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and self.ends[i] >= end
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class HostnameTrie:
+    """Suffix trie over hostname labels.
+
+    An entry covers exactly that hostname; a ``*.`` entry covers its subdomains.
+    """
+
+    _EXACT = ""
+    _WILDCARD = "*"
+
+    def __init__(self):
+        self.root: Dict[str, dict] = {}
+
+    def add(self, hostname: str) -> None:
+        labels = normalize_hostname(hostname).split(".")
+        terminal = self._EXACT
+        if labels[0] == self._WILDCARD and len(labels) > 1:
+            terminal, labels = self._WILDCARD, labels[1:]
+        node = self.root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[terminal] = {}
+
+    def contains(self, hostname: str) -> bool:
+        labels = normalize_hostname(hostname).split(".")
+        node = self.root
+        for remaining, label in enumerate(reversed(labels), start=1):
+            node = node.get(label)
+            if node is None:
+                return False
+            if remaining < len(labels) and self._WILDCARD in node:
+                return True
+        return self._EXACT in node
+
+
+class ScopeIndex:
+    """Authorized scope built from db.targets.
+
+    Networks are merged into per-family interval sets and hostnames go into a
+    suffix trie, so each containment check is O(log n) in the number of entries.
+    """
+
+    def __init__(self):
+        self._networks: Dict[str, Network] = {}
+        self._hostnames: Dict[str, str] = {}
+        self._intervals: Dict[int, IntervalSet] = {4: IntervalSet(), 6: IntervalSet()}
+        self._trie = HostnameTrie()
+        self._lock = asyncio.Lock()
+        self.loaded_at: Optional[float] = None
+        self.generation: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._networks) + len(self._hostnames)
+
+    def add(self, value: str) -> None:
+        """Add an authorized IP, CIDR or hostname."""
+        network = parse_network(value)
+        if network is not None:
+            self._networks[value] = network
+            self._intervals[network.version].add(
+                int(network.network_address), int(network.broadcast_address)
+            )
+        else:
+            self._hostnames[value] = normalize_hostname(value)
+            self._trie.add(value)
+
+    def remove(self, value: str) -> None:
+        """Remove an entry; the affected structure is rebuilt from what remains."""
+        network = self._networks.pop(value, None)
+        if network is not None:
+            self._intervals[network.version] = IntervalSet.build(
+                (int(n.network_address), int(n.broadcast_address))
+                for n in self._networks.values()
+                if n.version == network.version
+            )
+        elif self._hostnames.pop(value, None) is not None:
+            self._trie = HostnameTrie()
+            for hostname in self._hostnames.values():
+                self._trie.add(hostname)
+
+    def replace(self, values: Iterable[str]) -> None:
+        """Rebuild the whole index from the given values."""
+        networks, hostnames = {}, {}
+        for value in values:
+            network = parse_network(value)
+            if network is not None:
+                networks[value] = network
+            else:
+                hostnames[value] = normalize_hostname(value)
+
+        self._networks = networks
+        self._hostnames = hostnames
+        self._intervals = {
+            version: IntervalSet.build(
+                (int(n.network_address), int(n.broadcast_address))
+                for n in networks.values()
+                if n.version == version
+            )
+            for version in (4, 6)
+        }
+        self._trie = HostnameTrie()
+        for hostname in hostnames.values():
+            self._trie.add(hostname)
+
+    def contains(self, target: str) -> bool:
+        """Whether a target IP, CIDR or hostname is entirely within scope."""
+        network = parse_network(target)
+        if network is not None:
+            return self._intervals[network.version].contains(
+                int(network.network_address), int(network.broadcast_address)
+            )
+        return self._trie.contains(target)
+
+    def out_of_scope(self, targets: Iterable[str]) -> List[str]:
+        """Return the targets that are not covered by scope."""
+        return [target for target in targets if not self.contains(target)]
+
+    async def load(self, db: AsyncIOMotorDatabase) -> None:
+        """Load the full scope from db.targets."""
+        generation = await _current_generation()
+        cursor = db.targets.find({}, {"_id": 0, "value": 1})
+        self.replace([doc["value"] async for doc in cursor])
+        self.loaded_at = time.monotonic()
+        self.generation = generation
+        logger.info("Scope index loaded", entries=len(self), generation=generation)
+
+    async def ensure_fresh(self, db: AsyncIOMotorDatabase) -> None:
+        """Reload when never loaded, too old, or changed by another replica."""
+        async with self._lock:
+            generation = await _current_generation()
+            stale = (
+                self.loaded_at is None
+                or time.monotonic() - self.loaded_at > settings.SCOPE_INDEX_REFRESH_SECONDS
+                or (generation is not None and generation != self.generation)
+            )
+            if stale:
+                await self.load(db)
+
+    async def apply_changes(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """Apply local target changes incrementally and notify other replicas."""
+        if self.loaded_at is None:
+            # Nothing loaded yet; the first check will load the current state
+            return
+
+        for value in removed:
+            self.remove(value)
+        for value in added:
+            self.add(value)
+
+        generation = await _bump_generation()
+        if generation is not None and self.generation is not None and generation == self.generation + 1:
+            # No other replica changed scope in between, so we are still current
+            self.generation = generation
+
+
+async def _current_generation() -> Optional[int]:
+    if redis_manager.client is None:
+        return None
+    try:
+        return int(await redis_manager.client.get(SCOPE_GENERATION_KEY) or 0)
+    except RedisError:
+        return None
+
+
+async def _bump_generation() -> Optional[int]:
+    if redis_manager.client is None:
+        return None
+    try:
+        return await redis_manager.client.incr(SCOPE_GENERATION_KEY)
+    except RedisError as e:
+        logger.warning("Failed to publish scope change", error=str(e))
+        return None
+
+
+# Global scope index instance
+scope_index = ScopeIndex()
+
+
+async def find_out_of_scope(db: AsyncIOMotorDatabase, targets: Iterable[str]) -> List[str]:
+    """Return the run targets that fall outside authorized scope."""
+    await scope_index.ensure_fresh(db)
+    return scope_index.out_of_scope(targets)
+
+
+async def ensure_in_scope(db: AsyncIOMotorDatabase, targets: Iterable[str], run_mode: str) -> None:
+    """Reject runs that would touch targets outside authorized scope.
+
+    Only simulated runs are exempt: every node of one is simulated, so it never
+    reaches the network. Demo runs still execute tools and are checked.
+    """
+    if not settings.SCOPE_ENFORCEMENT or run_mode == "simulate":
+        return
+
+    out_of_scope = await find_out_of_scope(db, targets)
+    if out_of_scope:
+        raise TargetsOutOfScopeError(out_of_scope)
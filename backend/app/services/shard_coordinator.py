@@ -0,0 +1,198 @@
+"""
+Scatter/gather of a scan step's targets across RQ workers.
+"""
+import asyncio
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+from redis.exceptions import RedisError
+from rq import Queue, Retry
+from rq.command import send_stop_job_command
+from rq.exceptions import InvalidJobOperation, NoSuchJobError
+from rq.job import Job, JobStatus
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis_client import get_sync_redis, redis_manager
+
+logger = get_logger(__name__)
+
+SHARD_JOB = "app.workers.shard_jobs.run_scan_shard"
+SHARD_KEY_PREFIX = "reconcraft:shards"
+# Sets under a step's shard key that finished shards are added to
+SHARD_STATES = ("done", "failed", "skipped")
+
+# A shard job in one of these states will still report back
+_PENDING = {JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED}
+# RQ's terminal failure states; a job killed with its work horse ends up here without reporting
+_ENDED = {JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED}
+
+# Shards enqueued (and checked against RQ) per Redis round-trip
+_BATCH_SIZE = 256
+
+
+def shard_key(run_id: str, node_id: str) -> str:
+    """Prefix of the Redis sets tracking finished shards of a step."""
+    return f"{SHARD_KEY_PREFIX}:{run_id}:{node_id}"
+
+
+def shard_job_id(run_id: str, node_id: str, index: int) -> str:
+    """Deterministic, so a resumed step finds the jobs it enqueued before."""
+    return f"shard:{run_id}:{node_id}:{index}"
+
+
+def split_shards(units: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Cut units into shards lazily, so a huge plan is never held in memory."""
+    units = iter(units)
+    while shard := list(islice(units, size)):
+        yield shard
+
+
+def sharding_available() -> bool:
+    return settings.SHARDING_ENABLED and redis_manager.client is not None
+
+
+class ShardedScan:
+    """Enqueues a step's shards and waits until every shard is done or failed for good.
+
+    Shard jobs write findings and completed targets straight into the parent
+    step and add their index to ``<key>:done`` or, once retries are exhausted,
+    ``<key>:failed``. A job that finds its run no longer running adds it to
+    ``<key>:skipped``. Jobs that end in RQ without reporting, for example when
+    their work horse is killed, are counted as failed while polling.
+    """
+
+    def __init__(self, run_id: str, node: dict, shards: Iterable[List[str]]):
+        self.run_id = run_id
+        self.node = node
+        self.node_id = node["id"]
+        self.shards = shards
+        self.key = shard_key(run_id, self.node_id)
+        self.total = 0
+        self.units = 0
+
+    async def enqueue(self) -> int:
+        """Enqueue shards that are neither done nor pending; returns how many were enqueued."""
+        enqueued = await asyncio.to_thread(self._enqueue_missing)
+        logger.info("Shards enqueued", run_id=self.run_id, node_id=self.node_id,
+                    total=self.total, enqueued=enqueued)
+        return enqueued
+
+    async def gather(self, runs) -> Dict[str, int]:
+        """Wait for every shard, and record shard stats on the step; raises unless all are done."""
+        try:
+            while True:
+                done, failed, skipped = await self._progress()
+                waiting = set(range(self.total)) - done - failed - skipped
+                if waiting:
+                    failed |= await asyncio.to_thread(self._lost_shards, waiting)
+                if len(done) + len(failed) + len(skipped) >= self.total:
+                    break
+                await asyncio.sleep(settings.SHARD_POLL_SECONDS)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self._cancel_jobs)
+            raise
+
+        stats = {"total": self.total, "done": len(done), "failed": len(failed), "skipped": len(skipped)}
+        await runs.update_one(
+            {"id": self.run_id, "steps.nodeId": self.node_id},
+            {"$set": {"steps.$.shards": stats}}
+        )
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {self.total} shards failed")
+        if skipped:
+            raise RuntimeError(f"{len(skipped)} of {self.total} shards skipped as the run was not running")
+        return stats
+
+    async def _progress(self) -> Tuple[Set[int], Set[int], Set[int]]:
+        try:
+            async with redis_manager.client.pipeline(transaction=False) as pipe:
+                for suffix in SHARD_STATES:
+                    pipe.smembers(f"{self.key}:{suffix}")
+                results = await pipe.execute()
+        except RedisError as e:
+            logger.warning("Failed to read shard progress", run_id=self.run_id, error=str(e))
+            return set(), set(), set()
+        done, failed, skipped = ({int(i) for i in members} for members in results)
+        return done, failed, skipped
+
+    def _lost_shards(self, indices: Set[int]) -> Set[int]:
+        """Shards whose job ended, or vanished, in RQ without reporting back."""
+        conn = get_sync_redis()
+        ordered = sorted(indices)
+        try:
+            jobs = Job.fetch_many(
+                [shard_job_id(self.run_id, self.node_id, i) for i in ordered], connection=conn
+            )
+        except RedisError as e:
+            logger.warning("Failed to check shard jobs", run_id=self.run_id, error=str(e))
+            return set()
+
+        lost = {
+            index for index, job in zip(ordered, jobs)
+            if job is None or (job.get_status(refresh=False) in _ENDED and not job.retries_left)
+        }
+        if lost:
+            conn.sadd(f"{self.key}:failed", *lost)
+            logger.error("Shard jobs ended without reporting", run_id=self.run_id,
+                         node_id=self.node_id, shards=sorted(lost))
+        return lost
+
+    def _enqueue_missing(self) -> int:
+        """Enqueue shards that are neither done nor still pending in RQ, a batch at a time."""
+        conn = get_sync_redis()
+        queue = Queue(settings.RQ_QUEUE_NAME, connection=conn)
+        done = {int(i) for i in conn.smembers(f"{self.key}:done")}
+
+        enqueued = 0
+        batches = split_shards(enumerate(self.shards), _BATCH_SIZE)
+        for batch in batches:
+            self.total += len(batch)
+            self.units += sum(len(targets) for _, targets in batch)
+            batch = [(index, targets) for index, targets in batch if index not in done]
+            existing = Job.fetch_many(
+                [shard_job_id(self.run_id, self.node_id, index) for index, _ in batch], connection=conn
+            )
+
+            jobs, indices = [], []
+            for (index, targets), job in zip(batch, existing):
+                if job is not None and job.get_status(refresh=False) in _PENDING:
+                    continue
+                indices.append(index)
+                jobs.append(Queue.prepare_data(
+                    SHARD_JOB,
+                    kwargs={
+                        "run_id": self.run_id,
+                        "node": self.node,
+                        "shard_index": index,
+                        "targets": targets,
+                    },
+                    job_id=shard_job_id(self.run_id, self.node_id, index),
+                    timeout=settings.SHARD_JOB_TIMEOUT,
+                    result_ttl=settings.RQ_RESULT_TTL,
+                    retry=Retry(max=settings.SHARD_MAX_RETRIES, interval=settings.SHARD_RETRY_INTERVALS),
+                ))
+
+            if indices:
+                # Shards that failed or were skipped on an earlier attempt get another chance
+                pipe = conn.pipeline()
+                pipe.srem(f"{self.key}:failed", *indices)
+                pipe.srem(f"{self.key}:skipped", *indices)
+                for suffix in SHARD_STATES:
+                    pipe.expire(f"{self.key}:{suffix}", settings.SHARD_STATE_TTL)
+                pipe.execute()
+                queue.enqueue_many(jobs)
+                enqueued += len(indices)
+        return enqueued
+
+    def _cancel_jobs(self):
+        conn = get_sync_redis()
+        for index in range(self.total):
+            job_id = shard_job_id(self.run_id, self.node_id, index)
+            try:
+                job = Job.fetch(job_id, connection=conn)
+                if job.get_status() == JobStatus.STARTED:
+                    send_stop_job_command(conn, job_id)
+                elif job.get_status() in _PENDING:
+                    job.cancel()
+            except (NoSuchJobError, InvalidJobOperation, RedisError):
+                continue
+        logger.info("Cancelled shard jobs", run_id=self.run_id, node_id=self.node_id)
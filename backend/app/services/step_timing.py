@@ -0,0 +1,183 @@
+"""
+Per-target timing breakdown and resource usage for scan steps.
+"""
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.metrics import STEP_PHASE_SECONDS, STEP_TOOL_CPU_SECONDS, STEP_TOOL_MAX_RSS_BYTES
+
+PHASES = ("queued", "admission", "spawn", "firstOutput", "runtime", "parse", "persist")
+
+try:
+    _CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = 100
+
+
+def read_process_usage(pid: int) -> Optional[Tuple[float, int]]:
+    """CPU seconds (including reaped children) and peak RSS in KB of a live process.
+
+    Read from /proc, since the event loop's child watcher reaps tool processes
+    itself and their wait4 rusage never reaches us. None where unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            peak = next((int(line.split()[1]) for line in f if line.startswith("VmHWM:")), 0)
+    except (OSError, ValueError, IndexError):
+        return None
+    # utime, stime, cutime and cstime; fields[0] is the process state
+    cpu = sum(int(x) for x in fields[11:15]) / _CLOCK_TICKS
+    return cpu, peak
+
+
+def container_usage(stats: Dict[str, Any]) -> Tuple[Optional[float], Optional[int]]:
+    """CPU seconds and peak (or current) memory in KB from a Docker stats sample."""
+    cpu = stats.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage")
+    memory = stats.get("memory_stats", {})
+    peak = memory.get("max_usage") or memory.get("usage")
+    return (cpu / 1e9 if cpu is not None else None), (peak // 1024 if peak is not None else None)
+
+
+@dataclass
+class UnitTiming:
+    """Monotonic marks for one scan unit, from waiting for a slot to its findings being stored."""
+    target: str
+    queued_at: float
+    dispatched_at: float = field(default_factory=time.monotonic)
+    admitted_at: Optional[float] = None
+    launched_at: Optional[float] = None
+    started_at: Optional[float] = None
+    first_output_at: Optional[float] = None
+    exited_at: Optional[float] = None
+    parse_seconds: Optional[float] = None
+    persist_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+
+    def record_usage(self, usage: Optional[Tuple[float, int]]):
+        """Keep the highest CPU time and peak RSS seen; later reads can find a zombie."""
+        if usage is None:
+            return
+        cpu, peak = usage
+        self.cpu_seconds = max(self.cpu_seconds or 0.0, cpu)
+        self.max_rss_kb = max(self.max_rss_kb or 0, peak) or None
+
+    def phases(self) -> Dict[str, float]:
+        """Seconds spent in each phase that was reached."""
+        def span(start, end):
+            return end - start if start is not None and end is not None else None
+
+        # The log write between admission and launch is bookkeeping, so it counts as persist
+        persist = self.persist_seconds
+        bookkeeping = span(self.admitted_at, self.launched_at)
+        if bookkeeping is not None:
+            persist = (persist or 0.0) + bookkeeping
+
+        phases = {
+            "queued": span(self.queued_at, self.dispatched_at),
+            "admission": span(self.dispatched_at, self.admitted_at),
+            "spawn": span(self.launched_at or self.admitted_at, self.started_at),
+            "firstOutput": span(self.started_at, self.first_output_at),
+            "runtime": span(self.started_at, self.exited_at),
+            "parse": self.parse_seconds,
+            "persist": persist,
+        }
+        return {name: max(value, 0.0) for name, value in phases.items() if value is not None}
+
+    def as_doc(self) -> Dict[str, Any]:
+        doc: Dict[str, Any] = {"target": self.target}
+        doc.update({name: round(value, 4) for name, value in self.phases().items()})
+        if self.cpu_seconds is not None:
+            doc["cpuSeconds"] = round(self.cpu_seconds, 3)
+        if self.max_rss_kb is not None:
+            doc["maxRssKb"] = self.max_rss_kb
+        return doc
+
+
+class StepTimings:
+    """Aggregates unit timings for a step and feeds the phase histograms.
+
+    Totals cover every unit; only the ``keep`` slowest units are kept in full,
+    so the step document stays bounded on large scans.
+    """
+
+    def __init__(self, tool: str, keep: int = 100):
+        self.tool = tool
+        self.keep = keep
+        self.started_at = time.monotonic()
+        self.units = 0
+        self.totals: Dict[str, float] = {}
+        self.maxima: Dict[str, float] = {}
+        self.cpu_seconds = 0.0
+        self.max_rss_kb = 0
+        self.earlier_wall = 0.0
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._order = itertools.count()
+
+    def unit(self, target: str) -> UnitTiming:
+        """Timing for a unit being dispatched now; it has waited since the step started."""
+        return UnitTiming(target=target, queued_at=self.started_at)
+
+    def record(self, timing: UnitTiming):
+        phases = timing.phases()
+        self.units += 1
+        for name, seconds in phases.items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.maxima[name] = max(self.maxima.get(name, 0.0), seconds)
+            STEP_PHASE_SECONDS.labels(tool=self.tool, phase=name).observe(seconds)
+        if timing.cpu_seconds is not None:
+            self.cpu_seconds += timing.cpu_seconds
+            STEP_TOOL_CPU_SECONDS.labels(tool=self.tool).observe(timing.cpu_seconds)
+        if timing.max_rss_kb is not None:
+            self.max_rss_kb = max(self.max_rss_kb, timing.max_rss_kb)
+            STEP_TOOL_MAX_RSS_BYTES.labels(tool=self.tool).observe(timing.max_rss_kb * 1024)
+
+        self._keep_slowest(timing.as_doc())
+
+    def _keep_slowest(self, doc: Dict[str, Any]):
+        # Slowest by time after leaving the queue, which is what a unit itself costs
+        cost = sum(doc.get(name, 0.0) for name in PHASES if name not in ("queued", "firstOutput"))
+        entry = (cost, next(self._order), doc)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif self.keep and cost > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def merge(self, snapshot: Optional[Dict[str, Any]], wall: bool = True):
+        """Fold in a snapshot recorded elsewhere: an earlier attempt of the step, or a shard.
+
+        Shards run side by side, so pass ``wall=False`` for them; their wall time
+        is already inside the step's own. Nothing is re-observed in the histograms.
+        """
+        if not snapshot:
+            return
+        self.units += snapshot.get("units", 0)
+        for name, seconds in snapshot.get("totalSeconds", {}).items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        for name, seconds in snapshot.get("maxSeconds", {}).items():
+            self.maxima[name] = max(self.maxima.get(name, 0.0), seconds)
+        self.cpu_seconds += snapshot.get("cpuSeconds") or 0.0
+        self.max_rss_kb = max(self.max_rss_kb, snapshot.get("maxRssKb") or 0)
+        if wall:
+            self.earlier_wall += snapshot.get("wallSeconds", 0.0)
+        for doc in snapshot.get("slowestTargets", []):
+            self._keep_slowest(doc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Step totals and the slowest units, as stored on the run step."""
+        wall = time.monotonic() - self.started_at
+        STEP_PHASE_SECONDS.labels(tool=self.tool, phase="step").observe(wall)
+        return {
+            "wallSeconds": round(self.earlier_wall + wall, 3),
+            "units": self.units,
+            "totalSeconds": {name: round(v, 3) for name, v in self.totals.items()},
+            "maxSeconds": {name: round(v, 3) for name, v in self.maxima.items()},
+            "cpuSeconds": round(self.cpu_seconds, 3),
+            "maxRssKb": self.max_rss_kb or None,
+            "slowestTargets": [doc for _, _, doc in sorted(self._slowest, key=lambda e: -e[0])],
+        }
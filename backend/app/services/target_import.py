@@ -0,0 +1,192 @@
+"""
+Chunked bulk import of authorized targets.
+"""
+import codecs
+import csv
+import uuid
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.target import Target, TargetImportProgress
+
+logger = get_logger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# (value, tags) pairs as read from an upload
+TargetRow = Tuple[str, List[str]]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 body into lines without buffering it whole."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def parse_rows(
+    lines: AsyncIterable[str],
+    fmt: str,
+    tags: Optional[List[str]] = None
+) -> AsyncIterator[TargetRow]:
+    """Parse newline or CSV lines into (value, tags) rows.
+
+    Newline format is one target per line; blank lines and ``#`` comments are
+    skipped. CSV rows are ``value[,tag,...]`` with an optional ``value`` header.
+    """
+    base_tags = list(tags or [])
+    first = True
+
+    async for line in lines:
+        if fmt == "csv":
+            row = next(csv.reader([line]), [])
+            if not row or not row[0].strip():
+                continue
+            if first and row[0].strip().lower() == "value":
+                first = False
+                continue
+            first = False
+            row_tags = [t.strip() for t in row[1:] if t.strip()]
+            yield row[0], base_tags + row_tags
+        else:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            yield line, base_tags
+
+
+async def _iter_chunks(rows: AsyncIterable[TargetRow], size: int) -> AsyncIterator[List[TargetRow]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _aiter(items: Iterable[TargetRow]) -> AsyncIterator[TargetRow]:
+    for item in items:
+        yield item
+
+
+class TargetImportService:
+    """Imports targets in chunks: validate, pre-filter existing values, insert_many."""
+
+    def __init__(self, db: AsyncIOMotorDatabase, chunk_size: Optional[int] = None):
+        self.db = db
+        self.targets_collection = db.targets
+        self.chunk_size = chunk_size or settings.TARGET_IMPORT_CHUNK_SIZE
+
+    async def import_rows(
+        self,
+        rows: "AsyncIterable[TargetRow] | Iterable[TargetRow]",
+        created: Optional[List[dict]] = None
+    ) -> AsyncIterator[TargetImportProgress]:
+        """Import rows chunk by chunk, yielding cumulative progress after each chunk.
+
+        If ``created`` is given, the inserted documents are appended to it.
+        """
+        if not hasattr(rows, "__aiter__"):
+            rows = _aiter(rows)
+
+        progress = TargetImportProgress()
+
+        async for chunk in _iter_chunks(rows, self.chunk_size):
+            progress.chunk += 1
+            progress.received += len(chunk)
+
+            docs = self._validate_chunk(chunk, progress)
+            docs = await self._drop_existing(docs, progress)
+            inserted = await self._insert(docs, progress)
+
+            if created is not None:
+                created.extend(inserted)
+
+            yield progress.model_copy()
+
+        progress.done = True
+        logger.info(
+            "Targets imported",
+            received=progress.received,
+            created=progress.created,
+            duplicates=progress.duplicates,
+            invalid=progress.invalid,
+            failed=progress.failed
+        )
+        yield progress
+
+    def _validate_chunk(self, chunk: List[TargetRow], progress: TargetImportProgress) -> List[dict]:
+        docs = {}
+        now = datetime.utcnow()
+
+        for raw_value, tags in chunk:
+            try:
+                value = Target.validate_target(raw_value)
+            except ValueError:
+                progress.invalid += 1
+                continue
+
+            # Repeats inside the chunk count as duplicates
+            if value in docs:
+                progress.duplicates += 1
+                continue
+
+            docs[value] = {
+                "id": str(uuid.uuid4()),
+                "value": value,
+                "tags": tags,
+                "createdAt": now,
+            }
+
+        return list(docs.values())
+
+    async def _drop_existing(self, docs: List[dict], progress: TargetImportProgress) -> List[dict]:
+        if not docs:
+            return docs
+
+        cursor = self.targets_collection.find(
+            {"value": {"$in": [doc["value"] for doc in docs]}},
+            {"_id": 0, "value": 1}
+        )
+        existing = {doc["value"] async for doc in cursor}
+
+        progress.duplicates += len(existing)
+        return [doc for doc in docs if doc["value"] not in existing]
+
+    async def _insert(self, docs: List[dict], progress: TargetImportProgress) -> List[dict]:
+        if not docs:
+            return []
+
+        try:
+            await self.targets_collection.insert_many(docs, ordered=False)
+            progress.created += len(docs)
+            return docs
+        except BulkWriteError as e:
+            # A concurrent import may have inserted some values since the $in check
+            failed = {}
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = error["code"]
+
+            other = [code for code in failed.values() if code != DUPLICATE_KEY_ERROR]
+            if other:
+                logger.warning("Target import write errors", count=len(other), codes=sorted(set(other)))
+
+            progress.duplicates += len(failed) - len(other)
+            progress.failed += len(other)
+            inserted = [doc for index, doc in enumerate(docs) if index not in failed]
+            progress.created += len(inserted)
+            return inserted
@@ -0,0 +1,121 @@
+"""
+Target planning: canonicalize, merge and exclude run targets before scanning.
+"""
+import ipaddress
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List
+from app.services.scope_index import HostnameTrie, Network, normalize_hostname, parse_network
+
+
+def canonical_hostname(value: str) -> str:
+    """Lowercase, strip the root dot and IDNA-encode a hostname."""
+    hostname = normalize_hostname(value)
+    try:
+        return hostname.encode("idna").decode("ascii")
+    except UnicodeError:
+        return hostname
+
+
+def _subtract(networks: List[Network], excluded: List[Network]) -> List[Network]:
+    """Remove excluded networks from a collapsed network list."""
+    for exclusion in excluded:
+        remaining = []
+        for network in networks:
+            if not network.overlaps(exclusion):
+                remaining.append(network)
+            elif exclusion.supernet_of(network):
+                continue
+            else:
+                remaining.extend(network.address_exclude(exclusion))
+        networks = remaining
+    return sorted(networks)
+
+
+@dataclass
+class TargetPlan:
+    """Minimal, non-overlapping set of things to scan."""
+    networks: Dict[int, List[Network]] = field(default_factory=lambda: {4: [], 6: []})
+    hostnames: List[str] = field(default_factory=list)
+    invalid: List[str] = field(default_factory=list)
+
+    @property
+    def address_count(self) -> int:
+        """Number of distinct IP addresses covered."""
+        return sum(n.num_addresses for version in (4, 6) for n in self.networks[version])
+
+    def iter_addresses(self) -> Iterator[str]:
+        """Yield every covered IP address once, lazily."""
+        for version in (4, 6):
+            for network in self.networks[version]:
+                for address in network:
+                    yield str(address)
+
+    def iter_scan_units(self, max_addresses: int = 256) -> Iterator[str]:
+        """Yield scanner targets: networks split into CIDRs of at most max_addresses, then hostnames.
+
+        Units never overlap, so each address is scanned exactly once.
+        """
+        for version in (4, 6):
+            max_bits = 32 if version == 4 else 128
+            min_prefix = max_bits - max(max_addresses, 1).bit_length() + 1
+            for network in self.networks[version]:
+                if network.prefixlen >= min_prefix:
+                    parts = [network]
+                else:
+                    parts = network.subnets(new_prefix=min_prefix)
+                for part in parts:
+                    yield str(part.network_address) if part.num_addresses == 1 else str(part)
+
+        yield from self.hostnames
+
+    def summary(self) -> Dict[str, int]:
+        """Counts stored on the run for visibility."""
+        return {
+            "networks": len(self.networks[4]) + len(self.networks[6]),
+            "addresses": self.address_count,
+            "hostnames": len(self.hostnames),
+            "invalid": len(self.invalid),
+        }
+
+
+def plan_targets(targets: Iterable[str], exclusions: Iterable[str] = ()) -> TargetPlan:
+    """Canonicalize targets, merge overlapping/adjacent networks and apply exclusions.
+
+    Hostname exclusions also exclude their subdomains.
+    """
+    plan = TargetPlan()
+    raw_networks: Dict[int, List[Network]] = {4: [], 6: []}
+    hostnames: Dict[str, None] = {}
+
+    for target in targets:
+        if not target or not target.strip():
+            continue
+        network = parse_network(target)
+        if network is not None:
+            raw_networks[network.version].append(network)
+            continue
+        hostname = canonical_hostname(target)
+        if hostname:
+            hostnames[hostname] = None
+        else:
+            plan.invalid.append(target)
+
+    excluded_networks: Dict[int, List[Network]] = {4: [], 6: []}
+    excluded_hosts = HostnameTrie()
+    for exclusion in exclusions:
+        network = parse_network(exclusion)
+        if network is not None:
+            excluded_networks[network.version].append(network)
+        elif exclusion.strip():
+            # Unlike scope, an excluded hostname also drops its subdomains
+            hostname = canonical_hostname(exclusion)
+            excluded_hosts.add(hostname)
+            excluded_hosts.add(f"*.{hostname}")
+
+    for version in (4, 6):
+        collapsed = list(ipaddress.collapse_addresses(raw_networks[version]))
+        excluded = list(ipaddress.collapse_addresses(excluded_networks[version]))
+        plan.networks[version] = _subtract(collapsed, excluded)
+
+    plan.hostnames = [h for h in hostnames if not excluded_hosts.contains(h)]
+    return plan
@@ -0,0 +1,77 @@
+"""
+Server-side resolution of tag-based target selectors.
+"""
+from typing import AsyncIterator, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.models.target import TargetSelector
+
+
+class TargetSetNotFoundError(LookupError):
+    """Raised when a selector names a target set that does not exist."""
+
+    def __init__(self, target_set_id: str):
+        self.target_set_id = target_set_id
+        super().__init__(f"Target set not found: {target_set_id}")
+
+
+def _tag_query(selector: TargetSelector) -> dict:
+    """Translate the tag fields of a selector into a filter on the tags index."""
+    conditions = {}
+    if selector.tags:
+        conditions["$all"] = selector.tags
+    if selector.anyTags:
+        conditions["$in"] = selector.anyTags
+    if selector.excludeTags:
+        conditions["$nin"] = selector.excludeTags
+    return {"tags": conditions} if conditions else {}
+
+
+def is_empty(selector: Optional[TargetSelector]) -> bool:
+    """Whether a selector selects nothing on its own."""
+    return selector is None or not (
+        selector.tags or selector.anyTags or selector.excludeTags or selector.targetSetId
+    )
+
+
+async def build_query(db: AsyncIOMotorDatabase, selector: TargetSelector) -> dict:
+    """Build the db.targets filter for a selector, expanding any saved target set."""
+    query = _tag_query(selector)
+    if not selector.targetSetId:
+        return query
+
+    target_set = await db.target_sets.find_one({"id": selector.targetSetId}, {"_id": 0, "selector": 1})
+    if target_set is None:
+        raise TargetSetNotFoundError(selector.targetSetId)
+
+    set_query = _tag_query(TargetSelector(**target_set["selector"]))
+    parts = [q for q in (set_query, query) if q]
+    if len(parts) > 1:
+        return {"$and": parts}
+    return parts[0] if parts else {}
+
+
+async def count_selected(db: AsyncIOMotorDatabase, selector: TargetSelector) -> int:
+    """Count the targets a selector currently matches."""
+    return await db.targets.count_documents(await build_query(db, selector))
+
+
+async def iter_selected(
+    db: AsyncIOMotorDatabase,
+    selector: TargetSelector,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[List[str]]:
+    """Stream the values of matching targets in batches."""
+    batch_size = batch_size or settings.TARGET_SELECTOR_BATCH_SIZE
+    cursor = db.targets.find(
+        await build_query(db, selector), {"_id": 0, "value": 1}
+    ).batch_size(batch_size)
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc["value"])
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
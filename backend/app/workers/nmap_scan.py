@@ -0,0 +1,35 @@
+"""
+Nmap command construction and finding detection shared by in-process and RQ scans.
+"""
+import shlex
+from typing import Any, Dict, List
+from app.models.run import Finding, FindingSeverity
+
+
+def build_command(config: Dict[str, Any]) -> List[str]:
+    """Nmap argv for a node config, without the target."""
+    args = config.get("args", "-sV -Pn")
+    ports = config.get("ports")
+
+    cmd = ["nmap"]
+    if args:
+        cmd += shlex.split(args)
+    if ports:
+        cmd += ["-p", str(ports)]
+    return cmd
+
+
+def detect_findings(node_id: str, target: str, out_text: str) -> List[dict]:
+    """Findings for one target's scan output."""
+    # Example of simple finding detection
+    findings = []
+    if "open" in out_text.lower():
+        findings.append(Finding(
+            id=f"{node_id}-{target}-open",
+            severity=FindingSeverity.MEDIUM,
+            title=f"Open ports found on {target}",
+            description="One or more open ports detected.",
+            service="nmap",
+            metadata={"output": out_text}
+        ).dict())
+    return findings
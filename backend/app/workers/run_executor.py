@@ -1,104 +1,528 @@
 import asyncio
-import shlex
+import os
+import signal
+import socket
+import time
 import traceback
-from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.models.run import RunStatus, StepStatus, Finding, FindingSeverity
+import uuid
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from typing import Dict, Iterable, List, Optional, Set
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from app.models.run import RunStatus, StepStatus
+from app.models.target import TargetSelector
 from app.models.workflow import NodeKind
 from app.core.config import settings
+from app.core.database import get_database
 from app.core.logging import get_logger
+from app.core.metrics import EXECUTOR_ACTIVE_RUNS, EXECUTOR_ACTIVE_STEPS, EXECUTOR_RUNS_FINISHED
+from app.services.retention import retention_schedule, summarize_findings
+from app.services.scan_rate_limiter import scan_rate_limiter
+from app.services.scan_tuner import ScanTuner
+from app.services.scope_index import parse_network
+from app.services.shard_coordinator import ShardedScan, sharding_available, split_shards
+from app.services.step_timing import StepTimings, UnitTiming, read_process_usage
+from app.services.target_planner import TargetPlan, plan_targets
+from app.services.target_selector import iter_selected
+from app.workers.nmap_scan import build_command, detect_findings
+from app.workers.simulation import SimulationProfile
+from app.workers.tool_runner import stop_run_containers
 
 logger = get_logger(__name__)
 
-async def execute_run_async(run_id: str, workflow_doc: dict, targets: list, run_mode: str):
-    """Execute a workflow run asynchronously."""
+# Identifies this process as the holder of run leases
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Executor tasks running in this process, by run id
+active_runs: Dict[str, asyncio.Task] = {}
+
+
+def cancel_local_run(run_id: str) -> bool:
+    """Cancel the run's executor task if it runs in this process.
+
+    Executors elsewhere notice on their next heartbeat, once the lease is gone.
+    """
+    task = active_runs.get(run_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+class RunLease:
+    """Exclusive, expiring claim on a run, renewed by a heartbeat while it executes.
+
+    If the process dies the lease lapses and the reaper requeues the run.
+    """
+
+    def __init__(self, runs, run_id: str, owner: str = WORKER_ID):
+        self.runs = runs
+        self.run_id = run_id
+        self.owner = owner
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> Optional[dict]:
+        """Claim the run if unleased or expired; returns the run document or None."""
+        now = datetime.utcnow()
+        return await self.runs.find_one_and_update(
+            {
+                "id": self.run_id,
+                "status": {"$in": [RunStatus.QUEUED, RunStatus.RUNNING]},
+                "$or": [
+                    {"leaseOwner": None},
+                    {"leaseOwner": self.owner},
+                    {"leaseExpiresAt": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": RunStatus.RUNNING,
+                    "leaseOwner": self.owner,
+                    "leaseExpiresAt": now + timedelta(seconds=settings.RUN_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            projection={"_id": 0, "steps": 1, "attempts": 1, "simulation": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def start_heartbeat(self, task: asyncio.Task):
+        """Renew the lease periodically; cancel ``task`` if the lease is lost."""
+        self._heartbeat = asyncio.create_task(self._beat(task), name=f"run-lease-{self.run_id}")
+
+    async def stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _beat(self, task: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.RUN_HEARTBEAT_SECONDS)
+            try:
+                result = await self.runs.update_one(
+                    {"id": self.run_id, "leaseOwner": self.owner},
+                    {"$set": {"leaseExpiresAt": datetime.utcnow() + timedelta(seconds=settings.RUN_LEASE_SECONDS)}},
+                )
+            except PyMongoError as e:
+                logger.warning("Failed to renew run lease", run_id=self.run_id, error=str(e))
+                continue
+            if result.matched_count == 0:
+                # Cancelled, or reaped and claimed elsewhere; stop working on it
+                logger.warning("Lost run lease", run_id=self.run_id, owner=self.owner)
+                task.cancel()
+                return
+
+
+async def execute_run_async(
+    run_id: str,
+    workflow_doc: dict,
+    targets: list,
+    run_mode: str,
+    exclusions: Optional[List[str]] = None,
+    selector: Optional[dict] = None
+):
+    """Execute a workflow run asynchronously.
+
+    Targets matched by ``selector`` are resolved here, not stored on the run.
+    Progress is checkpointed per step and per scan target, so a run resumed
+    after a crash skips finished nodes and targets. Each node may set
+    ``timeoutSeconds``; a node that exceeds it fails the run. In "simulate"
+    mode, or for nodes configured with ``simulation``, tools are replaced by
+    synthetic results and nothing touches the network.
+    """
+    EXECUTOR_ACTIVE_RUNS.inc()
+    active_runs[run_id] = asyncio.current_task()
+    runs = None
+    lease = None
     try:
-        # Mongo connection
-        client = AsyncIOMotorClient(settings.MONGO_URI)
-        db = client[settings.MONGO_DB_NAME]
+        db = await get_database()
         runs = db.runs
 
-        # Set run to running
-        await runs.update_one({"id": run_id}, {"$set": {"status": RunStatus.RUNNING, "startedAt": datetime.utcnow()}})
+        lease = RunLease(runs, run_id)
+        run_doc = await lease.acquire()
+        if run_doc is None:
+            logger.info("Run is finished or leased by another worker", run_id=run_id)
+            return
+        lease.start_heartbeat(asyncio.current_task())
+
+        attempt = run_doc.get("attempts", 1)
+        run_simulation = run_doc.get("simulation")
+        steps_state = {step["nodeId"]: step for step in run_doc.get("steps", [])}
+        if attempt > 1:
+            logger.info("Resuming run", run_id=run_id, attempt=attempt)
+
+        if selector:
+            targets = list(targets)
+            async for batch in iter_selected(db, TargetSelector(**selector)):
+                targets.extend(batch)
+
+        # Merge overlapping targets and apply exclusions so each address is scanned once
+        plan = plan_targets(targets, exclusions or [])
+        if plan.invalid:
+            logger.warning("Ignoring invalid run targets", run_id=run_id, invalid=plan.invalid[:20])
+
+        started = {"targetPlan": plan.summary()}
+        started["startedAt" if attempt <= 1 else "resumedAt"] = datetime.utcnow()
+        await runs.update_one({"id": run_id}, {"$set": started})
 
         for node in workflow_doc.get("nodes", []):
             node_id = node["id"]
             node_kind = node.get("kind")
+            state = steps_state.get(node_id, {})
+
+            if state.get("status") == StepStatus.SUCCEEDED:
+                continue
 
             await _update_step_status(runs, run_id, node_id, StepStatus.RUNNING)
+            EXECUTOR_ACTIVE_STEPS.inc()
+            timeout = _step_timeout(node)
+            simulation = SimulationProfile.for_node(node, run_mode, run_simulation)
+            completed = set(state.get("completedTargets", []))
+            earlier_timings = state.get("timings")
             try:
-                if node_kind == NodeKind.NMAP:
-                    await _run_nmap_step(runs, run_id, node, targets)
-                else:
-                    await _append_step_log(runs, run_id, node_id, f"Skipping unsupported node type: {node_kind}")
-                    await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
+                async with asyncio.timeout(timeout):
+                    if node_kind == NodeKind.NMAP:
+                        await _run_nmap_step(runs, run_id, node, plan, completed, simulation, earlier_timings)
+                    elif simulation is not None:
+                        await _run_simulated_step(
+                            runs, run_id, node, plan, completed, simulation, earlier_timings
+                        )
+                    else:
+                        await _append_step_log(runs, run_id, node_id, f"Skipping unsupported node type: {node_kind}")
+                        await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
+            except asyncio.CancelledError:
+                if await _is_cancelled(runs, run_id):
+                    await _update_step_status(runs, run_id, node_id, StepStatus.CANCELLED)
+                raise
+            except TimeoutError:
+                message = f"Step timed out after {timeout}s"
+                await _append_step_log(runs, run_id, node_id, message)
+                await _update_step_status(runs, run_id, node_id, StepStatus.FAILED, message)
+                await _finish_run(runs, run_id, workflow_doc, RunStatus.FAILED, error=message)
+                EXECUTOR_RUNS_FINISHED.labels(status=RunStatus.FAILED.value).inc()
+                return
             except Exception as e:
                 tb = traceback.format_exc()
                 await _append_step_log(runs, run_id, node_id, f"Error running node: {e}\n{tb}")
                 await _update_step_status(runs, run_id, node_id, StepStatus.FAILED, str(e))
-                await runs.update_one({"id": run_id}, {"$set": {"status": RunStatus.FAILED, "endedAt": datetime.utcnow()}})
+                await _finish_run(runs, run_id, workflow_doc, RunStatus.FAILED)
+                EXECUTOR_RUNS_FINISHED.labels(status=RunStatus.FAILED.value).inc()
                 return
+            finally:
+                EXECUTOR_ACTIVE_STEPS.dec()
 
         # Mark run completed
-        await runs.update_one({"id": run_id}, {"$set": {"status": RunStatus.SUCCEEDED, "endedAt": datetime.utcnow()}})
+        await _finish_run(runs, run_id, workflow_doc, RunStatus.SUCCEEDED)
+        EXECUTOR_RUNS_FINISHED.labels(status=RunStatus.SUCCEEDED.value).inc()
         logger.info("Run completed successfully", run_id=run_id)
 
+    except asyncio.CancelledError:
+        # Cancelled via the API, lease lost, or shutting down; stop everything this run started
+        await asyncio.to_thread(stop_run_containers, run_id)
+        if runs is not None and await _is_cancelled(runs, run_id):
+            EXECUTOR_RUNS_FINISHED.labels(status=RunStatus.CANCELLED.value).inc()
+            logger.info("Run cancelled", run_id=run_id)
+        raise
     except Exception as e:
         logger.error("Fatal error executing run", run_id=run_id, error=str(e))
         tb = traceback.format_exc()
-        await runs.update_one({"id": run_id}, {"$set": {"status": RunStatus.FAILED, "error": tb, "endedAt": datetime.utcnow()}})
+        if runs is not None:
+            await _finish_run(runs, run_id, workflow_doc, RunStatus.FAILED, error=tb)
+        EXECUTOR_RUNS_FINISHED.labels(status=RunStatus.FAILED.value).inc()
+    finally:
+        EXECUTOR_ACTIVE_RUNS.dec()
+        active_runs.pop(run_id, None)
+        if lease is not None:
+            await lease.stop_heartbeat()
+
+async def _finish_run(runs, run_id: str, workflow_doc: dict, status: RunStatus, **fields):
+    """Set the final status and schedule the run for compaction and expiry."""
+    ended_at = datetime.utcnow()
+    update = {"status": status, "endedAt": ended_at, **fields}
+    update.update(retention_schedule(workflow_doc.get("id"), status.value, ended_at))
+
+    # Findings may have been added by shard workers, so summarize from the stored steps
+    run = await runs.find_one({"id": run_id}, {"_id": 0, "steps.findings.severity": 1})
+    if run is not None:
+        update["summary"] = summarize_findings(run.get("steps", []))
+    # A cancellation that raced with completion wins
+    await runs.update_one(
+        {"id": run_id, "status": {"$ne": RunStatus.CANCELLED}},
+        {"$set": update, "$unset": {"leaseOwner": "", "leaseExpiresAt": ""}}
+    )
+
+async def _is_cancelled(runs, run_id: str) -> bool:
+    run = await runs.find_one({"id": run_id}, {"_id": 0, "status": 1})
+    return run is not None and run.get("status") == RunStatus.CANCELLED
+
+def _step_timeout(node: dict) -> Optional[float]:
+    """Node timeoutSeconds (top level or in config), else the default; None means no limit."""
+    timeout = node.get("timeoutSeconds") or node.get("config", {}).get("timeoutSeconds")
+    timeout = timeout or settings.STEP_TIMEOUT_SECONDS
+    return float(timeout) if timeout else None
+
+async def _read_stream(stream, buffer: bytearray, timing: Optional[UnitTiming] = None):
+    while chunk := await stream.read(65536):
+        if timing is not None and timing.first_output_at is None:
+            timing.first_output_at = time.monotonic()
+        buffer.extend(chunk)
+
+async def _sample_usage(pid: int, timing: UnitTiming):
+    while True:
+        timing.record_usage(read_process_usage(pid))
+        await asyncio.sleep(settings.TOOL_USAGE_SAMPLE_SECONDS)
+
+async def _kill_process_group(proc):
+    """SIGTERM the process group, then SIGKILL whatever survives the grace period."""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(proc.wait(), settings.PROCESS_KILL_GRACE_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+async def _run_process(
+    cmd: List[str],
+    stdout: bytearray,
+    stderr: bytearray,
+    timing: Optional[UnitTiming] = None
+) -> int:
+    """Run a command in its own process group, collecting output into the given buffers.
+
+    If cancelled (run cancellation or step timeout), the whole process group is
+    killed; the buffers keep the output produced so far. With ``timing``, the
+    process start, first output and exit are marked and its CPU time and peak
+    memory sampled.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True
+    )
+    pid = getattr(proc, "pid", None)
+    sampler = None
+    if timing is not None:
+        timing.started_at = time.monotonic()
+        if pid is not None:
+            sampler = asyncio.create_task(_sample_usage(pid, timing))
+    try:
+        await asyncio.gather(_read_stream(proc.stdout, stdout, timing), _read_stream(proc.stderr, stderr))
+        if sampler is not None:
+            # Last look before the process is reaped and its /proc entry goes away
+            timing.record_usage(read_process_usage(pid))
+        returncode = await proc.wait()
+        if timing is not None:
+            timing.exited_at = time.monotonic()
+        return returncode
+    except asyncio.CancelledError:
+        await _kill_process_group(proc)
+        raise
     finally:
-        client.close()
+        if sampler is not None:
+            sampler.cancel()
 
-async def _run_nmap_step(runs, run_id: str, node: dict, targets: list):
-    """Execute an Nmap scan node."""
+async def _run_nmap_step(
+    runs,
+    run_id: str,
+    node: dict,
+    plan: TargetPlan,
+    completed: Set[str] = frozenset(),
+    simulation: Optional[SimulationProfile] = None,
+    earlier_timings: Optional[dict] = None
+):
+    """Execute an Nmap scan node, skipping targets already completed by an earlier attempt.
+
+    ``earlier_timings`` is the step's timing snapshot from that attempt, which
+    the new one adds to rather than replaces.
+    """
     node_id = node["id"]
     config = node.get("config", {})
-    args = config.get("args", "-sV -Pn")
-    ports = config.get("ports")
-
-    base_cmd = ["nmap"]
-    if args:
-        base_cmd += shlex.split(args)
-    if ports:
-        base_cmd += ["-p", str(ports)]
-
-    results = []
-    for target in targets:
-        cmd = base_cmd + [target]
-        await _append_step_log(runs, run_id, node_id, f"Running command: {' '.join(cmd)}")
+    base_cmd = build_command(config)
+    timings = StepTimings(os.path.basename(base_cmd[0]), settings.STEP_TIMING_KEEP_TARGETS)
+    timings.merge(earlier_timings)
 
-        proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout, stderr = await proc.communicate()
-        out_text = stdout.decode("utf-8", errors="replace")
-        err_text = stderr.decode("utf-8", errors="replace")
+    # Large networks are split into bounded CIDR units, generated lazily
+    max_addresses = int(config.get("maxAddressesPerScan", settings.SCAN_UNIT_MAX_ADDRESSES))
+    units = plan.iter_scan_units(max_addresses)
+
+    if simulation is None and sharding_available():
+        # Peek just far enough to decide; the plan may be far too large to list
+        head = list(islice(units, settings.SHARD_MIN_UNITS))
+        units = chain(head, units)
+        if len(head) >= settings.SHARD_MIN_UNITS:
+            # Fan out to RQ workers; shards record findings and checkpoints themselves
+            scan = ShardedScan(run_id, node, split_shards(units, settings.SHARD_SIZE))
+            await scan.enqueue()
+            await _append_step_log(runs, run_id, node_id, f"Scanning {scan.units} targets in {scan.total} shards")
+            try:
+                stats = await scan.gather(runs)
+            finally:
+                await _record_shard_timings(runs, run_id, node_id, timings)
+            await _append_step_log(runs, run_id, node_id, f"Nmap scan completed across {stats['total']} shards.")
+            await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
+            return
+
+    tuner = ScanTuner.for_node(config, base_cmd)
+    await _scan_units(runs, run_id, node_id, base_cmd, units, completed, tuner, timings, simulation)
+
+    await _append_step_log(runs, run_id, node_id, "Nmap scan completed.")
+    await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
+
+async def _run_simulated_step(
+    runs,
+    run_id: str,
+    node: dict,
+    plan: TargetPlan,
+    completed: Set[str],
+    simulation: SimulationProfile,
+    earlier_timings: Optional[dict] = None
+):
+    """Execute a non-Nmap node against synthetic results, per target like a scan."""
+    node_id = node["id"]
+    config = node.get("config", {})
+    max_addresses = int(config.get("maxAddressesPerScan", settings.SCAN_UNIT_MAX_ADDRESSES))
+
+    tuner = ScanTuner.for_node(config, [simulation.tool])
+    tuner.tune_timing = False
+    timings = StepTimings(simulation.tool, settings.STEP_TIMING_KEEP_TARGETS)
+    timings.merge(earlier_timings)
+    await _scan_units(
+        runs, run_id, node_id, [simulation.tool], plan.iter_scan_units(max_addresses), completed, tuner, timings,
+        simulation
+    )
+
+    await _append_step_log(runs, run_id, node_id, f"Simulated {simulation.tool} step completed.")
+    await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
 
-        if out_text:
-            await _append_step_log(runs, run_id, node_id, f"[{target}] Nmap output:\n{out_text}")
-        if err_text:
-            await _append_step_log(runs, run_id, node_id, f"[{target}] Nmap errors:\n{err_text}")
-
-        # Example of simple finding detection
-        findings = []
-        if "open" in out_text.lower():
-            findings.append(Finding(
-                id=f"{node_id}-{target}-open",
-                severity=FindingSeverity.MEDIUM,
-                title=f"Open ports found on {target}",
-                description="One or more open ports detected.",
-                service="nmap",
-                metadata={"output": out_text}
-            ).dict())
+async def _scan_units(
+    runs,
+    run_id: str,
+    node_id: str,
+    base_cmd: List[str],
+    units: Iterable[str],
+    completed: Set[str],
+    tuner: ScanTuner,
+    timings: StepTimings,
+    simulation: Optional[SimulationProfile]
+):
+    """Scan units concurrently, as many at once as the tuner allows."""
+    pending: Set[asyncio.Task] = set()
+    try:
+        for target in units:
+            if target in completed:
+                continue
+            while len(pending) >= tuner.concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            pending.add(asyncio.create_task(
+                _scan_unit(runs, run_id, node_id, base_cmd, target, tuner, timings, simulation)
+            ))
 
+        if pending:
+            await asyncio.gather(*pending)
+        pending = set()
+    finally:
+        # Kill scans still in flight when the step fails, times out or is cancelled
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
         await runs.update_one(
             {"id": run_id, "steps.nodeId": node_id},
-            {"$push": {"steps.$.findings": {"$each": findings}}}
+            {"$set": {"steps.$.tuning": tuner.snapshot(), "steps.$.timings": timings.snapshot()}}
         )
 
-        results.append({"target": target, "stdout": out_text, "stderr": err_text})
+async def _scan_unit(
+    runs,
+    run_id: str,
+    node_id: str,
+    base_cmd: List[str],
+    target: str,
+    tuner: ScanTuner,
+    timings: StepTimings,
+    simulation: Optional[SimulationProfile] = None
+):
+    """Scan one unit, feeding its latency and outcome to the step's tuner and timings."""
+    timing = timings.unit(target)
+    cmd = base_cmd + tuner.timing_args() + [target]
 
-    await _append_step_log(runs, run_id, node_id, "Nmap scan completed.")
-    await _update_step_status(runs, run_id, node_id, StepStatus.SUCCEEDED)
+    if simulation is not None:
+        # Nothing leaves the host, so there is no network to be polite to
+        timing.admitted_at = time.monotonic()
+        await _append_step_log(runs, run_id, node_id, f"Running simulated command: {' '.join(cmd)}")
+        timing.launched_at = time.monotonic()
+        timing.started_at = time.monotonic()
+        result = await simulation.run(node_id, target)
+        timing.exited_at = time.monotonic()
+        returncode, out_text, err_text, findings = result.returncode, result.stdout, result.stderr, result.findings
+        label = f"Simulated {simulation.tool}"
+    else:
+        # Shared with every other step scanning the same network or host
+        await scan_rate_limiter.acquire(target)
+        timing.admitted_at = time.monotonic()
+        await _append_step_log(runs, run_id, node_id, f"Running command: {' '.join(cmd)}")
+        timing.launched_at = time.monotonic()
+
+        stdout, stderr = bytearray(), bytearray()
+        try:
+            returncode = await _run_process(cmd, stdout, stderr, timing)
+        except asyncio.CancelledError:
+            # Keep whatever the scanner printed before it was killed
+            if stdout:
+                text = stdout.decode("utf-8", errors="replace")
+                await _append_step_log(runs, run_id, node_id, f"[{target}] Partial Nmap output:\n{text}")
+            raise
+        out_text = stdout.decode("utf-8", errors="replace")
+        err_text = stderr.decode("utf-8", errors="replace")
+        parse_started = time.monotonic()
+        findings = detect_findings(node_id, target, out_text)
+        timing.parse_seconds = time.monotonic() - parse_started
+        label = "Nmap"
+
+    network = parse_network(target)
+    tuner.record(
+        timing.exited_at - timing.started_at,
+        addresses=network.num_addresses if network is not None else 1,
+        failed=returncode != 0,
+        timed_out="host timeout" in out_text,
+    )
+
+    if out_text:
+        await _append_step_log(runs, run_id, node_id, f"[{target}] {label} output:\n{out_text}")
+    if err_text:
+        await _append_step_log(runs, run_id, node_id, f"[{target}] {label} errors:\n{err_text}")
+
+    # Findings and the checkpoint are written together so a resume never duplicates them
+    persist_started = time.monotonic()
+    await runs.update_one(
+        {"id": run_id, "steps.nodeId": node_id},
+        {
+            "$push": {"steps.$.findings": {"$each": findings}},
+            "$addToSet": {"steps.$.completedTargets": target},
+        }
+    )
+    timing.persist_seconds = time.monotonic() - persist_started
+    timings.record(timing)
+
+async def _record_shard_timings(runs, run_id: str, node_id: str, timings: StepTimings):
+    """Fold the timings each shard job stored on the step into the step's own."""
+    run = await runs.find_one({"id": run_id, "steps.nodeId": node_id}, {"_id": 0, "steps.$": 1})
+    steps = (run or {}).get("steps") or [{}]
+    for snapshot in steps[0].get("shardTimings", {}).values():
+        # Shards run side by side within the step's wall time
+        timings.merge(snapshot, wall=False)
+    await runs.update_one(
+        {"id": run_id, "steps.nodeId": node_id},
+        {"$set": {"steps.$.timings": timings.snapshot()}, "$unset": {"steps.$.shardTimings": ""}}
+    )
 
 async def _append_step_log(runs, run_id: str, step_id: str, log: str):
     """Push a log line into step logs."""
@@ -109,7 +533,7 @@ async def _update_step_status(runs, run_id: str, step_id: str, status: StepStatu
     update = {"steps.$.status": status}
     if status == StepStatus.RUNNING:
         update["steps.$.startedAt"] = datetime.utcnow()
-    elif status in [StepStatus.SUCCEEDED, StepStatus.FAILED]:
+    elif status in [StepStatus.SUCCEEDED, StepStatus.FAILED, StepStatus.CANCELLED]:
         update["steps.$.completedAt"] = datetime.utcnow()
     if error:
         update["steps.$.error"] = error
@@ -0,0 +1,123 @@
+"""
+RQ jobs executed by `worker.py` processes.
+"""
+import os
+import resource
+import subprocess
+import time
+from functools import lru_cache
+from typing import List
+from pymongo import MongoClient
+from pymongo.database import Database
+from rq import get_current_job
+from app.core.config import settings
+from app.core.database import database_name
+from app.core.logging import get_logger
+from app.core.redis_client import get_sync_redis
+from app.models.run import RunStatus
+from app.services.scan_rate_limiter import scan_rate_limiter
+from app.services.shard_coordinator import shard_key
+from app.services.step_timing import StepTimings
+from app.workers.nmap_scan import build_command, detect_findings
+
+logger = get_logger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _db() -> Database:
+    # RQ jobs are synchronous, so workers use a plain pymongo client
+    return MongoClient(settings.MONGODB_URI)[database_name()]
+
+
+def run_scan_shard(run_id: str, node: dict, shard_index: int, targets: List[str]):
+    """Scan one shard of a step's targets, recording results in the parent run.
+
+    Targets already checkpointed by an earlier attempt are skipped. The shard's
+    index is added to the done set on success, to the failed set once RQ has
+    no retries left, or to the skipped set when the run is no longer running. Per-target timings go to ``steps.$.shardTimings``,
+    where the executor folds them into the step's timings.
+    """
+    node_id = node["id"]
+    runs = _db().runs
+    key = shard_key(run_id, node_id)
+    conn = get_sync_redis()
+
+    try:
+        run = runs.find_one(
+            {"id": run_id, "steps.nodeId": node_id},
+            {"_id": 0, "status": 1, "steps.$": 1}
+        )
+        if run is None or run.get("status") != RunStatus.RUNNING:
+            # Report back, or the coordinator would wait on this shard until it is cancelled
+            conn.sadd(f"{key}:skipped", shard_index)
+            logger.info("Skipping shard of inactive run", run_id=run_id, shard=shard_index)
+            return
+
+        step = run["steps"][0]
+        completed = set(step.get("completedTargets", []))
+        base_cmd = build_command(node.get("config", {}))
+        timings = StepTimings(os.path.basename(base_cmd[0]), settings.STEP_TIMING_KEEP_TARGETS)
+        # A retried shard adds to what its earlier attempts recorded
+        timings.merge(step.get("shardTimings", {}).get(str(shard_index)))
+
+        try:
+            for target in targets:
+                if target in completed:
+                    continue
+                _scan_target(runs, run_id, node_id, shard_index, base_cmd, target, timings)
+        finally:
+            runs.update_one(
+                {"id": run_id, "steps.nodeId": node_id},
+                {"$set": {f"steps.$.shardTimings.{shard_index}": timings.snapshot()}}
+            )
+
+        conn.sadd(f"{key}:done", shard_index)
+    except Exception:
+        job = get_current_job()
+        if job is None or not job.retries_left:
+            conn.sadd(f"{key}:failed", shard_index)
+            logger.error("Shard failed permanently", run_id=run_id, node_id=node_id, shard=shard_index)
+        raise
+
+
+def _scan_target(
+    runs, run_id: str, node_id: str, shard_index: int, base_cmd: List[str], target: str, timings: StepTimings
+):
+    timing = timings.unit(target)
+    scan_rate_limiter.acquire_sync(target)
+    timing.admitted_at = time.monotonic()
+
+    # The work horse is forked per job, so its children are this shard's scans
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    timing.started_at = time.monotonic()
+    proc = subprocess.run(base_cmd + [target], capture_output=True, start_new_session=True)
+    timing.exited_at = time.monotonic()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+    timing.record_usage((cpu, after.ru_maxrss))
+
+    out_text = proc.stdout.decode("utf-8", errors="replace")
+    err_text = proc.stderr.decode("utf-8", errors="replace")
+    parse_started = time.monotonic()
+    findings = detect_findings(node_id, target, out_text)
+    timing.parse_seconds = time.monotonic() - parse_started
+
+    logs = [f"[shard {shard_index}] Running command: {' '.join(base_cmd + [target])}"]
+    if out_text:
+        logs.append(f"[{target}] Nmap output:\n{out_text}")
+    if err_text:
+        logs.append(f"[{target}] Nmap errors:\n{err_text}")
+
+    persist_started = time.monotonic()
+    runs.update_one(
+        {"id": run_id, "steps.nodeId": node_id},
+        {
+            "$push": {
+                "steps.$.logs": {"$each": logs},
+                "steps.$.findings": {"$each": findings},
+            },
+            "$addToSet": {"steps.$.completedTargets": target},
+        }
+    )
+    timing.persist_seconds = time.monotonic() - persist_started
+    timings.record(timing)
@@ -0,0 +1,199 @@
+"""
+Simulated tool execution for load testing: synthetic latency, output and findings, no network access.
+"""
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from app.core.config import settings
+from app.models.run import Finding, FindingSeverity
+
+SIMULATE = "simulate"
+
+# Profile keys as written in settings, run and node config
+_CONFIG_KEYS = {
+    "latencyMs": "latency_ms",
+    "latencyJitter": "latency_jitter",
+    "outputBytes": "output_bytes",
+    "findingsPerTarget": "findings_per_target",
+    "failureRate": "failure_rate",
+    "timeoutRate": "timeout_rate",
+    "timeoutSeconds": "timeout_seconds",
+    "seed": "seed",
+}
+
+_SEVERITY_WEIGHTS = {
+    FindingSeverity.LOW: 0.6,
+    FindingSeverity.MEDIUM: 0.3,
+    FindingSeverity.HIGH: 0.08,
+    FindingSeverity.CRITICAL: 0.02,
+}
+
+
+class InvalidSimulationError(ValueError):
+    """Raised when run or node simulation overrides are malformed."""
+
+
+class SimulationOverrides(BaseModel):
+    """Profile keys a run or node may override, checked before the run is created.
+
+    Fields default to None only to mean "not overridden"; an explicit null is rejected.
+    """
+    latencyMs: float = Field(None, ge=0)
+    latencyJitter: float = Field(None, ge=0)
+    outputBytes: int = Field(None, ge=0)
+    findingsPerTarget: float = Field(None, ge=0)
+    failureRate: float = Field(None, ge=0, le=1)
+    timeoutRate: float = Field(None, ge=0, le=1)
+    timeoutSeconds: float = Field(None, gt=0)
+    seed: Optional[int] = None
+
+    class Config:
+        extra = "forbid"
+        strict = True
+
+
+def _check_overrides(where: str, overrides: Any) -> None:
+    if not isinstance(overrides, dict):
+        raise InvalidSimulationError(f"{where} must be an object")
+    try:
+        SimulationOverrides(**overrides)
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        raise InvalidSimulationError(f"Invalid {where}: {problems}")
+
+
+def validate_simulation(run_simulation: Optional[Dict[str, Any]], nodes: Iterable[dict] = ()) -> None:
+    """Check a run's ``simulation`` and its nodes' ``config.simulation``.
+
+    Raises InvalidSimulationError, so bad values are rejected when the run is
+    created instead of failing it once it executes.
+    """
+    if run_simulation is not None:
+        if not isinstance(run_simulation, dict):
+            raise InvalidSimulationError("simulation must be an object")
+        for key, overrides in run_simulation.items():
+            if key == "seed":
+                _check_overrides("simulation", {"seed": overrides})
+            else:
+                _check_overrides(f"simulation.{key}", overrides)
+
+    for node in nodes:
+        node_simulation = (node.get("config") or {}).get("simulation")
+        if node_simulation is not None and not isinstance(node_simulation, bool):
+            _check_overrides(f"simulation of node {node.get('id')}", node_simulation)
+
+
+@dataclass
+class SimulatedScan:
+    """What a simulated tool produced for one target."""
+    returncode: int
+    stdout: str
+    stderr: str = ""
+    findings: List[dict] = field(default_factory=list)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth's method; means here are small
+    if mean <= 0:
+        return 0
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+@dataclass
+class SimulationProfile:
+    """Behaviour of one simulated tool.
+
+    Latency is log-normal around ``latency_ms`` with shape ``latency_jitter``;
+    findings per target are Poisson distributed.
+    """
+    tool: str
+    latency_ms: float = 1000.0
+    latency_jitter: float = 0.5
+    output_bytes: int = 2048
+    findings_per_target: float = 1.0
+    failure_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 30.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def for_node(cls, node: dict, run_mode: str, run_simulation: Optional[Dict[str, Any]] = None) -> Optional["SimulationProfile"]:
+        """Profile for a node, or None if it runs for real.
+
+        A node is simulated when the run's mode is "simulate" or its config sets
+        ``simulation``. SIMULATION_PROFILES gives per-tool defaults; the run's
+        ``simulation`` (keyed by tool) overrides them, and the node's overrides both.
+        """
+        config = node.get("config", {})
+        node_simulation = config.get("simulation")
+        if run_mode != SIMULATE and not node_simulation:
+            return None
+
+        tool = node.get("kind") or "default"
+        run_simulation = run_simulation or {}
+        profile: Dict[str, Any] = {}
+        for source in (settings.SIMULATION_PROFILES, run_simulation):
+            profile.update(source.get("default", {}))
+            profile.update(source.get(tool, {}))
+        if isinstance(node_simulation, dict):
+            profile.update(node_simulation)
+        if "seed" in run_simulation:
+            profile.setdefault("seed", run_simulation["seed"])
+
+        return cls(tool=tool, **{_CONFIG_KEYS[k]: v for k, v in profile.items() if k in _CONFIG_KEYS})
+
+    def _rng(self, node_id: str, target: str) -> random.Random:
+        # Seeded profiles give the same outcome per node and target across runs
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{node_id}:{target}")
+
+    def _output(self, target: str, ports: List[int]) -> str:
+        lines = [f"Simulated {self.tool} scan report for {target}"]
+        lines += [f"{port}/tcp open simulated" for port in ports]
+        body = "\n".join(lines) + "\n"
+        if len(body) < self.output_bytes:
+            filler = "# simulated output padding\n"
+            body += filler * ((self.output_bytes - len(body)) // len(filler) + 1)
+            body = body[:self.output_bytes]
+        return body
+
+    async def run(self, node_id: str, target: str) -> SimulatedScan:
+        """Sleep like the tool would, then return synthetic output and findings."""
+        rng = self._rng(node_id, target)
+        roll = rng.random()
+
+        if roll < self.timeout_rate:
+            # A hung scanner: step timeouts and cancellation must still cut it off
+            await asyncio.sleep(self.timeout_seconds)
+            return SimulatedScan(0, f"Skipping host {target} due to host timeout\n")
+
+        sigma = max(self.latency_jitter, 0.0)
+        await asyncio.sleep(self.latency_ms / 1000 * rng.lognormvariate(0, sigma))
+
+        if roll < self.timeout_rate + self.failure_rate:
+            return SimulatedScan(1, "", f"Simulated {self.tool} failure for {target}\n")
+
+        ports = sorted(rng.sample(range(1, 65536), _poisson(rng, self.findings_per_target)))
+        severities, weights = zip(*_SEVERITY_WEIGHTS.items())
+        findings = [
+            Finding(
+                id=f"{node_id}-{target}-sim-{port}",
+                severity=rng.choices(severities, weights)[0],
+                title=f"Simulated finding on {target}:{port}",
+                description=f"Synthetic {self.tool} result; no scan was performed.",
+                service=self.tool,
+                port=port,
+                metadata={"simulated": True},
+            ).dict()
+            for port in ports
+        ]
+        return SimulatedScan(0, self._output(target, ports), findings=findings)
@@ -2,14 +2,45 @@
 Tool runner module for executing security tools in Docker containers.
 """
 import docker
+import time
 import uuid
 import json
+from docker.errors import ContainerError, DockerException
+from requests.exceptions import RequestException
 from typing import Dict, Any, List
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import STEP_PHASE_SECONDS, STEP_TOOL_CPU_SECONDS, STEP_TOOL_MAX_RSS_BYTES
+from app.services.step_timing import container_usage
 
 logger = get_logger(__name__)
 
+# Label on every tool container so a cancelled run can find and remove them
+RUN_ID_LABEL = "reconcraft.run_id"
+
+
+def stop_run_containers(run_id: str, timeout: int = 5) -> int:
+    """Stop and remove all tool containers started for a run; returns how many."""
+    try:
+        client = docker.from_env()
+        containers = client.containers.list(all=True, filters={"label": f"{RUN_ID_LABEL}={run_id}"})
+    except DockerException as e:
+        logger.debug("Docker unavailable, no containers to stop", run_id=run_id, error=str(e))
+        return 0
+
+    stopped = 0
+    for container in containers:
+        try:
+            container.stop(timeout=timeout)
+            container.remove(force=True)
+            stopped += 1
+        except DockerException as e:
+            logger.warning("Failed to stop run container", run_id=run_id, container=container.name, error=str(e))
+
+    if stopped:
+        logger.info("Stopped run containers", run_id=run_id, count=stopped)
+    return stopped
+
 
 class ToolRunner:
     """Executes security tools in sandboxed Docker containers."""
@@ -51,6 +82,47 @@ class ToolRunner:
 
         return executor(node_config, targets, run_id, node_id)
 
+    def _run_container(self, tool: str, image: str, command: str, **kwargs) -> Dict[str, Any]:
+        """Run a tool container to completion, sampling its CPU and memory while it runs.
+
+        Raises ContainerError on a non-zero exit, like ``containers.run``.
+        Returns the container's runtime, CPU seconds and peak memory.
+        """
+        started = time.monotonic()
+        container = self.docker_client.containers.run(image, command=command, detach=True, **kwargs)
+        usage: Dict[str, Any] = {"cpuSeconds": None, "maxRssKb": None}
+        try:
+            while True:
+                try:
+                    cpu, peak = container_usage(container.stats(stream=False))
+                except (DockerException, RequestException):
+                    cpu, peak = None, None
+                if cpu is not None:
+                    usage["cpuSeconds"] = max(usage["cpuSeconds"] or 0.0, cpu)
+                if peak is not None:
+                    usage["maxRssKb"] = max(usage["maxRssKb"] or 0, peak)
+                try:
+                    result = container.wait(timeout=settings.TOOL_USAGE_SAMPLE_SECONDS)
+                    break
+                except RequestException:
+                    continue
+            usage["runtimeSeconds"] = round(time.monotonic() - started, 3)
+            if result.get("StatusCode", 0) != 0:
+                stderr = container.logs(stdout=False, stderr=True)
+                raise ContainerError(container, result["StatusCode"], command, image, stderr)
+        finally:
+            try:
+                container.remove(force=True)
+            except DockerException as e:
+                logger.warning("Failed to remove tool container", container=container.name, error=str(e))
+
+            STEP_PHASE_SECONDS.labels(tool=tool, phase="runtime").observe(time.monotonic() - started)
+            if usage["cpuSeconds"] is not None:
+                STEP_TOOL_CPU_SECONDS.labels(tool=tool).observe(usage["cpuSeconds"])
+            if usage["maxRssKb"] is not None:
+                STEP_TOOL_MAX_RSS_BYTES.labels(tool=tool).observe(usage["maxRssKb"] * 1024)
+        return usage
+
     def _execute_demo(self, node_kind: str, node_config: Dict, targets: List[str]) -> Dict[str, Any]:
         """Execute in demo mode (mock execution)."""
         logs = [
@@ -99,6 +171,7 @@ class ToolRunner:
         """Execute Nmap scan in Docker container."""
         logs = []
         findings = []
+        usage = []
 
         try:
             # Build nmap command
@@ -116,18 +189,19 @@ class ToolRunner:
                 logs.append(f"Starting nmap scan for {target}")
 
                 # Run Docker container
-                container = self.docker_client.containers.run(
+                target_usage = self._run_container(
+                    "nmap",
                     "instrumentisto/nmap:latest",
-                    command=f"{flags} -oX /tmp/scan.xml {target}",
+                    f"{flags} -oX /tmp/scan.xml {target}",
                     name=container_name,
-                    detach=False,
-                    remove=True,
                     network_mode="bridge",
+                    labels={RUN_ID_LABEL: run_id},
                     mem_limit=settings.DOCKER_MEMORY_LIMIT,
                     cpu_period=100000,
                     cpu_quota=int(settings.DOCKER_CPU_LIMIT * 100000),
                     user="nobody"
                 )
+                usage.append({"target": target, **target_usage})
 
                 logs.append(f"Nmap scan completed for {target}")
 
@@ -145,7 +219,7 @@ class ToolRunner:
             logs.append(f"ERROR: {str(e)}")
             raise
 
-        return {"logs": logs, "findings": findings}
+        return {"logs": logs, "findings": findings, "usage": usage}
 
     def _execute_http_probe(self, config: Dict, targets: List[str], run_id: str, node_id: str) -> Dict[str, Any]:
         """Execute HTTP probing."""
@@ -180,20 +254,22 @@ class ToolRunner:
             return {"logs": logs, "findings": []}
 
         logs.append(f"Scanning repository: {repo_url}")
+        usage = []
 
         try:
             container_name = f"gitleaks-{run_id}-{node_id}-{uuid.uuid4().hex[:8]}"
 
             # Run Gitleaks in Docker
-            self.docker_client.containers.run(
+            repo_usage = self._run_container(
+                "gitleaks",
                 "zricethezav/gitleaks:latest",
-                command=f"detect --source {repo_url} --report-format json",
+                f"detect --source {repo_url} --report-format json",
                 name=container_name,
-                detach=False,
-                remove=True,
+                labels={RUN_ID_LABEL: run_id},
                 mem_limit=settings.DOCKER_MEMORY_LIMIT,
                 user="nobody"
             )
+            usage.append({"target": repo_url, **repo_usage})
 
             logs.append("Gitleaks scan completed")
 
@@ -201,7 +277,7 @@ class ToolRunner:
             logger.error("Gitleaks execution failed", error=str(e))
             logs.append(f"ERROR: {str(e)}")
 
-        return {"logs": logs, "findings": findings}
+        return {"logs": logs, "findings": findings, "usage": usage}
 
     def _execute_slack_alert(self, config: Dict, targets: List[str], run_id: str, node_id: str) -> Dict[str, Any]:
         """Send alert to Slack."""
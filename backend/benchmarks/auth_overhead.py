@@ -0,0 +1,49 @@
+"""
+Measure per-request authentication overhead of get_current_user.
+
+Usage: python -m benchmarks.auth_overhead [--requests 20000]
+"""
+import argparse
+import json
+import time
+from app.core import security
+from app.core.security import create_access_token, decode_access_token, resolve_principal
+
+
+def measure(fn, token: str, requests: int) -> float:
+    """Return mean microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn(token)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+def run(requests: int = 20000) -> dict:
+    """Compare full JWT verification with the cached principal path."""
+    token = create_access_token(data={"sub": "bench-user", "kid": "bench-key"})
+
+    security._principal_cache.clear()
+    resolve_principal(token)
+
+    uncached = measure(decode_access_token, token, requests)
+    cached = measure(resolve_principal, token, requests)
+
+    return {
+        "requests": requests,
+        "token_bytes": len(token),
+        "decode_us": round(uncached, 2),
+        "cached_us": round(cached, 2),
+        "speedup": round(uncached / cached, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
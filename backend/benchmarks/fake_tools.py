@@ -0,0 +1,47 @@
+"""
+Fake scanner binaries with configurable latency and output size.
+"""
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+_NMAP_HEADER = """Starting Nmap 7.94 ( https://nmap.org )
+Nmap scan report for target
+Host is up (0.00042s latency).
+PORT     STATE SERVICE VERSION
+22/tcp   open  ssh     OpenSSH 9.6
+443/tcp  open  https   nginx
+"""
+
+_GITLEAKS_HEADER = """[{"Description": "Generic API Key", "File": "config.py", "RuleID": "generic-api-key"}]
+"""
+
+
+def _write_tool(directory: str, name: str, header: str, latency: float, output_bytes: int):
+    body = header + "#" * max(0, output_bytes - len(header))
+    output_path = os.path.join(directory, f"{name}.out")
+    with open(output_path, "w") as f:
+        f.write(body + "\n")
+
+    # A shell script keeps process start-up cost close to that of the real binary
+    tool_path = os.path.join(directory, name)
+    with open(tool_path, "w") as f:
+        f.write(f"#!/bin/sh\nsleep {latency:.4f}\ncat '{output_path}'\n")
+    os.chmod(tool_path, os.stat(tool_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+@contextmanager
+def fake_tools(latency: float = 0.05, output_bytes: int = 2048) -> Iterator[str]:
+    """Put fake ``nmap`` and ``gitleaks`` first on PATH for the duration."""
+    with tempfile.TemporaryDirectory(prefix="reconcraft-bench-") as directory:
+        _write_tool(directory, "nmap", _NMAP_HEADER, latency, output_bytes)
+        _write_tool(directory, "gitleaks", _GITLEAKS_HEADER, latency, output_bytes)
+
+        original = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{directory}{os.pathsep}{original}"
+        try:
+            yield directory
+        finally:
+            os.environ["PATH"] = original
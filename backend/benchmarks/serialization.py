@@ -0,0 +1,111 @@
+"""
+Compare the validated response path with the fast serialization path.
+
+Usage: python -m benchmarks.serialization [--workflows 50] [--nodes 500]
+"""
+import argparse
+import gzip
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, List
+from fastapi.encoders import jsonable_encoder
+from app.core.responses import dumps, from_documents
+from app.models.workflow import Workflow
+
+
+def build_documents(workflows: int, nodes: int) -> List[dict]:
+    """Build workflow documents shaped like Workflow.dict() writes them."""
+    docs = []
+    for w in range(workflows):
+        node_docs = [
+            {
+                "id": f"node-{i}",
+                "kind": "nmap",
+                "label": f"Scan {i}",
+                "category": "recon",
+                "config": {"args": "-sV -Pn", "ports": "1-1000", "scanType": "quick"},
+                "position": {"x": float(i * 10), "y": float(i % 7)},
+            }
+            for i in range(nodes)
+        ]
+        edge_docs = [
+            {
+                "id": f"edge-{i}",
+                "source": f"node-{i}",
+                "target": f"node-{i + 1}",
+                "sourceHandle": None,
+                "targetHandle": None,
+                "label": None,
+                "type": None,
+            }
+            for i in range(nodes - 1)
+        ]
+        docs.append({
+            "_id": uuid.uuid4().hex[:24],
+            "id": str(uuid.uuid4()),
+            "name": f"Workflow {w}",
+            "nodes": node_docs,
+            "edges": edge_docs,
+            "createdAt": datetime.utcnow(),
+            "updatedAt": datetime.utcnow(),
+            "authorizedTargets": True,
+        })
+    return docs
+
+
+def validated_path(docs: List[dict]) -> bytes:
+    """Model validation, response_model re-encoding and stdlib json (previous behaviour)."""
+    models = [Workflow(**doc) for doc in docs]
+    return json.dumps(jsonable_encoder(models)).encode()
+
+
+def fast_path(docs: List[dict]) -> bytes:
+    """pydantic-core validation plus orjson rendering."""
+    return dumps(from_documents(Workflow, docs))
+
+
+def measure(fn: Callable[[List[dict]], bytes], docs: List[dict], repeat: int) -> float:
+    """Return the best wall time in seconds over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(workflows: int = 50, nodes: int = 500, repeat: int = 5) -> dict:
+    """Run the comparison and return the results."""
+    docs = build_documents(workflows, nodes)
+    body = fast_path(docs)
+
+    assert json.loads(body) == json.loads(validated_path(docs)), "paths must render identically"
+
+    validated = measure(validated_path, docs, repeat)
+    fast = measure(fast_path, docs, repeat)
+
+    return {
+        "workflows": workflows,
+        "nodes_per_workflow": nodes,
+        "payload_bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body)),
+        "validated_ms": round(validated * 1000, 2),
+        "fast_ms": round(fast * 1000, 2),
+        "speedup": round(validated / fast, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workflows", type=int, default=50)
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.workflows, args.nodes, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Soak test: drive simulated runs through the executor and API for a long time, watching for leaks.
+
+Runs offline in "simulate" mode against the in-memory database stand-in (or a
+local mongod with --mongo-uri); finished runs are deleted so the database does
+not grow with the soak. Every --interval seconds the process RSS, open file
+descriptors, asyncio tasks and tracemalloc totals are sampled; the sample
+taken after --warmup is the baseline. At the end, load is drained and the
+final state compared with the baseline: growth beyond a budget fails the soak
+(exit 1). The JSON report lists the call sites whose allocations grew most and
+any asyncio tasks left behind.
+
+Usage: python -m benchmarks.soak [--duration 7200] [--runs N] [--interval 30] [--warmup 120]
+                                 [--concurrency 8] [--api-share 0.5] [--cancel-share 0.05]
+                                 [--rss-budget-mb 64] [--fd-budget 16] [--task-budget 0]
+                                 [--traced-budget-mb 32] [--top 15] [--report FILE] [--mongo-uri URI]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+import httpx
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.logging import setup_logging
+from app.models.run import RunStatus
+from app.services.run_scheduler import run_scheduler
+from app.workers import run_executor
+from benchmarks.suite import _open_database
+
+# Project files, so the report can point at our call site rather than library internals
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FINISHED = {RunStatus.SUCCEEDED.value, RunStatus.FAILED.value, RunStatus.CANCELLED.value}
+
+WORKFLOW = {
+    "id": "soak-wf",
+    "name": "Soak",
+    "nodes": [
+        {"id": "scan", "kind": "nmap", "label": "Scan", "config": {"concurrency": 4}},
+        {"id": "probe", "kind": "httpProbe", "label": "Probe", "config": {"concurrency": 4}},
+    ],
+}
+
+
+@dataclass
+class Sample:
+    elapsed: float
+    runs: int
+    rss_mb: float
+    fds: Optional[int]
+    tasks: int
+    traced_mb: float
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def open_fds() -> Optional[int]:
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def sample(started: float, runs: int) -> Sample:
+    return Sample(
+        elapsed=round(time.monotonic() - started, 1),
+        runs=runs,
+        rss_mb=round(rss_mb(), 2),
+        fds=open_fds(),
+        tasks=len(asyncio.all_tasks()),
+        traced_mb=round(tracemalloc.get_traced_memory()[0] / 2**20, 2),
+    )
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+
+
+def top_allocators(baseline: tracemalloc.Snapshot, final: tracemalloc.Snapshot, limit: int) -> List[dict]:
+    """Call sites whose live allocations grew most since the baseline."""
+    grown = [s for s in final.compare_to(baseline, "traceback") if s.size_diff > 0][:limit]
+    report = []
+    for stat in grown:
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in reversed(stat.traceback)]
+        app_frames = [f for f in frames if f.startswith(os.path.join(_ROOT, "app"))]
+        ours = app_frames or [f for f in frames if f.startswith(_ROOT)]
+        report.append({
+            "site": (ours or frames)[0],
+            "sizeDiffKb": round(stat.size_diff / 1024, 1),
+            "countDiff": stat.count_diff,
+            "traceback": frames,
+        })
+    return report
+
+
+def leftover_tasks(known: set) -> List[str]:
+    """Tasks alive after the drain that were not there before the soak started."""
+    leftovers = []
+    for task in asyncio.all_tasks():
+        if task in known or task is asyncio.current_task():
+            continue
+        coro = task.get_coro()
+        frame = getattr(coro, "cr_frame", None)
+        where = f"{frame.f_code.co_filename}:{frame.f_lineno}" if frame else "?"
+        leftovers.append(f"{task.get_name()} {getattr(coro, '__qualname__', coro)} at {where}")
+    return leftovers
+
+
+class Soak:
+    """Keeps ``concurrency`` simulated runs in flight, alternating executor and API paths."""
+
+    def __init__(self, db, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.db = db
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.simulation = {
+            "default": {
+                "latencyMs": args.latency_ms,
+                "latencyJitter": 0.5,
+                "outputBytes": 2048,
+                "findingsPerTarget": 1.0,
+                "failureRate": 0.02,
+            },
+        }
+        self.completed = 0
+        self.errors: Dict[str, int] = {}
+
+    def _targets(self) -> List[str]:
+        base = self.rng.randrange(1, 250)
+        return [f"10.{base}.{self.rng.randrange(250)}.{2 * i + 1}" for i in range(self.args.targets)]
+
+    async def _via_executor(self):
+        run_id = str(uuid.uuid4())
+        targets = self._targets()
+        await self.db.runs.insert_one({
+            "id": run_id,
+            "workflowId": WORKFLOW["id"],
+            "workflowName": WORKFLOW["name"],
+            "status": RunStatus.QUEUED.value,
+            "runMode": "simulate",
+            "simulation": self.simulation,
+            "targets": targets,
+            "attempts": 0,
+            "steps": [
+                {"nodeId": n["id"], "name": n["label"], "status": "pending", "logs": [], "findings": []}
+                for n in WORKFLOW["nodes"]
+            ],
+        })
+        await run_executor.execute_run_async(run_id, WORKFLOW, targets, "simulate")
+        return run_id
+
+    async def _via_api(self):
+        response = await self.client.post("/api/execute", json={
+            "workflow": WORKFLOW,
+            "targets": self._targets(),
+            "runMode": "simulate",
+            "simulation": self.simulation,
+        })
+        response.raise_for_status()
+        run_id = response.json()["runId"]
+
+        if self.rng.random() < self.args.cancel_share:
+            await asyncio.sleep(self.rng.uniform(0, self.args.latency_ms / 1000))
+            response = await self.client.post(f"/api/runs/{run_id}/cancel")
+            if response.status_code not in (200, 409):
+                response.raise_for_status()
+
+        # Inline runs execute on the scheduler; wait for them like a client polling would
+        while True:
+            run = await self.db.runs.find_one({"id": run_id}, {"_id": 0, "status": 1})
+            if run is None or run.get("status") in _FINISHED:
+                break
+            await asyncio.sleep(0.05)
+        await self.client.get("/api/metrics")
+        return run_id
+
+    async def _one(self):
+        run_id = None
+        try:
+            if self.rng.random() < self.args.api_share:
+                run_id = await self._via_api()
+            else:
+                run_id = await self._via_executor()
+        except Exception as e:
+            name = type(e).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+        finally:
+            if run_id is not None:
+                # Keep the database flat so growth is the process's own
+                await self.db.runs.delete_one({"id": run_id})
+            self.completed += 1
+
+    async def drive(self, deadline: float, max_runs: Optional[int]):
+        slots = asyncio.Semaphore(self.args.concurrency)
+        pending = set()
+        started = 0
+        while time.monotonic() < deadline and (max_runs is None or started < max_runs):
+            await slots.acquire()
+            task = asyncio.create_task(self._one())
+            task.add_done_callback(lambda t: slots.release())
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            started += 1
+        if pending:
+            await asyncio.gather(*pending)
+
+
+async def soak(args: argparse.Namespace) -> dict:
+    from app.main import app
+
+    db, cleanup = await _open_database(args.mongo_uri)
+
+    async def database():
+        return db
+
+    original = run_executor.get_database
+    run_executor.get_database = database
+    app.dependency_overrides[get_database] = lambda: db
+    known_tasks = set(asyncio.all_tasks())
+
+    started = time.monotonic()
+    samples: List[Sample] = []
+    baseline: Optional[Sample] = None
+    baseline_snapshot = None
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://soak") as client:
+            runner = Soak(db, client, args)
+            driver = asyncio.create_task(runner.drive(started + args.duration, args.runs))
+
+            while not driver.done():
+                await asyncio.wait({driver}, timeout=args.interval)
+                current = sample(started, runner.completed)
+                samples.append(current)
+                print(json.dumps(asdict(current)), file=sys.stderr, flush=True)
+                if baseline is None and (current.elapsed >= args.warmup or driver.done()):
+                    baseline, baseline_snapshot = current, _snapshot()
+            await driver
+
+            # Let scheduler tasks and lease heartbeats wind down before the final look
+            while run_scheduler.running:
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(0.5)
+        gc.collect()
+        final = sample(started, runner.completed)
+        final_snapshot = _snapshot()
+        leftovers = leftover_tasks(known_tasks)
+    finally:
+        run_executor.get_database = original
+        app.dependency_overrides.pop(get_database, None)
+        if cleanup is not None:
+            await cleanup()
+
+    growth = {
+        "rssMb": round(final.rss_mb - baseline.rss_mb, 2),
+        "fds": final.fds - baseline.fds if final.fds is not None and baseline.fds is not None else None,
+        "tasks": len(leftovers),
+        "tracedMb": round(final.traced_mb - baseline.traced_mb, 2),
+    }
+    runs_after_baseline = max(final.runs - baseline.runs, 1)
+    budgets = {
+        "rssMb": args.rss_budget_mb,
+        "fds": args.fd_budget,
+        "tasks": args.task_budget,
+        "tracedMb": args.traced_budget_mb,
+    }
+    failures = [
+        f"{name} grew by {growth[name]} (budget {budget})"
+        for name, budget in budgets.items()
+        if growth[name] is not None and growth[name] > budget
+    ]
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "mongod" if args.mongo_uri else "memory",
+            "concurrency": args.concurrency,
+            "targets": args.targets,
+        },
+        "runs": runner.completed,
+        "errors": runner.errors,
+        "duration": final.elapsed,
+        "baseline": asdict(baseline),
+        "final": asdict(final),
+        "growth": growth,
+        "rssKbPer1000Runs": round(growth["rssMb"] * 1024 / runs_after_baseline * 1000, 1),
+        "peakRssMb": max(s.rss_mb for s in samples),
+        "medianTasks": statistics.median(s.tasks for s in samples),
+        "budgets": budgets,
+        "failures": failures,
+        "topAllocators": top_allocators(baseline_snapshot, final_snapshot, args.top),
+        "leftoverTasks": leftovers[:50],
+        "samples": [asdict(s) for s in samples],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=7200, help="seconds to keep starting runs")
+    parser.add_argument("--runs", type=int, help="stop after this many runs, if sooner")
+    parser.add_argument("--interval", type=float, default=30, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=120, help="seconds before the baseline sample")
+    parser.add_argument("--concurrency", type=int, default=8, help="runs in flight")
+    parser.add_argument("--targets", type=int, default=4, help="targets per run")
+    parser.add_argument("--latency-ms", type=float, default=20, help="mean simulated tool latency")
+    parser.add_argument("--api-share", type=float, default=0.5, help="share of runs started through the API")
+    parser.add_argument("--cancel-share", type=float, default=0.05, help="share of API runs cancelled mid-flight")
+    parser.add_argument("--rss-budget-mb", type=float, default=64)
+    parser.add_argument("--fd-budget", type=int, default=16)
+    parser.add_argument("--task-budget", type=int, default=0, help="asyncio tasks allowed to outlive the soak")
+    parser.add_argument("--traced-budget-mb", type=float, default=32, help="growth of live Python allocations")
+    parser.add_argument("--frames", type=int, default=8, help="tracemalloc traceback depth")
+    parser.add_argument("--top", type=int, default=15, help="allocation sites to report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="also write the JSON report to this file")
+    parser.add_argument("--mongo-uri", help="soak against a local mongod instead of the in-memory stand-in")
+    args = parser.parse_args()
+
+    # Logs and samples go to stderr as they happen; stdout is the JSON report
+    setup_logging(stream=sys.stderr)
+    logging.getLogger().setLevel(logging.WARNING)
+    # Inline API runs queue on the scheduler; give it as many slots as the soak keeps in flight
+    run_scheduler.max_concurrent = max(args.concurrency, settings.EXECUTOR_MAX_CONCURRENT_RUNS)
+
+    tracemalloc.start(args.frames)
+    report = asyncio.run(soak(args))
+    tracemalloc.stop()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "samples"}, indent=2))
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Benchmark suite for the executor, persistence and API hot paths.
+
+Runs offline: scans use fake nmap/gitleaks binaries and, unless --mongo-uri
+points at a local mongod, an in-memory database stand-in. Results are JSON;
+with --baseline, metrics that got worse by more than --threshold are listed
+as regressions and the exit status is 1. A baseline taken against the other
+database backend is not compared, since the numbers do not carry over.
+
+Usage: python -m benchmarks.suite [--quick] [--mongo-uri URI] [--baseline FILE]
+                                  [--save-baseline FILE] [--threshold 0.25]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.logging import setup_logging
+from app.models.auth import APIKeyCreate
+from app.services import auth_service
+from app.services.auth_service import AuthService
+from app.services.scan_rate_limiter import scan_rate_limiter
+from app.workers import run_executor
+from app.workers.nmap_scan import detect_findings
+from benchmarks.fake_tools import fake_tools
+from testing.memory_db import MemoryDatabase
+
+
+@dataclass
+class Metric:
+    value: float
+    unit: str
+    better: str  # "higher" or "lower"
+
+
+@dataclass
+class Scale:
+    runs: int = 20
+    targets: int = 8
+    latency: float = 0.05
+    output_bytes: int = 2048
+    log_lines: int = 5000
+    finding_updates: int = 1000
+    findings_per_update: int = 5
+    requests: int = 200
+    token_cold: int = 5
+
+
+# Changes smaller than this are timer noise, whatever their relative size
+NOISE_FLOOR = {"ms": 1.0}
+
+QUICK = Scale(runs=4, targets=4, latency=0.01, log_lines=500, finding_updates=100, requests=50, token_cold=2)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _timed(fn: Callable[[], Awaitable], repeat: int) -> List[float]:
+    """Milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _workflow(concurrency: int) -> dict:
+    # Fixed concurrency: the adaptive tuner reacts to host load, which would make results noisy
+    config = {"args": "-Pn", "adaptive": False, "concurrency": concurrency}
+    return {"id": "bench-wf", "name": "Benchmark", "nodes": [{"id": "scan", "kind": "nmap", "label": "Scan", "config": config}]}
+
+
+def _targets(run: int, count: int) -> List[str]:
+    # Non-adjacent addresses, so the target planner keeps one scan unit per target
+    return [f"10.{run // 250}.{run % 250}.{2 * i + 1}" for i in range(count)]
+
+
+async def _seed_run(db, workflow: dict, targets: List[str]) -> str:
+    run_id = str(uuid.uuid4())
+    await db.runs.insert_one({
+        "id": run_id,
+        "workflowId": workflow["id"],
+        "workflowName": workflow["name"],
+        "status": "queued",
+        "targets": targets,
+        "attempts": 0,
+        "steps": [
+            {"nodeId": n["id"], "name": n["label"], "status": "pending", "logs": [], "findings": []}
+            for n in workflow["nodes"]
+        ],
+    })
+    return run_id
+
+
+async def bench_executor(db, scale: Scale) -> Dict[str, Metric]:
+    """Runs per second, and executor time per target beyond the scanner's own latency."""
+    sequential = _workflow(concurrency=1)
+    run_id = await _seed_run(db, sequential, _targets(0, scale.targets))
+    start = time.perf_counter()
+    await run_executor.execute_run_async(run_id, sequential, _targets(0, scale.targets), "live")
+    per_target = (time.perf_counter() - start) / scale.targets
+    overhead_ms = max(0.0, per_target - scale.latency) * 1000
+
+    workflow = _workflow(concurrency=4)
+    slots = asyncio.Semaphore(settings.EXECUTOR_MAX_CONCURRENT_RUNS)
+    runs = []
+    for i in range(scale.runs):
+        targets = _targets(i + 1, scale.targets)
+        runs.append((await _seed_run(db, workflow, targets), targets))
+
+    async def execute(run_id: str, targets: List[str]):
+        async with slots:
+            await run_executor.execute_run_async(run_id, workflow, targets, "live")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(execute(run_id, targets) for run_id, targets in runs))
+    elapsed = time.perf_counter() - start
+
+    failed = await db.runs.count_documents({"status": {"$ne": "succeeded"}})
+    if failed:
+        raise RuntimeError(f"{failed} benchmark runs did not succeed")
+
+    return {
+        "executor_runs_per_sec": Metric(round(scale.runs / elapsed, 2), "runs/s", "higher"),
+        "executor_target_overhead_ms": Metric(round(overhead_ms, 2), "ms", "lower"),
+    }
+
+
+async def bench_persistence(db, scale: Scale) -> Dict[str, Metric]:
+    """Step log appends and findings ingest, as the executor writes them."""
+    workflow = _workflow(concurrency=1)
+    run_id = await _seed_run(db, workflow, [])
+    line = "x" * 120
+
+    start = time.perf_counter()
+    for _ in range(scale.log_lines):
+        await run_executor._append_step_log(db.runs, run_id, "scan", line)
+    log_rate = scale.log_lines / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(scale.finding_updates):
+        target = f"10.1.{i // 250}.{i % 250}"
+        findings = [
+            {**f, "id": f"{f['id']}-{n}"}
+            for n in range(scale.findings_per_update)
+            for f in detect_findings("scan", target, "22/tcp open ssh")
+        ]
+        await db.runs.update_one(
+            {"id": run_id, "steps.nodeId": "scan"},
+            {
+                "$push": {"steps.$.findings": {"$each": findings}},
+                "$addToSet": {"steps.$.completedTargets": target},
+            }
+        )
+    ingest_rate = scale.finding_updates * scale.findings_per_update / (time.perf_counter() - start)
+
+    return {
+        "step_log_appends_per_sec": Metric(round(log_rate), "lines/s", "higher"),
+        "findings_ingest_per_sec": Metric(round(ingest_rate), "findings/s", "higher"),
+    }
+
+
+async def bench_api(db, scale: Scale) -> Dict[str, Metric]:
+    """Latency of the metrics endpoints and of exchanging an API key for a token."""
+    from app.main import app
+
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def get(path: str):
+                response = await client.get(path)
+                response.raise_for_status()
+
+            # Warm caches and lazy imports before measuring
+            for path in ("/api/metrics", "/api/metrics/prometheus"):
+                await _timed(lambda: get(path), 10)
+
+            metrics = await _timed(lambda: get("/api/metrics"), scale.requests)
+            prometheus = await _timed(lambda: get("/api/metrics/prometheus"), scale.requests)
+
+            key = await AuthService(db).create_api_key(APIKeyCreate(userId="bench", name="bench"))
+
+            async def exchange(cold: bool):
+                if cold:
+                    auth_service._verified_keys.clear()
+                response = await client.post("/api/auth/token", json={"apiKey": key.key})
+                response.raise_for_status()
+
+            cold = await _timed(lambda: exchange(True), scale.token_cold)
+            warm = await _timed(lambda: exchange(False), scale.requests)
+    finally:
+        app.dependency_overrides.pop(get_database, None)
+
+    return {
+        "metrics_p50_ms": Metric(round(statistics.median(metrics), 3), "ms", "lower"),
+        "metrics_p95_ms": Metric(round(_percentile(metrics, 95), 3), "ms", "lower"),
+        "prometheus_p50_ms": Metric(round(statistics.median(prometheus), 3), "ms", "lower"),
+        "token_exchange_cold_p50_ms": Metric(round(statistics.median(cold), 2), "ms", "lower"),
+        "token_exchange_warm_p50_ms": Metric(round(statistics.median(warm), 3), "ms", "lower"),
+    }
+
+
+async def _open_database(mongo_uri: Optional[str]):
+    if not mongo_uri:
+        return MemoryDatabase(), None
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongo_uri)
+    name = f"reconcraft_bench_{uuid.uuid4().hex[:8]}"
+
+    async def cleanup():
+        await client.drop_database(name)
+        client.close()
+
+    return client[name], cleanup
+
+
+async def run(scale: Scale, mongo_uri: Optional[str] = None) -> Dict[str, Metric]:
+    db, cleanup = await _open_database(mongo_uri)
+
+    async def database():
+        return db
+
+    # Measure the executor itself: no politeness delays, no RQ fan-out
+    original = run_executor.get_database, scan_rate_limiter.enabled, settings.SHARDING_ENABLED
+    run_executor.get_database = database
+    scan_rate_limiter.enabled = False
+    settings.SHARDING_ENABLED = False
+
+    results: Dict[str, Metric] = {}
+    try:
+        with fake_tools(scale.latency, scale.output_bytes):
+            results.update(await bench_executor(db, scale))
+        results.update(await bench_persistence(db, scale))
+        results.update(await bench_api(db, scale))
+    finally:
+        run_executor.get_database, scan_rate_limiter.enabled, settings.SHARDING_ENABLED = original
+        if cleanup is not None:
+            await cleanup()
+    return results
+
+
+def compare(results: Dict[str, Metric], baseline: dict, threshold: float) -> Tuple[dict, List[str]]:
+    """Relative change per metric against a baseline, and the metrics that regressed."""
+    changes, regressions = {}, []
+    for name, metric in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (metric.value - base["value"]) / base["value"]
+        changes[name] = {"baseline": base["value"], "change": round(change, 3)}
+        worse = -change if metric.better == "higher" else change
+        noise = abs(metric.value - base["value"]) < NOISE_FLOOR.get(metric.unit, 0)
+        if worse > threshold and not noise:
+            regressions.append(name)
+    return changes, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--mongo-uri", help="benchmark against a local mongod instead of the in-memory stand-in")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown per metric")
+    args = parser.parse_args()
+
+    # Keep stdout to the JSON report; warnings (slow requests, retries) still show on stderr
+    setup_logging(stream=sys.stderr)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    scale = QUICK if args.quick else Scale()
+    results = asyncio.run(run(scale, args.mongo_uri))
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "mongod" if args.mongo_uri else "memory",
+            "scale": asdict(scale),
+        },
+        "results": {name: asdict(metric) for name, metric in results.items()},
+    }
+
+    regressions = []
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"Baseline {args.baseline} not found; skipping comparison", file=sys.stderr)
+        else:
+            environment = baseline.get("environment", {})
+            if environment.get("backend") != report["environment"]["backend"]:
+                print(f"Baseline was taken against {environment.get('backend') or 'an unknown backend'}, "
+                      f"not {report['environment']['backend']}; skipping comparison", file=sys.stderr)
+            else:
+                if environment.get("scale") != report["environment"]["scale"]:
+                    print("Baseline was taken at a different scale; comparison is indicative only", file=sys.stderr)
+                report["comparison"], regressions = compare(results, baseline, args.threshold)
+                report["regressions"] = regressions
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Migrate API keys to key-id lookup.
+
+Keys issued before key ids existed cannot be given one without changing the raw
+key their owners hold. This script creates the lookup indexes, lists the legacy
+keys that still need a one-off bcrypt scan on first use, and can deactivate them
+so their owners rotate to new rcs_<keyid>_<secret> keys.
+"""
+import argparse
+import asyncio
+import sys
+from app.core.database import db_manager
+
+LEGACY_FILTER = {"isActive": True, "keyId": None, "lookupDigest": None}
+
+
+async def migrate(deactivate: bool):
+    """Report (and optionally deactivate) unmigrated legacy API keys."""
+    print("🚀 Migrating API keys...")
+
+    # Connecting also creates the keyId / lookupDigest indexes
+    await db_manager.connect()
+    db = db_manager.db
+
+    legacy = await db.api_keys.find(LEGACY_FILTER, {"id": 1, "userId": 1, "name": 1}).to_list(None)
+    migrated = await db.api_keys.count_documents({"isActive": True, "lookupDigest": {"$type": "string"}})
+
+    print(f"✅ Legacy keys already migrated to digest lookup: {migrated}")
+    print(f"📝 Legacy keys not yet used since the upgrade: {len(legacy)}")
+    for key_doc in legacy:
+        print(f"   - {key_doc['id']}  user={key_doc['userId']}  name={key_doc.get('name')}")
+
+    if deactivate and legacy:
+        result = await db.api_keys.update_many(LEGACY_FILTER, {"$set": {"isActive": False}})
+        print(f"🔒 Deactivated {result.modified_count} legacy keys; owners must create new keys")
+
+    await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--deactivate-legacy",
+        action="store_true",
+        help="Deactivate legacy keys that have not been migrated yet",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(migrate(args.deactivate_legacy))
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,289 @@
+"""
+In-memory stand-in for the subset of Motor the executor, auth and metrics paths use.
+
+Backs the ``memory_db`` test fixture, and the benchmarks when no
+``--mongo-uri`` is given so they run without a mongod. Benchmarks on it
+measure our code, not MongoDB: compare results only against baselines
+taken with the same backend.
+"""
+import copy
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+
+@dataclass
+class UpdateResult:
+    matched_count: int
+    modified_count: int
+
+
+@dataclass
+class DeleteResult:
+    deleted_count: int
+
+
+@dataclass
+class InsertOneResult:
+    inserted_id: Any
+
+
+def _values(doc: Any, path: List[str]) -> List[Any]:
+    """Values at a dotted path, fanning out over arrays like MongoDB does."""
+    if not path:
+        return [doc]
+    if isinstance(doc, list):
+        return [v for item in doc for v in _values(item, path)]
+    if not isinstance(doc, dict) or path[0] not in doc:
+        return [_MISSING]
+    return _values(doc[path[0]], path[1:])
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, arg in condition.items():
+            present = value is not _MISSING
+            if op == "$exists":
+                if present != bool(arg):
+                    return False
+            elif op == "$in":
+                if not any(_match_value(value, a) for a in arg):
+                    return False
+            elif op == "$all":
+                if not all(_match_value(value, a) for a in arg):
+                    return False
+            elif op == "$nin":
+                if any(_match_value(value, a) for a in arg):
+                    return False
+            elif op == "$ne":
+                if _match_value(value, arg):
+                    return False
+            elif op in ("$lt", "$lte", "$gt", "$gte"):
+                if not present or value is None:
+                    return False
+                if op == "$lt" and not value < arg or op == "$lte" and not value <= arg:
+                    return False
+                if op == "$gt" and not value > arg or op == "$gte" and not value >= arg:
+                    return False
+            else:
+                raise NotImplementedError(f"Query operator {op}")
+        return True
+    if value is _MISSING:
+        return condition is None
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    return value == condition
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif not any(_match_value(v, condition) for v in _values(doc, key.split("."))):
+            return False
+    return True
+
+
+def _positional_index(doc: dict, query: dict, array_field: str) -> int:
+    prefix = f"{array_field}."
+    for key, condition in query.items():
+        if key.startswith(prefix):
+            for i, item in enumerate(doc.get(array_field, [])):
+                if matches(item, {key[len(prefix):]: condition}):
+                    return i
+    raise ValueError(f"No positional match for {array_field}")
+
+
+def _resolve(doc: dict, path: str, query: dict) -> Tuple[Any, str]:
+    """Parent container and final key for an update path, expanding ``$``."""
+    parts = path.split(".")
+    target = doc
+    for i, part in enumerate(parts[:-1]):
+        if part == "$":
+            part = _positional_index(doc, query, ".".join(parts[:i]))
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    last = parts[-1]
+    return target, int(last) if isinstance(target, list) else last
+
+
+def apply_update(doc: dict, update: dict, query: dict):
+    for op, fields in update.items():
+        for path, value in fields.items():
+            parent, key = _resolve(doc, path, query)
+            if op == "$set":
+                parent[key] = copy.deepcopy(value)
+            elif op == "$unset":
+                parent.pop(key, None)
+            elif op == "$inc":
+                parent[key] = parent.get(key, 0) + value
+            elif op in ("$push", "$addToSet"):
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                array = parent.setdefault(key, [])
+                for item in items:
+                    if op == "$push" or item not in array:
+                        array.append(copy.deepcopy(item))
+            else:
+                raise NotImplementedError(f"Update operator {op}")
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    """Copy a document, honouring top-level inclusion or exclusion projections."""
+    if projection:
+        include = {k.split(".")[0] for k, v in projection.items() if v and k != "_id"}
+        exclude = {k for k, v in projection.items() if not v}
+        if include:
+            doc = {k: v for k, v in doc.items() if k in include}
+        else:
+            doc = {k: v for k, v in doc.items() if k not in exclude}
+    return copy.deepcopy(doc)
+
+
+class MemoryCursor:
+    def __init__(self, docs: List[dict]):
+        self.docs = docs
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: (d.get(field) is None, d.get(field)), reverse=order < 0)
+        return self
+
+    def skip(self, n: int):
+        self.docs = self.docs[n:]
+        return self
+
+    def limit(self, n: int):
+        if n:
+            self.docs = self.docs[:n]
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self.docs[:length] if length else list(self.docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[dict] = []
+        self.unique: List[str] = []
+
+    def _matching(self, query: Optional[dict]) -> Iterable[dict]:
+        return (d for d in self.docs if matches(d, query or {}))
+
+    async def create_index(self, keys, unique: bool = False, **kwargs):
+        # Only single-field unique indexes are enforced
+        if unique and isinstance(keys, str):
+            self.unique.append(keys)
+        return None
+
+    async def insert_one(self, doc: dict) -> InsertOneResult:
+        for field in self.unique:
+            if field in doc and any(d.get(field) == doc[field] for d in self.docs):
+                raise DuplicateKeyError(f"E11000 duplicate key error: {self.name}.{field}", 11000)
+        doc.setdefault("_id", len(self.docs) + 1)
+        self.docs.append(copy.deepcopy(doc))
+        return InsertOneResult(doc["_id"])
+
+    async def insert_many(self, docs: List[dict], ordered: bool = True):
+        errors, inserted = [], 0
+        for index, doc in enumerate(docs):
+            try:
+                await self.insert_one(doc)
+                inserted += 1
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": inserted})
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        doc = next(iter(self._matching(query)), None)
+        return project(doc, projection) if doc is not None else None
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> MemoryCursor:
+        return MemoryCursor([project(d, projection) for d in self._matching(query)])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        doc = next(iter(self._matching(query)), None)
+        if doc is None:
+            return UpdateResult(0, 0)
+        apply_update(doc, update, query)
+        return UpdateResult(1, 1)
+
+    async def update_many(self, query: dict, update: dict) -> UpdateResult:
+        docs = list(self._matching(query))
+        for doc in docs:
+            apply_update(doc, update, query)
+        return UpdateResult(len(docs), len(docs))
+
+    async def find_one_and_update(self, query: dict, update: dict, projection: Optional[dict] = None,
+                                  return_document: bool = False, **kwargs) -> Optional[dict]:
+        doc = next(iter(self._matching(query)), None)
+        if doc is None:
+            return None
+        before = project(doc, projection)
+        apply_update(doc, update, query)
+        return project(doc, projection) if return_document else before
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        doc = next(iter(self._matching(query)), None)
+        if doc is None:
+            return DeleteResult(0)
+        self.docs.remove(doc)
+        return DeleteResult(1)
+
+    async def count_documents(self, query: dict) -> int:
+        return sum(1 for _ in self._matching(query))
+
+    async def estimated_document_count(self) -> int:
+        return len(self.docs)
+
+    def aggregate(self, pipeline: List[dict]) -> MemoryCursor:
+        docs = list(self.docs)
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if matches(d, spec)]
+            elif op == "$group":
+                field = spec["_id"].lstrip("$")
+                groups: Dict[Any, int] = {}
+                for d in docs:
+                    groups[d.get(field)] = groups.get(d.get(field), 0) + 1
+                (name, _), = ((k, v) for k, v in spec.items() if k != "_id")
+                docs = [{"_id": k, name: v} for k, v in groups.items()]
+            else:
+                raise NotImplementedError(f"Aggregation stage {op}")
+        return MemoryCursor(docs)
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return self._collections.setdefault(name, MemoryCollection(name))
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
@@ -4,6 +4,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from httpx import AsyncClient
 from app.main import app
 from app.core.config import settings
+from testing.memory_db import MemoryDatabase
 
 
 @pytest.fixture(scope="session")
@@ -27,6 +28,29 @@ async def test_db():
     client.close()
 
 
+@pytest.fixture
+def memory_db():
+    """In-memory stand-in for the Motor database, for service tests that need no mongod."""
+    return MemoryDatabase()
+
+
+@pytest.fixture
+def record_calls(monkeypatch):
+    """Wrap a collection method so each call's first argument (query or documents) is recorded."""
+    def record(collection, method):
+        calls = []
+        original = getattr(collection, method)
+
+        def wrapper(*args, **kwargs):
+            calls.append(args[0] if args else None)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(collection, method, wrapper)
+        return calls
+
+    return record
+
+
 @pytest.fixture
 async def client():
     """Create a test client."""
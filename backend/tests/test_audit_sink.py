@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.services.audit_sink import AuditSink
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.batches = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.batches.append(list(docs))
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_batches():
+    """Test queued events are flushed with insert_many."""
+    collection = RecordingCollection()
+    sink = AuditSink(max_size=100, batch_size=10, flush_interval=0.05)
+    await sink.start(collection)
+
+    for i in range(25):
+        await sink.put({"id": str(i)})
+    await asyncio.sleep(0.2)
+    await sink.stop()
+
+    written = [doc["id"] for batch in collection.batches for doc in batch]
+    assert written == [str(i) for i in range(25)]
+    assert max(len(batch) for batch in collection.batches) <= 10
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_events():
+    """Test shutdown writes everything still queued."""
+    collection = RecordingCollection()
+    sink = AuditSink(max_size=100, batch_size=50, flush_interval=10)
+    await sink.start(collection)
+
+    for i in range(5):
+        await sink.put({"id": str(i)})
+    await sink.stop()
+
+    assert sum(len(batch) for batch in collection.batches) == 5
+
+
+@pytest.mark.asyncio
+async def test_overflow_drop_counts_discarded_events():
+    """Test a full queue drops events under the drop policy."""
+    sink = AuditSink(max_size=2, overflow="drop")
+    sink._queue = asyncio.Queue(maxsize=2)
+
+    for i in range(5):
+        await sink.put({"id": str(i)})
+
+    assert sink.dropped == 3
+
+
+@pytest.mark.asyncio
+async def test_overflow_spill_is_replayed_on_start(tmp_path):
+    """Test spilled events are written on the next start."""
+    spill_path = str(tmp_path / "audit.jsonl")
+    sink = AuditSink(max_size=1, overflow="spill", spill_path=spill_path)
+    sink._queue = asyncio.Queue(maxsize=1)
+
+    await sink.put({"id": "kept"})
+    await sink.put({"id": "spilled", "timestamp": datetime(2024, 1, 1)})
+    assert sink.spilled == 1
+
+    collection = RecordingCollection()
+    restarted = AuditSink(overflow="spill", spill_path=spill_path)
+    await restarted.start(collection)
+    await restarted.stop()
+
+    assert collection.batches[0] == [{"id": "spilled", "timestamp": datetime(2024, 1, 1)}]
+
+
+class PartlyFailingCollection:
+    def __init__(self, failed_index, code):
+        self.failed_index = failed_index
+        self.code = code
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered=True):
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())
+            if index != self.failed_index:
+                self.inserted.append(doc)
+        error = {"index": self.failed_index, "code": self.code, "errmsg": "write failed"}
+        raise BulkWriteError({"writeErrors": [error], "nInserted": len(docs) - 1})
+
+
+@pytest.mark.asyncio
+async def test_partial_write_failure_spills_only_failed_events(tmp_path, memory_db):
+    """Test only events a bulk error rejected are spilled, and a replay never stores one twice."""
+    spill_path = tmp_path / "audit.jsonl"
+    sink = AuditSink(overflow="spill", spill_path=str(spill_path))
+    sink._collection = PartlyFailingCollection(failed_index=1, code=121)
+
+    await sink._write([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+
+    assert sink.spilled == 1
+    spilled = spill_path.read_bytes()
+    await memory_db.audit_logs.create_index("_id", unique=True)
+    for _ in range(2):
+        # The second replay finds the event already stored, as after a crash mid-replay
+        spill_path.write_bytes(spilled)
+        restarted = AuditSink(overflow="spill", spill_path=str(spill_path))
+        await restarted.start(memory_db.audit_logs)
+        await restarted.stop()
+        assert restarted.spilled == 0
+
+    assert [doc["id"] for doc in memory_db.audit_logs.docs] == ["b"]
+    assert isinstance(memory_db.audit_logs.docs[0]["_id"], ObjectId)
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_dropped_unless_policy_is_spill(tmp_path):
+    """Test a configured spill path alone does not make failed writes spill."""
+    spill_path = tmp_path / "audit.jsonl"
+    sink = AuditSink(overflow="drop", spill_path=str(spill_path))
+    sink._collection = PartlyFailingCollection(failed_index=0, code=121)
+
+    await sink._write([{"id": "a"}, {"id": "b"}])
+
+    assert sink.dropped == 1 and sink.spilled == 0 and not spill_path.exists()
@@ -0,0 +1,100 @@
+from datetime import datetime
+import pytest
+from app.core.security import get_password_hash
+from app.services import auth_service
+from app.services.auth_service import AuthService, generate_api_key, parse_key_id
+from app.models.auth import APIKeyCreate
+
+
+@pytest.fixture(autouse=True)
+def clear_key_cache():
+    caches = (auth_service._verified_keys, auth_service._rejected_legacy_keys, auth_service._legacy_scans)
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
+def test_generated_keys_embed_a_parseable_key_id():
+    """Test new keys carry their lookup id."""
+    key_id, raw_key = generate_api_key()
+    assert raw_key.startswith(f"rcs_{key_id}_")
+    assert parse_key_id(raw_key) == key_id
+    assert parse_key_id("rcs_" + "a" * 43) is None
+    assert parse_key_id("not-a-key") is None
+
+
+@pytest.mark.asyncio
+async def test_verify_api_key_uses_indexed_lookup(memory_db, record_calls):
+    """Test new keys verify without scanning the collection."""
+    scans = record_calls(memory_db.api_keys, "find")
+    service = AuthService(memory_db)
+    created = await service.create_api_key(APIKeyCreate(userId="alice"))
+
+    verified = await service.verify_api_key(created.key)
+
+    assert verified.userId == "alice"
+    assert scans == []
+    assert await service.verify_api_key(created.key + "x") is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_key_is_migrated_to_digest_lookup(memory_db, record_calls):
+    """Test legacy keys are scanned once, then found by digest."""
+    raw_key = "rcs_" + "b" * 43
+    await memory_db.api_keys.insert_one({
+        "id": "legacy-1",
+        "key": get_password_hash(raw_key),
+        "userId": "bob",
+        "createdAt": datetime.utcnow(),
+        "isActive": True,
+    })
+    scans = record_calls(memory_db.api_keys, "find")
+    service = AuthService(memory_db)
+
+    assert (await service.verify_api_key(raw_key)).userId == "bob"
+    assert (await memory_db.api_keys.find_one({"id": "legacy-1"}))["lookupDigest"]
+    assert len(scans) == 1
+
+    auth_service._verified_keys.clear()
+    assert (await service.verify_api_key(raw_key)).userId == "bob"
+    assert len(scans) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_legacy_key_is_scanned_once_and_scans_are_limited_per_client(
+    monkeypatch, memory_db, record_calls
+):
+    """Test failed legacy scans are cached and each client gets a bounded number of scans."""
+    monkeypatch.setattr(auth_service.settings, "LEGACY_KEY_SCANS_PER_MINUTE", 2)
+    await memory_db.api_keys.insert_one({
+        "id": "legacy-1", "key": get_password_hash("rcs_" + "b" * 43), "userId": "bob",
+        "createdAt": datetime.utcnow(), "isActive": True,
+    })
+    scans = record_calls(memory_db.api_keys, "find")
+    service = AuthService(memory_db)
+
+    assert await service.verify_api_key("rcs_" + "x" * 43, "10.0.0.1") is None
+    assert await service.verify_api_key("rcs_" + "x" * 43, "10.0.0.1") is None
+    assert len(scans) == 1
+
+    assert await service.verify_api_key("rcs_" + "y" * 43, "10.0.0.1") is None
+    assert await service.verify_api_key("rcs_" + "z" * 43, "10.0.0.1") is None
+    assert len(scans) == 2
+
+    # Another client still has its own budget
+    assert (await service.verify_api_key("rcs_" + "b" * 43, "10.0.0.2")).userId == "bob"
+
+
+@pytest.mark.asyncio
+async def test_deactivated_key_stops_working_despite_cache(memory_db):
+    """Test a key revoked in the database is rejected even while it is cached."""
+    service = AuthService(memory_db)
+    created = await service.create_api_key(APIKeyCreate(userId="alice"))
+    assert await service.verify_api_key(created.key) is not None
+
+    await memory_db.api_keys.update_one({"id": created.id}, {"$set": {"isActive": False}})
+
+    assert await service.verify_api_key(created.key) is None
+    assert len(auth_service._verified_keys) == 0
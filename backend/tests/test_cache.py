@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+import httpx
+import pytest
+from fastapi import FastAPI
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from app.api.routes import workflows
+from app.core.cache import CachedResponse, TTLCache, conditional_response, make_etag
+from app.core.database import get_database
+from app.models.workflow import WorkflowSummary
+
+
+def _request(headers: dict) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the cache stays within maxsize."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """Test entries disappear after their TTL."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_coalesces_concurrent_misses():
+    """Test concurrent misses for one key trigger a single load."""
+    cache = TTLCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*[cache.get_or_load("k", loader) for _ in range(5)])
+
+    assert results == ["value"] * 5
+    assert calls == 1
+
+
+def test_conditional_response_returns_304_on_matching_etag():
+    """Test If-None-Match short-circuits to 304."""
+    body = b'[{"id": "1"}]'
+    cached = CachedResponse(body=body, etag=make_etag(body))
+
+    fresh = conditional_response(_request({}), cached)
+    assert fresh.status_code == 200
+    assert fresh.body == body
+    assert fresh.headers["etag"] == cached.etag
+
+    not_modified = conditional_response(_request({"If-None-Match": cached.etag}), cached)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+    stale = conditional_response(_request({"If-None-Match": '"other"'}), cached)
+    assert stale.status_code == 200
+
+
+class FakeGenerationRedis:
+    def __init__(self, generation=None, error=None):
+        self.generation = generation
+        self.error = error
+
+    async def get(self, key):
+        if self.error:
+            raise self.error
+        return self.generation
+
+
+@pytest.mark.asyncio
+async def test_workflow_cache_is_bypassed_without_a_readable_generation(monkeypatch):
+    """Test replicas read the database while Redis cannot tell them about writes elsewhere."""
+    workflows.workflow_cache.clear()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return CachedResponse(body=b"[]", etag=make_etag(b"[]"))
+
+    monkeypatch.setattr(workflows.redis_manager, "client", FakeGenerationRedis(error=RedisError("down")))
+    await workflows._load_cached(("list",), load)
+    await workflows._load_cached(("list",), load)
+    assert len(loads) == 2 and len(workflows.workflow_cache) == 0
+
+    monkeypatch.setattr(workflows.redis_manager, "client", FakeGenerationRedis(b"7"))
+    await workflows._load_cached(("list",), load)
+    await workflows._load_cached(("list",), load)
+    assert len(loads) == 3
+    workflows.workflow_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_workflow_list_is_unbounded_by_default_and_documents_summaries(memory_db):
+    """Test the list returns every workflow without a limit, and summary entries match their model."""
+    for i in range(3):
+        await memory_db.workflows.insert_one(
+            {"id": f"w{i}", "name": f"wf{i}", "nodes": [], "edges": [], "createdAt": datetime(2024, 1, i + 1),
+             "updatedAt": datetime(2024, 1, i + 1)}
+        )
+    app = FastAPI()
+    app.include_router(workflows.router, prefix="/api")
+    app.dependency_overrides[get_database] = lambda: memory_db
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        full = await client.get("/api/workflows")
+        page = await client.get("/api/workflows", params={"skip": 1, "limit": 1})
+        summaries = await client.get("/api/workflows", params={"summary": "true"})
+
+    assert [w["id"] for w in full.json()] == ["w0", "w1", "w2"]
+    assert [w["id"] for w in page.json()] == ["w1"]
+    assert set(summaries.json()[0]) == set(WorkflowSummary.model_fields)
+
+    schema = app.openapi()["paths"]["/api/workflows"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert "WorkflowSummary" in str(schema)
@@ -0,0 +1,84 @@
+import io
+import json
+import logging
+import queue
+import sys
+import pytest
+import structlog
+from app.core import logging as logging_module
+from app.core.logging import EventSampler, NonBlockingQueueHandler, get_logger, setup_logging, shutdown_logging
+from app.core.metrics import LOG_EVENTS_DROPPED
+
+
+def _dropped(reason):
+    return LOG_EVENTS_DROPPED.labels(reason=reason)._value.get()
+
+
+class NamedLogger:
+    name = "app.workers.run_executor"
+
+
+def test_sampler_drops_share_of_debug_events(monkeypatch):
+    """Test sampled-out events are dropped and counted; other levels pass."""
+    sampler = EventSampler({"debug": 0.25})
+    monkeypatch.setattr(logging_module.random, "random", lambda: 0.5)
+    before = _dropped("sampled")
+
+    with pytest.raises(structlog.DropEvent):
+        sampler(NamedLogger(), "debug", {"event": "line"})
+    assert sampler(NamedLogger(), "info", {"event": "line"}) == {"event": "line"}
+    assert _dropped("sampled") == before + 1
+
+
+def test_rate_limit_caps_repeats_per_event_and_second(monkeypatch):
+    """Test one event is let through rate_limit times per second, other events independently."""
+    sampler = EventSampler({}, rate_limit=2, limited_levels=["debug"])
+    now = [100.0]
+    monkeypatch.setattr(logging_module.time, "monotonic", lambda: now[0])
+    before = _dropped("rate_limited")
+
+    for _ in range(2):
+        sampler(NamedLogger(), "debug", {"event": "Nmap output"})
+    with pytest.raises(structlog.DropEvent):
+        sampler(NamedLogger(), "debug", {"event": "Nmap output"})
+    sampler(NamedLogger(), "debug", {"event": "Other event"})
+    sampler(NamedLogger(), "warning", {"event": "Nmap output"})
+    now[0] = 101.0
+    sampler(NamedLogger(), "debug", {"event": "Nmap output"})
+
+    assert _dropped("rate_limited") == before + 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test a full writer queue never blocks the caller and counts the drop."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("lib", logging.INFO, __file__, 1, "line %s", ("one",), None)
+    before = _dropped("queue_full")
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.queue.qsize() == 1 and _dropped("queue_full") == before + 1
+    assert handler.queue.get().msg == "line one"
+
+
+def test_queued_mode_renders_json_on_writer_thread(monkeypatch):
+    """Test structlog and stdlib events both come out as JSON once the writer drains."""
+    stdout = io.StringIO()
+    monkeypatch.setattr(logging_module.settings, "LOG_QUEUE_ENABLED", True)
+    monkeypatch.setattr(logging_module.settings, "LOG_FORMAT", "json")
+    try:
+        setup_logging(stdout)
+        # A repeated call (app.main does one on import) keeps writing to the chosen stream
+        setup_logging()
+        get_logger("test.queued").warning("Scan finished", target="10.0.0.1")
+        logging.getLogger("test.stdlib").warning("plain %s", "record")
+        shutdown_logging()
+    finally:
+        monkeypatch.undo()
+        setup_logging(sys.stdout)
+
+    lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert {"event": "Scan finished", "target": "10.0.0.1"}.items() <= lines[0].items()
+    assert lines[1]["event"] == "plain record" and lines[1]["logger"] == "test.stdlib"
+    assert all(line["timestamp"].endswith("Z") for line in lines)
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from app.core.responses import FastJSONResponse, StreamingAwareGZipMiddleware, dumps, from_documents
+from app.models.target import Target
+from app.models.workflow import Workflow
+
+
+def test_from_documents_skips_mongo_id_and_fills_defaults():
+    """Test trusted documents render like validated models."""
+    created = datetime(2024, 1, 2, 3, 4, 5, 6)
+    docs = [{"_id": ObjectId(), "id": "t1", "value": "10.0.0.1", "createdAt": created}]
+
+    rendered = json.loads(dumps(from_documents(Target, docs)))
+
+    assert rendered == [json.loads(Target(**docs[0]).model_dump_json())]
+    assert rendered[0]["tags"] == []
+    assert rendered[0]["createdAt"] == created.isoformat()
+
+
+def test_fast_json_response_renders_object_ids():
+    """Test ObjectId values are rendered as strings."""
+    oid = ObjectId()
+    response = FastJSONResponse(content={"_id": oid})
+    assert json.loads(response.body) == {"_id": str(oid)}
+
+
+def test_dumps_rejects_unknown_types():
+    """Test unsupported values raise instead of being stringified."""
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_legacy_workflow_nodes_render_declared_fields():
+    """Test nodes stored before timeoutSeconds existed still render it."""
+    node = {"id": "n1", "kind": "nmap", "label": "Scan", "category": "recon", "position": {"x": 0, "y": 0}}
+    doc = {"id": "w1", "name": "Legacy", "nodes": [node], "edges": []}
+
+    rendered = json.loads(dumps(from_documents(Workflow, [doc])))
+
+    assert rendered[0]["nodes"][0]["timeoutSeconds"] is None
+    assert rendered[0]["nodes"][0]["config"] == {}
+
+
+def _gzip_app():
+    app = FastAPI()
+
+    @app.get("/json")
+    async def large_json():
+        return FastJSONResponse(content={"data": "x" * 4096})
+
+    @app.get("/stream")
+    async def progress():
+        async def lines():
+            for i in range(3):
+                yield dumps({"chunk": i, "padding": "x" * 1024}) + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app.add_middleware(
+        StreamingAwareGZipMiddleware, minimum_size=100, compresslevel=5, excluded_media_types=["application/x-ndjson"]
+    )
+    return app
+
+
+@pytest.mark.asyncio
+async def test_gzip_skips_ndjson_progress_streams():
+    """Test JSON is compressed while NDJSON streams go out line by line uncompressed."""
+    transport = httpx.ASGITransport(app=_gzip_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        compressed = await client.get("/json", headers={"Accept-Encoding": "gzip"})
+        stream = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == {"data": "x" * 4096}
+    assert "content-encoding" not in stream.headers
+    assert [json.loads(line)["chunk"] for line in stream.text.splitlines()] == [0, 1, 2]
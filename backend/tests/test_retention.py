@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api.routes import runs as runs_module
+from app.core.config import settings
+from app.core.database import get_database
+from app.services import run_service as run_service_module
+from app.services.retention import (
+    DiskArchiveStore, RetentionPolicy, RetentionService, compact_run, compress, decompress,
+    policy_for, retention_schedule
+)
+
+
+def test_most_specific_policy_wins():
+    """Test workflow+status beats workflow beats status beats default."""
+    policies = [
+        RetentionPolicy(1, 10, workflow_id="wf", status="failed"),
+        RetentionPolicy(2, 20, workflow_id="wf"),
+        RetentionPolicy(3, 30, status="failed"),
+        RetentionPolicy(7, 90),
+    ]
+
+    assert policy_for("wf", "failed", policies).hot_days == 1
+    assert policy_for("wf", "succeeded", policies).hot_days == 2
+    assert policy_for("other", "failed", policies).hot_days == 3
+    assert policy_for("other", "succeeded", policies).hot_days == 7
+
+
+def test_retention_schedule_keeps_forever_when_cold_days_is_zero(monkeypatch):
+    """Test a zero cold window leaves expireAt unset."""
+    monkeypatch.setattr(settings, "RETENTION_ENABLED", True)
+    ended = datetime(2024, 1, 1)
+    schedule = retention_schedule("wf", "succeeded", ended, [RetentionPolicy(7, 0)])
+
+    assert schedule == {"compactAfter": ended + timedelta(days=7), "expireAt": None}
+
+
+def test_compact_run_drops_logs_and_raw_output():
+    """Test compaction keeps findings identity and summary but not raw output."""
+    run = {
+        "id": "r1",
+        "error": "Traceback (most recent call last):\n  ...\nRuntimeError: boom\n",
+        "steps": [{
+            "nodeId": "n1",
+            "logs": ["line"] * 100,
+            "findings": [{"id": "f1", "severity": "high", "title": "Open port", "port": 22,
+                          "metadata": {"output": "x" * 10000}}],
+        }],
+    }
+    compacted = compact_run(run)
+    finding = compacted["steps"][0]["findings"][0]
+
+    assert compacted["steps"][0]["logs"] == []
+    assert finding["metadata"] == {} and len(finding["fingerprint"]) == 32
+    assert compacted["summary"]["severities"]["high"] == 1
+    assert compacted["error"] == "RuntimeError: boom"
+
+
+def test_compress_round_trip():
+    """Test archives decompress with the codec they were written with."""
+    data = b'{"logs": "' + b"nmap output " * 1000 + b'"}'
+    blob, codec = compress(data)
+
+    assert codec in ("zstd", "gzip") and len(blob) < len(data)
+    assert decompress(blob, codec) == data
+
+
+@pytest.mark.asyncio
+async def test_compact_archives_to_disk_and_purges_expired(tmp_path, monkeypatch, memory_db):
+    """Test a compacted run can be read back and its archive is purged after expiry."""
+    monkeypatch.setattr(settings, "RETENTION_COMPRESSION", "gzip")
+    service = RetentionService()
+    service.db = memory_db
+    service.store = DiskArchiveStore(str(tmp_path))
+
+    now = datetime(2024, 3, 1)
+    run = {"id": "r1", "expireAt": datetime(2024, 6, 1), "steps": [{"nodeId": "n1", "logs": ["a", "b"]}]}
+    await memory_db.runs.insert_one(dict(run))
+    await service.compact(run, now)
+
+    compacted = await memory_db.runs.find_one({"id": "r1"})
+    assert compacted["steps"][0]["logs"] == [] and compacted["compactedAt"] == now
+    assert (await service.load_archive(compacted))["steps"][0]["logs"] == ["a", "b"]
+
+    assert await service.store.purge(datetime(2024, 6, 1)) == 0
+    assert await service.store.purge(datetime(2024, 6, 2)) == 1
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_get_run_reads_compacted_steps_from_archive(tmp_path, monkeypatch, memory_db):
+    """Test the run endpoint serves archived logs for a compacted run, even with the sweep stopped."""
+    monkeypatch.setattr(settings, "RETENTION_COMPRESSION", "gzip")
+    monkeypatch.setattr(settings, "RETENTION_ARCHIVE_DIR", str(tmp_path))
+    service = RetentionService()
+    service.store = DiskArchiveStore(str(tmp_path))
+    service.db = memory_db
+    run = {
+        "id": "r1", "workflowId": "wf", "workflowName": "Recon", "status": "failed", "error": "Traceback\nboom",
+        "steps": [{"nodeId": "n1", "name": "Nmap", "status": "failed", "logs": ["a", "b"]}],
+    }
+    await memory_db.runs.insert_one(dict(run))
+    await service.compact(run, datetime(2024, 3, 1))
+    monkeypatch.setattr(run_service_module, "retention_service", RetentionService())
+
+    app = FastAPI()
+    app.include_router(runs_module.router, prefix="/api")
+    app.dependency_overrides[get_database] = lambda: memory_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/runs/r1")
+        missing = await client.get("/api/runs/nope")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["steps"][0]["logs"] == ["a", "b"] and body["error"] == "Traceback\nboom"
+    assert body["archive"]["backend"] == "disk"
+    assert missing.status_code == 404
+
+
+def test_retention_schedule_stamps_nothing_while_disabled(monkeypatch):
+    """Test runs finishing with retention off are kept."""
+    monkeypatch.setattr(settings, "RETENTION_ENABLED", False)
+
+    assert retention_schedule("wf", "succeeded", datetime(2024, 1, 1), [RetentionPolicy(7, 90)]) == {}
+
+
+@pytest.mark.asyncio
+async def test_compact_due_drains_backlog_in_one_sweep(tmp_path, memory_db, record_calls):
+    """Test a sweep keeps compacting while batches come back full."""
+    service = RetentionService(batch_size=2)
+    service.db = memory_db
+    service.store = DiskArchiveStore(str(tmp_path))
+    await memory_db.runs.insert_many([
+        {"id": f"r{i}", "compactAfter": datetime(2024, 2, 1) + timedelta(hours=i), "steps": []} for i in range(5)
+    ])
+    queries = record_calls(memory_db.runs, "find")
+
+    assert await service.compact_due(datetime(2024, 3, 1)) == 5
+    assert await memory_db.runs.count_documents({"compactedAt": {"$exists": False}}) == 0
+    assert len(queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_backfill_unless_opted_in(monkeypatch, tmp_path, memory_db):
+    """Test existing history is not scheduled (and so not deleted) without RETENTION_BACKFILL."""
+    monkeypatch.setattr(settings, "RETENTION_BACKFILL", False)
+    service = RetentionService()
+    service.db = memory_db
+    service.store = DiskArchiveStore(str(tmp_path))
+    service.schedule_unstamped = None  # would fail if called
+
+    assert (await service.run_once(datetime(2024, 3, 1)))["scheduled"] == 0
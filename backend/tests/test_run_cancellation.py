@@ -0,0 +1,56 @@
+import asyncio
+import os
+import time
+import pytest
+from app.workers import run_executor
+
+
+def _alive(pid):
+    """Running and not a zombie awaiting reaping."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+@pytest.mark.asyncio
+async def test_timeout_kills_whole_process_group():
+    """Test a timed-out command and the children it spawned are killed promptly."""
+    stdout, stderr = bytearray(), bytearray()
+    started = time.monotonic()
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.5):
+            await run_executor._run_process(
+                ["sh", "-c", "sleep 30 & echo child=$!; sleep 30"], stdout, stderr
+            )
+
+    assert time.monotonic() - started < 5
+    child = int(stdout.decode().strip().split("=")[1])
+    await asyncio.sleep(0.1)
+    assert not _alive(child)
+
+
+def test_step_timeout_prefers_node_setting(monkeypatch):
+    """Test node timeoutSeconds overrides config and the global default."""
+    monkeypatch.setattr(run_executor.settings, "STEP_TIMEOUT_SECONDS", 0)
+
+    assert run_executor._step_timeout({"timeoutSeconds": 30, "config": {"timeoutSeconds": 5}}) == 30
+    assert run_executor._step_timeout({"config": {"timeoutSeconds": 5}}) == 5
+    assert run_executor._step_timeout({"config": {}}) is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_local_run_cancels_registered_task():
+    """Test an executor task in this process is cancelled directly."""
+    task = asyncio.create_task(asyncio.sleep(30))
+    run_executor.active_runs["r1"] = task
+    try:
+        assert run_executor.cancel_local_run("r1")
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not run_executor.cancel_local_run("missing")
+    finally:
+        run_executor.active_runs.pop("r1", None)
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+import pytest
+from app.services import run_reaper as reaper_module
+from app.services.run_reaper import RunReaper
+from app.workers import run_executor
+
+
+class FakeStream:
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self, n=-1):
+        data, self.data = self.data, b""
+        return data
+
+
+class FakeProcess:
+    def __init__(self):
+        self.stdout = FakeStream(b"22/tcp open ssh")
+        self.stderr = FakeStream(b"")
+        self.returncode = 0
+
+    async def wait(self):
+        return 0
+
+
+def _patch(monkeypatch, db):
+    scanned = []
+
+    async def fake_exec(*cmd, **kwargs):
+        scanned.append(cmd[-1])
+        return FakeProcess()
+
+    async def get_db():
+        return db
+
+    monkeypatch.setattr(run_executor, "get_database", get_db)
+    monkeypatch.setattr(run_executor.asyncio, "create_subprocess_exec", fake_exec)
+    return scanned
+
+
+WORKFLOW = {"id": "wf", "nodes": [{"id": "n1", "kind": "nmap"}, {"id": "n2", "kind": "nmap"}]}
+
+
+@pytest.mark.asyncio
+async def test_resumed_run_skips_completed_steps_and_targets(monkeypatch, memory_db):
+    """Test a resumed run only scans what the previous attempt did not finish."""
+    await memory_db.runs.insert_one({
+        "id": "r1",
+        "status": "running",
+        "attempts": 1,
+        "leaseOwner": "dead-worker",
+        "leaseExpiresAt": datetime.utcnow() - timedelta(seconds=1),
+        "steps": [
+            {"nodeId": "n1", "status": "succeeded"},
+            {"nodeId": "n2", "status": "running", "completedTargets": ["10.0.0.1"], "timings": {
+                "wallSeconds": 4.0, "units": 1, "totalSeconds": {"runtime": 3.0}, "maxSeconds": {"runtime": 3.0},
+                "cpuSeconds": 0.5, "maxRssKb": 2048, "slowestTargets": [{"target": "10.0.0.1", "runtime": 3.0}],
+            }},
+        ],
+    })
+    scanned = _patch(monkeypatch, memory_db)
+
+    await run_executor.execute_run_async("r1", WORKFLOW, ["10.0.0.1", "10.0.0.2"], "live")
+
+    assert scanned == ["10.0.0.2"]
+    run = await memory_db.runs.find_one({"id": "r1"})
+    assert run["steps"][1]["completedTargets"] == ["10.0.0.1", "10.0.0.2"]
+    # The resumed attempt adds to the first attempt's timings instead of replacing them
+    timings = run["steps"][1]["timings"]
+    assert timings["units"] == 2 and timings["wallSeconds"] >= 4.0 and timings["maxRssKb"] >= 2048
+    assert [t["target"] for t in timings["slowestTargets"]] == ["10.0.0.1", "10.0.0.2"]
+    assert run["status"] == "succeeded" and "leaseOwner" not in run
+    assert run["attempts"] == 2 and "resumedAt" in run and "startedAt" not in run
+
+
+@pytest.mark.asyncio
+async def test_run_leased_elsewhere_is_not_executed(monkeypatch, memory_db):
+    """Test a live lease held by another worker prevents double execution."""
+    leased = {
+        "id": "r1",
+        "status": "running",
+        "leaseOwner": "other-worker",
+        "leaseExpiresAt": datetime.utcnow() + timedelta(seconds=60),
+        "steps": [],
+    }
+    await memory_db.runs.insert_one(dict(leased))
+    scanned = _patch(monkeypatch, memory_db)
+
+    await run_executor.execute_run_async("r1", WORKFLOW, ["10.0.0.1"], "live")
+
+    assert scanned == []
+    assert await memory_db.runs.find_one({"id": "r1"}, {"_id": 0}) == leased
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_expired_runs_and_fails_exhausted_ones(monkeypatch, memory_db):
+    """Test expired leases are resumed until max attempts, then failed."""
+    resumed = []
+
+    class FakeScheduler:
+        def submit(self, run):
+            resumed.append(run.run_id)
+
+    monkeypatch.setattr(reaper_module, "run_scheduler", FakeScheduler())
+    expired = {
+        "status": "running",
+        "leaseExpiresAt": datetime.utcnow() - timedelta(seconds=1),
+        "workflowSnapshot": WORKFLOW,
+    }
+    await memory_db.runs.insert_many([
+        {"id": "fresh", "attempts": 1, "targets": ["10.0.0.1"], **expired},
+        {"id": "exhausted", "attempts": 3, **expired},
+    ])
+    reaper = RunReaper(max_attempts=3)
+    reaper.db = memory_db
+
+    result = await reaper.reap_once()
+
+    assert result == {"requeued": 1, "failed": 1}
+    assert resumed == ["fresh"]
+    assert (await memory_db.runs.find_one({"id": "fresh"}))["status"] == "running"
+    exhausted = await memory_db.runs.find_one({"id": "exhausted"})
+    assert exhausted["status"] == "failed" and "leaseExpiresAt" not in exhausted
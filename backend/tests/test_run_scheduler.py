@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from app.models.run import RunPriority
+from app.services import run_scheduler as scheduler_module
+from app.services.run_scheduler import QueuedRun, RunScheduler, classify
+
+
+def _run(run_id, user="u1", priority=RunPriority.BULK, cost=1):
+    return QueuedRun(run_id=run_id, user_id=user, priority=priority, cost=cost,
+                     workflow_doc={}, targets=[], run_mode="demo")
+
+
+def _drain(scheduler):
+    order = []
+    while (run := scheduler._next()) is not None:
+        order.append(run.run_id)
+    return order
+
+
+def _fill(scheduler, runs):
+    for run in runs:
+        scheduler.queues[run.priority].push(run)
+
+
+def test_users_are_interleaved_within_a_class():
+    """Test one user's backlog does not starve another user's single run."""
+    scheduler = RunScheduler(quantum=1)
+    _fill(scheduler, [_run(f"a{i}", "alice") for i in range(5)] + [_run("b0", "bob")])
+
+    assert _drain(scheduler)[:3] == ["a0", "b0", "a1"]
+
+
+def test_costly_runs_consume_more_of_a_users_share():
+    """Test DRR charges by cost, so big runs yield to many small ones."""
+    scheduler = RunScheduler(quantum=1)
+    _fill(scheduler, [_run("big", "alice", cost=4)] + [_run(f"b{i}", "bob") for i in range(4)])
+
+    assert _drain(scheduler) == ["b0", "b1", "b2", "big", "b3"]
+
+
+def test_interactive_runs_take_most_slots_without_starving_bulk():
+    """Test weighted class selection interleaves classes by weight."""
+    scheduler = RunScheduler(weights={"interactive": 3, "scheduled": 1, "bulk": 1})
+    _fill(scheduler, [_run(f"bulk{i}") for i in range(3)])
+    _fill(scheduler, [_run(f"int{i}", priority=RunPriority.INTERACTIVE) for i in range(6)])
+
+    order = _drain(scheduler)
+    assert order[:5] == ["int0", "int1", "bulk0", "int2", "int3"]
+    assert sorted(order) == sorted([f"bulk{i}" for i in range(3)] + [f"int{i}" for i in range(6)])
+
+
+def test_classify_small_explicit_runs_as_interactive():
+    """Test run size picks the default priority class."""
+    assert classify(["10.0.0.1"]) == RunPriority.INTERACTIVE
+    assert classify(["10.0.0.0/24"]) == RunPriority.BULK
+    assert classify(["10.0.0.1"], selector=object()) == RunPriority.BULK
+    assert classify(["10.0.0.0/24"], requested=RunPriority.SCHEDULED) == RunPriority.SCHEDULED
+
+
+@pytest.mark.asyncio
+async def test_submit_respects_capacity_and_discard(monkeypatch):
+    """Test at most max_concurrent runs execute and cancelled queued runs never start."""
+    started, release = [], asyncio.Event()
+
+    async def fake_execute(run_id, *args):
+        started.append(run_id)
+        await release.wait()
+
+    monkeypatch.setattr(scheduler_module, "execute_run_async", fake_execute)
+    scheduler = RunScheduler(max_concurrent=2)
+    for i in range(4):
+        scheduler.submit(_run(f"r{i}"))
+    await asyncio.sleep(0)
+
+    assert started == ["r0", "r1"] and scheduler.queued() == 2
+    assert scheduler.discard("r2")
+
+    release.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert started == ["r0", "r1", "r3"] and scheduler.running == 0
@@ -0,0 +1,63 @@
+import pytest
+from app.services import scan_rate_limiter as limiter_module
+from app.services.scan_rate_limiter import Bucket, ScanRateLimiter, _LocalBuckets
+
+
+def test_buckets_by_network_and_host():
+    """Test units map to their enclosing network bucket, plus a host bucket for single hosts."""
+    limiter = ScanRateLimiter(ipv4_prefix=24, network_burst=256)
+
+    host = limiter.buckets("10.0.0.7")
+    assert [b.key.split(":", 2)[2] for b in host] == ["net:10.0.0.0/24", "host:10.0.0.7"]
+
+    subnet = limiter.buckets("10.0.0.16/28")
+    assert [(b.key.split(":", 2)[2], b.cost) for b in subnet] == [("net:10.0.0.0/24", 16)]
+
+    # Units wider than the prefix draw from the same buckets as the smaller units inside them
+    wide = limiter.buckets("10.0.0.0/22")
+    assert [(b.key.split(":", 2)[2], b.cost) for b in wide] == [
+        ("net:10.0.0.0/24", 256), ("net:10.0.1.0/24", 256), ("net:10.0.2.0/24", 256), ("net:10.0.3.0/24", 256)
+    ]
+    # No bucket is charged more than its burst
+    capped = ScanRateLimiter(ipv4_prefix=24, network_burst=64).buckets("10.0.0.0/23")
+    assert [b.cost for b in capped] == [64, 64]
+
+    assert [b.key.split(":", 2)[2] for b in limiter.buckets("Example.COM.")] == ["host:example.com"]
+
+
+def test_local_buckets_take_all_or_nothing(monkeypatch):
+    """Test a unit is admitted only when every bucket has tokens, and none are spent otherwise."""
+    now = [100.0]
+    monkeypatch.setattr(limiter_module.time, "monotonic", lambda: now[0])
+    local = _LocalBuckets()
+    net = Bucket("net", rate=10, burst=10, cost=4)
+    host = Bucket("host", rate=1, burst=1, cost=1)
+
+    assert local.take([net, host]) == 0
+    # Host is empty: wait for it, without drawing from the network bucket
+    assert local.take([net, host]) == pytest.approx(1.0)
+    assert local.take([net]) == 0
+    assert local.take([net]) == pytest.approx(0.2)
+
+    now[0] += 1.0
+    assert local.take([net, host]) == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_tokens_without_redis(monkeypatch):
+    """Test acquire sleeps until admitted when falling back to in-process buckets."""
+    now = [0.0]
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(limiter_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(limiter_module.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(limiter_module.redis_manager, "client", None)
+    limiter = ScanRateLimiter(host_rate=0.5, host_burst=1)
+
+    assert await limiter.acquire("10.0.0.1") == 0
+    assert await limiter.acquire("10.0.0.1") == pytest.approx(2.0)
+    assert slept == [pytest.approx(2.0)]
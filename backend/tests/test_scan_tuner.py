@@ -0,0 +1,66 @@
+import pytest
+from app.services import scan_tuner as tuner_module
+from app.services.scan_tuner import ScanTuner
+
+
+@pytest.fixture(autouse=True)
+def idle_cpu(monkeypatch):
+    monkeypatch.setattr(tuner_module, "cpu_load", lambda: 0.0)
+
+
+def test_additive_increase_up_to_max():
+    """Test concurrency grows by one per clean round of completions and stops at the cap."""
+    tuner = ScanTuner(initial_concurrency=2, max_concurrency=4)
+
+    for _ in range(2):
+        tuner.record(1.0)
+    assert tuner.concurrency == 3
+
+    for _ in range(20):
+        tuner.record(1.0)
+    assert tuner.concurrency == 4
+
+
+def test_errors_halve_concurrency_and_slow_timing():
+    """Test a burst of failures cuts concurrency multiplicatively and steps timing down."""
+    tuner = ScanTuner(initial_concurrency=8, max_concurrency=8)
+    assert tuner.timing_args()[0] == "-T3"
+
+    for _ in range(4):
+        tuner.record(1.0)
+    tuner.record(1.0, failed=True)
+
+    assert tuner.concurrency == 4 and tuner.decreases == 1
+    assert tuner.last_reason == "errors" and tuner.timing_args()[0] == "-T2"
+
+
+def test_latency_spike_counts_as_congestion():
+    """Test per-address latency well above the best seen triggers a decrease."""
+    tuner = ScanTuner(initial_concurrency=4, max_concurrency=4, latency_factor=2.0)
+    tuner.record(1.0, addresses=1)
+    for _ in range(5):
+        tuner.record(50.0, addresses=1)
+
+    assert tuner.decreases >= 1 and tuner.last_reason == "latency"
+    # Wider units are normalized by their address count
+    assert ScanTuner().record(256.0, addresses=256) is None
+
+
+def test_clean_window_speeds_up_timing():
+    """Test a full window without failures steps nmap timing up."""
+    tuner = ScanTuner(window=5)
+    for _ in range(5):
+        tuner.record(1.0)
+    assert tuner.timing_args()[0] == "-T4"
+    assert tuner.snapshot()["timing"] == "-T4 --max-retries 1"
+
+
+def test_manual_timing_and_fixed_concurrency_are_respected():
+    """Test workflows pinning -T or disabling adaptation are not tuned."""
+    pinned = ScanTuner.for_node({}, ["nmap", "-T5", "-Pn"])
+    assert pinned.timing_args() == []
+
+    fixed = ScanTuner.for_node({"adaptive": False, "concurrency": 3}, ["nmap"])
+    for _ in range(10):
+        fixed.record(1.0, failed=True)
+    assert fixed.concurrency == 3 and fixed.timing_args() == []
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+import pytest
+from pydantic import ValidationError
+from app.models.schedule import ScheduleUpdate
+from app.services import schedule_runner as runner_module
+from app.services.cron import CronExpression
+from app.services.schedule_runner import ScheduleRunner, first_fire, jitter_offset, plan_fire
+
+T0 = datetime(2024, 1, 1, 0, 0)
+
+
+def _schedule(**fields):
+    doc = {"id": "s1", "cron": None, "intervalSeconds": 3600, "createdAt": T0, "catchUp": "once"}
+    doc.update(fields)
+    return doc
+
+
+def test_cron_next_after():
+    """Test steps, ranges, aliases and the day-of-month/day-of-week OR rule."""
+    assert CronExpression.parse("*/15 * * * *").next_after(T0) == T0 + timedelta(minutes=15)
+    assert CronExpression.parse("30 9-17 * * *").next_after(T0) == datetime(2024, 1, 1, 9, 30)
+    assert CronExpression.parse("@monthly").next_after(T0) == datetime(2024, 2, 1)
+    # 2024-01-01 is a Monday: the 15th or any Friday
+    assert CronExpression.parse("0 0 15 * 5").next_after(T0) == datetime(2024, 1, 5)
+    with pytest.raises(ValueError):
+        CronExpression.parse("61 * * * *")
+
+
+def test_jitter_is_stable_and_spreads_schedules():
+    """Test identical schedules get distinct offsets that stay within the window."""
+    offsets = {jitter_offset(_schedule(id=f"s{i}")) for i in range(50)}
+    assert len(offsets) > 40
+    assert all(timedelta(0) <= o <= timedelta(seconds=1800) for o in offsets)
+    assert jitter_offset(_schedule()) == jitter_offset(_schedule())
+    assert jitter_offset(_schedule(jitterSeconds=0)) == timedelta(0)
+
+
+def _due(catch_up, missed_hours):
+    schedule = _schedule(catchUp=catch_up, jitterSeconds=0)
+    schedule.update(first_fire(schedule, T0))
+    return schedule, schedule["nextRunAt"] + timedelta(hours=missed_hours, minutes=30)
+
+
+@pytest.mark.parametrize("catch_up, fire, next_at", [
+    ("skip", False, datetime(2024, 1, 1, 5)),
+    ("once", True, datetime(2024, 1, 1, 5)),
+    ("all", True, datetime(2024, 1, 1, 2)),
+])
+def test_catch_up_policies(catch_up, fire, next_at):
+    """Test missed fires are dropped, coalesced or replayed per policy."""
+    schedule, now = _due(catch_up, 3)
+
+    plan = plan_fire(schedule, now)
+
+    assert plan.fire is fire and plan.missed == 3 and plan.next_run_at == next_at
+
+
+def test_catch_up_all_is_bounded(monkeypatch):
+    """Test the all policy only replays the newest missed fires."""
+    monkeypatch.setattr(runner_module.settings, "SCHEDULE_MAX_CATCH_UP", 2)
+    schedule, now = _due("all", 10)
+
+    assert plan_fire(schedule, now).next_run_at == datetime(2024, 1, 1, 10)
+
+
+@pytest.mark.asyncio
+async def test_tick_respects_concurrency_cap(monkeypatch, memory_db):
+    """Test due schedules beyond the cap are deferred, not claimed."""
+    fired = []
+
+    async def fake_fire(self, schedule, now):
+        fired.append(schedule["id"])
+        return True
+
+    monkeypatch.setattr(ScheduleRunner, "_fire", fake_fire)
+    for i in range(3):
+        doc = _schedule(id=f"s{i}", jitterSeconds=0, enabled=True)
+        doc.update(first_fire(doc, T0))
+        await memory_db.schedules.insert_one(doc)
+    await memory_db.runs.insert_one({"id": "r0", "scheduleId": "s9", "status": "running"})
+    # Runs started by hand store a null scheduleId and do not count towards the cap
+    await memory_db.runs.insert_one({"id": "r1", "scheduleId": None, "status": "running"})
+    runner = ScheduleRunner(max_concurrent=3)
+    runner.db = memory_db
+
+    result = await runner.tick_once(T0 + timedelta(hours=1, minutes=1))
+
+    assert result == {"fired": 2, "skipped": 0, "deferred": 1}
+    assert fired == ["s0", "s1"]
+    assert (await memory_db.schedules.find_one({"id": "s0"}))["nextRunAt"] == T0 + timedelta(hours=2)
+    assert (await memory_db.schedules.find_one({"id": "s2"}))["nextRunAt"] == T0 + timedelta(hours=1)
+
+
+@pytest.mark.parametrize("field", ["enabled", "catchUp"])
+def test_schedule_update_rejects_null(field):
+    """Test null cannot be stored for fields the runner reads as booleans or policies."""
+    with pytest.raises(ValidationError):
+        ScheduleUpdate(**{field: None})
+
+    assert ScheduleUpdate(jitterSeconds=None).dict(exclude_unset=True) == {"jitterSeconds": None}
@@ -0,0 +1,111 @@
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api.routes import runs as runs_module, targets as targets_module
+from app.core.database import get_database
+from app.services import scope_index as scope_module
+from app.services.scope_index import IntervalSet, ScopeIndex, TargetsOutOfScopeError, ensure_in_scope
+
+
+def test_interval_set_merges_overlapping_and_adjacent_ranges():
+    """Test incremental inserts keep intervals merged."""
+    intervals = IntervalSet()
+    intervals.add(10, 19)
+    intervals.add(30, 39)
+    intervals.add(20, 29)
+    intervals.add(50, 60)
+
+    assert (intervals.starts, intervals.ends) == ([10, 50], [39, 60])
+    assert intervals.contains(15, 35)
+    assert not intervals.contains(35, 55)
+    assert not intervals.contains(0, 5)
+
+
+def test_interval_set_build_matches_incremental_adds():
+    """Test bulk build and incremental adds agree."""
+    ranges = [(5, 9), (0, 3), (4, 4), (20, 25), (22, 30)]
+    built = IntervalSet.build(ranges)
+    incremental = IntervalSet()
+    for start, end in ranges:
+        incremental.add(start, end)
+
+    assert (built.starts, built.ends) == (incremental.starts, incremental.ends) == ([0, 20], [9, 30])
+
+
+def test_scope_index_networks_and_hostnames():
+    """Test IPs, CIDRs and hostnames are checked against merged scope."""
+    index = ScopeIndex()
+    index.replace(["10.0.0.0/25", "10.0.0.128/25", "192.168.1.5", "example.com", "*.corp.example", "2001:db8::/32"])
+
+    assert index.contains("10.0.0.200")
+    assert index.contains("10.0.0.0/24")
+    assert not index.contains("10.0.0.0/23")
+    assert index.contains("192.168.1.5")
+    assert not index.contains("192.168.1.6")
+    assert index.contains("Example.com.")
+    assert not index.contains("api.example.com")
+    assert not index.contains("example.org")
+    assert not index.contains("badexample.com")
+    assert index.contains("vpn.eu.corp.example")
+    assert not index.contains("corp.example")
+    assert index.contains("2001:db8::1")
+
+
+@pytest.mark.asyncio
+async def test_scope_index_incremental_changes():
+    """Test adds and removes update the loaded index."""
+    index = ScopeIndex()
+    index.replace(["10.0.0.0/24"])
+    index.loaded_at = 0.0
+
+    await index.apply_changes(added=["10.0.1.0/24", "*.corp.local"])
+    assert index.contains("10.0.0.0/23")
+    assert index.contains("vpn.corp.local")
+
+    await index.apply_changes(removed=["10.0.0.0/24", "*.corp.local"])
+    assert not index.contains("10.0.0.1")
+    assert index.contains("10.0.1.1")
+    assert not index.contains("vpn.corp.local")
+    assert index.out_of_scope(["10.0.1.9", "10.0.0.9"]) == ["10.0.0.9"]
+
+
+@pytest.mark.asyncio
+async def test_ensure_in_scope_checks_demo_runs_and_skips_simulated(monkeypatch):
+    """Test demo runs, which still execute tools, are rejected for out-of-scope targets."""
+    index = ScopeIndex()
+    index.replace(["10.0.0.0/24"])
+    index.loaded_at = time.monotonic()
+    monkeypatch.setattr(scope_module, "scope_index", index)
+    monkeypatch.setattr(scope_module.settings, "SCOPE_ENFORCEMENT", True)
+
+    with pytest.raises(TargetsOutOfScopeError) as excinfo:
+        await ensure_in_scope(None, ["10.0.0.5", "203.0.113.7"], "demo")
+    assert excinfo.value.targets == ["203.0.113.7"]
+
+    await ensure_in_scope(None, ["203.0.113.7"], "simulate")
+
+
+@pytest.mark.asyncio
+async def test_wildcard_target_added_through_api_authorizes_subdomain_runs(monkeypatch, memory_db):
+    """Test a *.hostname target can be stored and puts subdomains, not the domain itself, in scope."""
+    index = ScopeIndex()
+    monkeypatch.setattr(scope_module, "scope_index", index)
+    monkeypatch.setattr(targets_module, "scope_index", index)
+    monkeypatch.setattr(scope_module.settings, "SCOPE_ENFORCEMENT", True)
+    monkeypatch.setattr(runs_module.run_scheduler, "submit", lambda run: None)
+    app = FastAPI()
+    app.include_router(targets_module.router, prefix="/api")
+    app.include_router(runs_module.router, prefix="/api")
+    app.dependency_overrides[get_database] = lambda: memory_db
+    workflow = {"id": "wf", "nodes": [{"id": "n1", "kind": "nmap"}]}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        created = await client.post("/api/targets", json={"value": "*.example.com"})
+        assert created.status_code == 201 and created.json()["value"] == "*.example.com"
+
+        run = await client.post("/api/execute", json={"workflow": workflow, "targets": ["api.example.com"]})
+        assert run.status_code == 201
+
+        rejected = await client.post("/api/execute", json={"workflow": workflow, "targets": ["example.com"]})
+        assert rejected.status_code == 403
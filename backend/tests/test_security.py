@@ -0,0 +1,40 @@
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from app.core import security
+from app.core.security import create_access_token, resolve_principal
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    security._principal_cache.clear()
+    yield
+    security._principal_cache.clear()
+
+
+def test_resolve_principal_caches_verified_tokens(monkeypatch):
+    """Test repeated tokens skip JWT decoding."""
+    token = create_access_token(data={"sub": "alice", "kid": "key-1"})
+    assert resolve_principal(token) == {"user_id": "alice", "key_id": "key-1"}
+
+    def fail(_token):
+        raise AssertionError("token should have been served from cache")
+
+    monkeypatch.setattr(security, "decode_access_token", fail)
+    assert resolve_principal(token)["user_id"] == "alice"
+
+
+def test_resolve_principal_rejects_expired_tokens():
+    """Test expired tokens are never cached or accepted."""
+    token = create_access_token(data={"sub": "alice"}, expires_delta=timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException):
+        resolve_principal(token)
+    assert len(security._principal_cache) == 0
+
+
+def test_token_payload_does_not_carry_raw_api_key():
+    """Test tokens only reference the key id."""
+    token = create_access_token(data={"sub": "alice", "kid": "key-1"})
+    payload = security.decode_access_token(token)
+    assert "api_key" not in payload
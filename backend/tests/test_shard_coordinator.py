@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import subprocess
+import pytest
+from rq.job import JobStatus
+from app.services import shard_coordinator
+from app.services.shard_coordinator import ShardedScan, shard_job_id, shard_key, split_shards
+from app.services.step_timing import StepTimings
+from app.workers import run_executor, shard_jobs
+
+
+class FakeSyncRedis:
+    def __init__(self):
+        self.sets = {}
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+
+class FakeSyncRuns:
+    def __init__(self, doc):
+        self.doc = doc
+        self.updates = []
+
+    def find_one(self, query, projection=None):
+        return self.doc
+
+    def update_one(self, query, update):
+        self.updates.append(update)
+
+
+class FakeSyncDB:
+    def __init__(self, doc):
+        self.runs = FakeSyncRuns(doc)
+
+
+class FakeJob:
+    def __init__(self, retries_left):
+        self.retries_left = retries_left
+
+
+def _patch_job(monkeypatch, doc, job=None, fail=False):
+    conn, db, scanned = FakeSyncRedis(), FakeSyncDB(doc), []
+
+    def fake_run(cmd, **kwargs):
+        if fail:
+            raise OSError("nmap not found")
+        scanned.append(cmd[-1])
+        return subprocess.CompletedProcess(cmd, 0, b"22/tcp open ssh", b"")
+
+    monkeypatch.setattr(shard_jobs, "_db", lambda: db)
+    monkeypatch.setattr(shard_jobs, "get_sync_redis", lambda: conn)
+    monkeypatch.setattr(shard_jobs, "get_current_job", lambda: job)
+    monkeypatch.setattr(shard_jobs.subprocess, "run", fake_run)
+    monkeypatch.setattr(shard_jobs.scan_rate_limiter, "enabled", False)
+    return conn, db, scanned
+
+
+NODE = {"id": "n1", "kind": "nmap", "config": {"args": "-Pn"}}
+
+
+def test_split_shards_keeps_order_and_remainder():
+    """Test units are cut into fixed-size shards with a short last shard."""
+    assert list(split_shards(["a", "b", "c", "d", "e"], 2)) == [["a", "b"], ["c", "d"], ["e"]]
+    # Lazy, so an unbounded plan is never materialized
+    assert next(split_shards(itertools.count(), 2)) == [0, 1]
+    assert shard_job_id("r1", "n1", 3) == "shard:r1:n1:3"
+
+
+def test_shard_job_skips_completed_targets_and_marks_done(monkeypatch):
+    """Test a retried shard only scans unfinished targets and reports completion."""
+    doc = {"status": "running", "steps": [{"nodeId": "n1", "completedTargets": ["10.0.0.1"]}]}
+    conn, db, scanned = _patch_job(monkeypatch, doc)
+
+    shard_jobs.run_scan_shard("r1", NODE, 0, ["10.0.0.1", "10.0.0.2"])
+
+    assert scanned == ["10.0.0.2"]
+    update = db.runs.updates[0]
+    assert update["$addToSet"] == {"steps.$.completedTargets": "10.0.0.2"}
+    assert len(update["$push"]["steps.$.findings"]["$each"]) == 1
+    assert db.runs.updates[-1]["$set"]["steps.$.shardTimings.0"]["units"] == 1
+    assert conn.sets == {f"{shard_key('r1', 'n1')}:done": {0}}
+
+
+def test_shard_job_skips_cancelled_run(monkeypatch):
+    """Test shards of a cancelled run do no work but still report back."""
+    conn, db, scanned = _patch_job(monkeypatch, {"status": "cancelled", "steps": [{"nodeId": "n1"}]})
+
+    shard_jobs.run_scan_shard("r1", NODE, 0, ["10.0.0.1"])
+
+    assert scanned == [] and db.runs.updates == []
+    assert conn.sets == {f"{shard_key('r1', 'n1')}:skipped": {0}}
+
+
+@pytest.mark.parametrize("retries_left, failed", [(2, set()), (0, {1})])
+def test_shard_job_marks_failed_only_when_out_of_retries(monkeypatch, retries_left, failed):
+    """Test a failing shard is reported failed only on its last attempt."""
+    doc = {"status": "running", "steps": [{"nodeId": "n1"}]}
+    conn, _, _ = _patch_job(monkeypatch, doc, job=FakeJob(retries_left), fail=True)
+
+    with pytest.raises(OSError):
+        shard_jobs.run_scan_shard("r1", NODE, 1, ["10.0.0.1"])
+
+    assert conn.sets.get(f"{shard_key('r1', 'n1')}:failed", set()) == failed
+
+
+class FakePipeline:
+    def __init__(self, progress):
+        self.progress = progress
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def smembers(self, key):
+        pass
+
+    async def execute(self):
+        states = self.progress.pop(0) if len(self.progress) > 1 else self.progress[0]
+        # (done, failed) or (done, failed, skipped)
+        return [{str(i).encode() for i in members} for members in (states + ([],))[:3]]
+
+
+class FakeAsyncRedis:
+    def __init__(self, progress):
+        self.progress = progress
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.progress)
+
+
+class FakeRQJob:
+    def __init__(self, status, retries_left=None):
+        self.status = status
+        self.retries_left = retries_left
+
+    def get_status(self, refresh=True):
+        return self.status
+
+
+def _patch_scan(monkeypatch, progress, jobs=None):
+    """Fake Redis progress and RQ; ``jobs`` maps shard index to its RQ job (default: still running)."""
+    conn = FakeSyncRedis()
+    jobs = jobs or {}
+
+    def enqueue_missing(self):
+        self.total = len(self.shards)
+        return self.total
+
+    def fetch_many(job_ids, connection):
+        return [jobs.get(int(job_id.rsplit(":", 1)[1]), FakeRQJob(JobStatus.STARTED)) for job_id in job_ids]
+
+    monkeypatch.setattr(shard_coordinator.redis_manager, "client", FakeAsyncRedis(progress))
+    monkeypatch.setattr(shard_coordinator, "get_sync_redis", lambda: conn)
+    monkeypatch.setattr(shard_coordinator.Job, "fetch_many", fetch_many)
+    monkeypatch.setattr(shard_coordinator.settings, "SHARD_POLL_SECONDS", 0)
+    monkeypatch.setattr(ShardedScan, "_enqueue_missing", enqueue_missing)
+    return conn
+
+
+async def _run(scan: ShardedScan, runs) -> dict:
+    await scan.enqueue()
+    return await scan.gather(runs)
+
+
+@pytest.mark.asyncio
+async def test_sharded_scan_waits_for_all_shards(monkeypatch, memory_db):
+    """Test the coordinator polls until every shard reported and records stats."""
+    _patch_scan(monkeypatch, [([], []), ([0], []), ([0, 1, 2], [])])
+    await memory_db.runs.insert_one({"id": "r1", "steps": [{"nodeId": "n1"}]})
+
+    stats = await _run(ShardedScan("r1", NODE, [["a"], ["b"], ["c"]]), memory_db.runs)
+
+    assert stats == {"total": 3, "done": 3, "failed": 0, "skipped": 0}
+    assert (await memory_db.runs.find_one({"id": "r1"}))["steps"][0]["shards"] == stats
+
+
+@pytest.mark.asyncio
+async def test_sharded_scan_raises_on_failed_shards(monkeypatch, memory_db):
+    """Test a step fails when a shard exhausted its retries."""
+    _patch_scan(monkeypatch, [([0], [1])])
+
+    with pytest.raises(RuntimeError, match="1 of 2 shards failed"):
+        await _run(ShardedScan("r1", NODE, [["a"], ["b"]]), memory_db.runs)
+
+
+@pytest.mark.asyncio
+async def test_sharded_scan_stops_waiting_on_skipped_shards(monkeypatch, memory_db):
+    """Test shards skipped for an inactive run end the wait, without the step succeeding."""
+    _patch_scan(monkeypatch, [([0], [], []), ([0], [], [1])])
+    await memory_db.runs.insert_one({"id": "r1", "steps": [{"nodeId": "n1"}]})
+
+    with pytest.raises(RuntimeError, match="1 of 2 shards skipped"):
+        await _run(ShardedScan("r1", NODE, [["a"], ["b"]]), memory_db.runs)
+
+    shards = (await memory_db.runs.find_one({"id": "r1"}))["steps"][0]["shards"]
+    assert shards == {"total": 2, "done": 1, "failed": 0, "skipped": 1}
+
+
+@pytest.mark.asyncio
+async def test_sharded_scan_fails_shards_whose_job_never_reports(monkeypatch, memory_db):
+    """Test a job killed with its work horse is counted failed instead of polled forever."""
+    conn = _patch_scan(
+        monkeypatch,
+        [([0], [])],
+        jobs={1: FakeRQJob(JobStatus.FAILED, retries_left=0), 2: FakeRQJob(JobStatus.FAILED, retries_left=1)},
+    )
+
+    # Shard 2 failed but RQ will retry it; once it is lost for good the step fails
+    scan = ShardedScan("r1", NODE, [["a"], ["b"], ["c"]])
+    task = asyncio.ensure_future(_run(scan, memory_db.runs))
+    await asyncio.sleep(0.01)
+    assert not task.done()
+
+    monkeypatch.setattr(
+        shard_coordinator.Job, "fetch_many",
+        lambda job_ids, connection: [FakeRQJob(JobStatus.STOPPED) for _ in job_ids]
+    )
+    with pytest.raises(RuntimeError, match="2 of 3 shards failed"):
+        await task
+    assert conn.sets[f"{shard_key('r1', 'n1')}:failed"] == {1, 2}
+
+
+@pytest.mark.asyncio
+async def test_shard_timings_are_folded_into_the_step(memory_db):
+    """Test the executor merges each shard's timings into the step and drops the per-shard copies."""
+    shard = {"wallSeconds": 30.0, "units": 2, "totalSeconds": {"runtime": 4.0}, "maxSeconds": {"runtime": 3.0}}
+    await memory_db.runs.insert_one(
+        {"id": "r1", "steps": [{"nodeId": "n1", "shardTimings": {"0": shard, "1": dict(shard, units=1)}}]}
+    )
+
+    await run_executor._record_shard_timings(memory_db.runs, "r1", "n1", StepTimings("nmap"))
+
+    step = (await memory_db.runs.find_one({"id": "r1"}))["steps"][0]
+    assert step["timings"]["units"] == 3 and step["timings"]["totalSeconds"] == {"runtime": 8.0}
+    assert step["timings"]["wallSeconds"] < 30.0 and "shardTimings" not in step
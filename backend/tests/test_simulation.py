@@ -0,0 +1,131 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api.routes import runs as runs_module
+from app.core.database import get_database
+from app.workers import run_executor
+from app.workers import simulation as simulation_module
+from app.workers.simulation import InvalidSimulationError, SimulationProfile, validate_simulation
+
+
+def test_profile_only_for_simulated_runs_or_nodes():
+    """Test live nodes run for real unless configured to simulate."""
+    node = {"id": "n1", "kind": "nmap", "config": {}}
+
+    assert SimulationProfile.for_node(node, "live") is None
+    assert SimulationProfile.for_node(node, "simulate").tool == "nmap"
+    assert SimulationProfile.for_node({**node, "config": {"simulation": True}}, "live") is not None
+
+
+def test_profile_overrides_settings_then_run_then_node(monkeypatch):
+    """Test node overrides beat run overrides, which beat configured profiles."""
+    monkeypatch.setattr(simulation_module.settings, "SIMULATION_PROFILES", {
+        "default": {"latencyMs": 100, "failureRate": 0.1},
+        "nmap": {"latencyMs": 200},
+    })
+    node = {"id": "n1", "kind": "nmap", "config": {"simulation": {"failureRate": 0.5}}}
+    run_simulation = {"seed": 7, "nmap": {"latencyMs": 300, "outputBytes": 10}}
+
+    profile = SimulationProfile.for_node(node, "simulate", run_simulation)
+
+    assert (profile.latency_ms, profile.output_bytes, profile.failure_rate, profile.seed) == (300, 10, 0.5, 7)
+
+
+@pytest.mark.asyncio
+async def test_seeded_profile_is_deterministic():
+    """Test a seed reproduces outputs and findings per node and target."""
+    profile = SimulationProfile("nmap", latency_ms=1, findings_per_target=3, output_bytes=256, seed=42)
+
+    first = await profile.run("n1", "10.0.0.1")
+    second = await profile.run("n1", "10.0.0.1")
+    other = await profile.run("n1", "10.0.0.2")
+
+    assert first == second and first != other
+    assert len(first.stdout) == 256
+    assert all(f["metadata"]["simulated"] for f in first.findings)
+
+
+@pytest.mark.asyncio
+async def test_failure_and_timeout_injection():
+    """Test injected failures exit non-zero and timeouts hang until cut off."""
+    failing = await SimulationProfile("nmap", latency_ms=1, failure_rate=1.0).run("n1", "10.0.0.1")
+    hanging = SimulationProfile("nmap", timeout_rate=1.0, timeout_seconds=60)
+
+    assert failing.returncode == 1 and failing.findings == []
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(hanging.run("n1", "10.0.0.1"), 0.05)
+
+
+@pytest.mark.asyncio
+async def test_simulated_run_spawns_no_processes(monkeypatch, memory_db):
+    """Test a simulate-mode run records synthetic findings for every node kind."""
+    await memory_db.runs.insert_one({
+        "id": "r1",
+        "status": "queued",
+        "steps": [{"nodeId": "n1", "status": "pending"}, {"nodeId": "n2", "status": "pending"}],
+        "simulation": {"seed": 3, "default": {"latencyMs": 1, "findingsPerTarget": 2}},
+    })
+
+    async def get_db():
+        return memory_db
+
+    async def no_exec(*cmd, **kwargs):
+        raise AssertionError("simulated runs must not start processes")
+
+    monkeypatch.setattr(run_executor, "get_database", get_db)
+    monkeypatch.setattr(run_executor.asyncio, "create_subprocess_exec", no_exec)
+    workflow = {"id": "wf", "nodes": [{"id": "n1", "kind": "nmap"}, {"id": "n2", "kind": "httpProbe"}]}
+
+    await run_executor.execute_run_async("r1", workflow, ["10.0.0.1", "10.0.0.3"], "simulate")
+
+    run = await memory_db.runs.find_one({"id": "r1"})
+    assert [sorted(step["completedTargets"]) for step in run["steps"]] == [["10.0.0.1", "10.0.0.3"]] * 2
+    findings = [f for step in run["steps"] for f in step["findings"]]
+    assert findings and {f["service"] for f in findings} == {"nmap", "httpProbe"}
+    assert [step["timings"]["units"] for step in run["steps"]] == [2, 2]
+    assert run["status"] == "succeeded"
+
+
+@pytest.mark.parametrize("run_simulation, node_simulation", [
+    ({"nmap": {"latencyMs": "fast"}}, None),
+    ({"default": {"failureRate": 1.5}}, None),
+    ({"nmap": {"latencyMs": -1}}, None),
+    ({"nmap": {"latencyMs": None}}, None),
+    ({"seed": "x"}, None),
+    ({"nmap": {"latncyMs": 10}}, None),
+    (None, {"timeoutRate": -0.1}),
+    (None, "yes"),
+])
+def test_malformed_overrides_are_rejected(run_simulation, node_simulation):
+    """Test wrong types, out-of-range rates and unknown keys fail validation."""
+    nodes = [{"id": "n1", "kind": "nmap", "config": {"simulation": node_simulation}}]
+    with pytest.raises(InvalidSimulationError):
+        validate_simulation(run_simulation, nodes)
+
+
+def test_documented_overrides_are_accepted():
+    """Test the override shapes from the API docs pass."""
+    nodes = [{"id": "n1", "config": {"simulation": True}}, {"id": "n2", "config": {"simulation": {"latencyMs": 5}}}]
+    validate_simulation({"seed": 1, "nmap": {"latencyMs": 200, "failureRate": 0.05}}, nodes)
+
+
+@pytest.mark.asyncio
+async def test_execute_rejects_malformed_simulation_with_400(monkeypatch, memory_db):
+    """Test a bad profile is refused when the run is created, not when it executes."""
+    monkeypatch.setattr(runs_module.run_scheduler, "submit", lambda run: None)
+    app = FastAPI()
+    app.include_router(runs_module.router, prefix="/api")
+    app.dependency_overrides[get_database] = lambda: memory_db
+    payload = {
+        "workflow": {"id": "wf", "nodes": [{"id": "n1", "kind": "nmap"}]},
+        "runMode": "simulate",
+        "simulation": {"nmap": {"latencyMs": "fast"}},
+    }
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/execute", json=payload)
+
+    assert response.status_code == 400
+    assert "latencyMs" in response.json()["detail"]
+    assert await memory_db.runs.count_documents({}) == 0
@@ -0,0 +1,87 @@
+import os
+import pytest
+from app.services.step_timing import StepTimings, UnitTiming, container_usage
+from app.workers import run_executor
+
+
+def test_unit_phases_cover_only_reached_marks():
+    """Test phases are spans between marks, skipping marks never reached."""
+    timing = UnitTiming("10.0.0.1", queued_at=0.0, dispatched_at=1.0, admitted_at=1.5, started_at=2.0, exited_at=5.0)
+    timing.parse_seconds = 0.25
+
+    assert timing.phases() == {"queued": 1.0, "admission": 0.5, "spawn": 0.5, "runtime": 3.0, "parse": 0.25}
+
+
+def test_log_write_before_launch_counts_as_persist_not_spawn():
+    """Test bookkeeping between admission and launch is kept out of the spawn phase."""
+    timing = UnitTiming("10.0.0.1", queued_at=0.0, dispatched_at=0.0, admitted_at=1.0, launched_at=1.5,
+                        started_at=1.75, exited_at=2.0)
+    timing.persist_seconds = 0.25
+
+    phases = timing.phases()
+
+    assert phases["spawn"] == 0.25 and phases["persist"] == 0.75
+
+
+def test_merge_adds_earlier_attempts_and_shards():
+    """Test merged snapshots add up, with shard wall time left out of the step's."""
+    earlier = {
+        "wallSeconds": 10.0, "units": 2, "totalSeconds": {"runtime": 6.0}, "maxSeconds": {"runtime": 5.0},
+        "cpuSeconds": 1.0, "maxRssKb": 4000, "slowestTargets": [{"target": "a", "runtime": 5.0}],
+    }
+    shard = {
+        "wallSeconds": 50.0, "units": 1, "totalSeconds": {"runtime": 2.0}, "maxSeconds": {"runtime": 2.0},
+        "cpuSeconds": 0.5, "maxRssKb": 1000, "slowestTargets": [{"target": "b", "runtime": 2.0}],
+    }
+    timings = StepTimings("nmap", keep=1)
+    timings.merge(earlier)
+    timings.merge(shard, wall=False)
+    timings.merge(None)
+
+    snapshot = timings.snapshot()
+
+    assert snapshot["units"] == 3 and snapshot["totalSeconds"] == {"runtime": 8.0}
+    assert snapshot["maxSeconds"] == {"runtime": 5.0} and snapshot["maxRssKb"] == 4000
+    assert snapshot["cpuSeconds"] == 1.5 and 10.0 <= snapshot["wallSeconds"] < 50.0
+    assert [t["target"] for t in snapshot["slowestTargets"]] == ["a"]
+
+
+def test_step_timings_aggregate_and_keep_slowest_targets():
+    """Test totals cover every unit while only the slowest units are stored."""
+    timings = StepTimings("nmap", keep=2)
+    for i, runtime in enumerate([1.0, 5.0, 3.0]):
+        unit = UnitTiming(f"10.0.0.{i}", queued_at=0.0, dispatched_at=0.0, admitted_at=0.0, started_at=0.0)
+        unit.exited_at = runtime
+        unit.record_usage((runtime / 10, 1000 * (i + 1)))
+        timings.record(unit)
+
+    snapshot = timings.snapshot()
+
+    assert snapshot["units"] == 3 and snapshot["totalSeconds"]["runtime"] == 9.0
+    assert snapshot["maxSeconds"]["runtime"] == 5.0 and snapshot["maxRssKb"] == 3000
+    assert [t["target"] for t in snapshot["slowestTargets"]] == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_container_usage_reads_docker_stats():
+    """Test CPU nanoseconds and peak memory bytes are converted, with cgroup v2 fallback."""
+    v1 = {"cpu_stats": {"cpu_usage": {"total_usage": 2_500_000_000}}, "memory_stats": {"max_usage": 2048, "usage": 1024}}
+    v2 = {"cpu_stats": {"cpu_usage": {"total_usage": 0}}, "memory_stats": {"usage": 4096}}
+
+    assert container_usage(v1) == (2.5, 2)
+    assert container_usage(v2) == (0.0, 4)
+    assert container_usage({}) == (None, None)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+@pytest.mark.asyncio
+async def test_run_process_marks_phases_and_samples_usage():
+    """Test a real process gets start, first output and exit marks plus CPU and memory."""
+    timing = UnitTiming("10.0.0.1", queued_at=0.0)
+    stdout, stderr = bytearray(), bytearray()
+
+    returncode = await run_executor._run_process(["sh", "-c", "echo up; sleep 0.2"], stdout, stderr, timing)
+
+    assert returncode == 0 and stdout == b"up\n"
+    assert timing.started_at <= timing.first_output_at <= timing.exited_at
+    assert timing.exited_at - timing.started_at >= 0.2
+    assert timing.cpu_seconds is not None and timing.max_rss_kb
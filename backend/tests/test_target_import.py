@@ -0,0 +1,72 @@
+import pytest
+from fastapi import FastAPI
+from app.api.routes.targets import router
+from app.services.target_import import TargetImportService, iter_lines, parse_rows
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(aiter):
+    return [item async for item in aiter]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_handles_split_lines_and_multibyte_characters():
+    """Test lines and UTF-8 sequences split across chunks are reassembled."""
+    lines = await _collect(iter_lines(_stream(b"10.0.0.1\r\nex", b"ample.com\n\xc3", b"\xa9\nlast")))
+    assert lines == ["10.0.0.1", "example.com", "é", "last"]
+
+
+@pytest.mark.asyncio
+async def test_parse_rows_csv_with_header_and_tags():
+    """Test CSV rows carry per-row and request-level tags."""
+    rows = await _collect(parse_rows(_stream("value,tag", "10.0.0.1,lab,dmz", ""), "csv", ["import"]))
+    assert rows == [("10.0.0.1", ["import", "lab", "dmz"])]
+
+
+@pytest.mark.asyncio
+async def test_import_uses_one_lookup_and_insert_per_chunk(memory_db, record_calls):
+    """Test chunks pre-filter existing values and tolerate duplicate-key races."""
+    targets = memory_db.targets
+    await targets.create_index("value", unique=True)
+    await targets.insert_one({"value": "10.0.0.1"})
+    lookups = record_calls(targets, "find")
+    inserts = record_calls(targets, "insert_many")
+    # Another import inserts 10.0.0.3 between this chunk's lookup and its insert
+    lookup = targets.find
+
+    def find_then_race(query, projection=None):
+        cursor = lookup(query, projection)
+        if "10.0.0.3" in query["value"]["$in"]:
+            targets.docs.append({"value": "10.0.0.3"})
+        return cursor
+
+    targets.find = find_then_race
+    service = TargetImportService(memory_db, chunk_size=3)
+    rows = [(v, []) for v in ["10.0.0.1", "10.0.0.2", "10.0.0.2", "not valid!", "10.0.0.3", "a.com"]]
+    created = []
+
+    progress = await _collect(service.import_rows(rows, created))
+
+    assert [p.chunk for p in progress] == [1, 2, 2]
+    final = progress[-1]
+    assert final.done
+    assert (final.received, final.created, final.duplicates, final.invalid) == (6, 2, 3, 1)
+    assert sorted(doc["value"] for doc in created) == ["10.0.0.2", "a.com"]
+    assert len(lookups) == 2
+    assert len(inserts) == 2
+
+
+def test_import_endpoint_is_documented_as_ndjson():
+    """Test the OpenAPI schema describes the progress stream and the format parameter."""
+    app = FastAPI()
+    app.include_router(router)
+    operation = app.openapi()["paths"]["/targets/import"]["post"]
+
+    content = operation["responses"]["200"]["content"]
+    assert list(content) == ["application/x-ndjson"]
+    assert content["application/x-ndjson"]["schema"]["title"] == "TargetImportProgress"
+    assert "format" in [param["name"] for param in operation["parameters"]]
@@ -0,0 +1,43 @@
+from app.services.target_planner import plan_targets
+
+
+def test_plan_merges_overlapping_and_adjacent_networks():
+    """Test duplicates, contained and adjacent ranges collapse to one network."""
+    plan = plan_targets([
+        "10.0.0.0/25", "10.0.0.128/25", "10.0.0.5", "10.0.0.0/24", "10.0.0.5/32", "2001:db8::1"
+    ])
+
+    assert [str(n) for n in plan.networks[4]] == ["10.0.0.0/24"]
+    assert [str(n) for n in plan.networks[6]] == ["2001:db8::1/128"]
+    assert plan.address_count == 257
+
+
+def test_plan_applies_network_and_hostname_exclusions():
+    """Test exclusions carve holes in networks and drop subdomains."""
+    plan = plan_targets(
+        ["192.168.1.0/30", "Example.COM.", "api.example.com", "dev.internal.test", "example.com"],
+        ["192.168.1.1", "internal.test"]
+    )
+
+    assert sorted(plan.iter_addresses()) == ["192.168.1.0", "192.168.1.2", "192.168.1.3"]
+    assert plan.hostnames == ["example.com", "api.example.com"]
+
+
+def test_scan_units_are_bounded_and_disjoint():
+    """Test large networks are split into bounded units and hosts stay plain IPs."""
+    plan = plan_targets(["10.1.0.0/22", "10.2.0.9", "scanme.example"])
+    units = list(plan.iter_scan_units(max_addresses=256))
+
+    assert units == [
+        "10.1.0.0/24", "10.1.1.0/24", "10.1.2.0/24", "10.1.3.0/24", "10.2.0.9", "scanme.example"
+    ]
+    assert plan.summary() == {"networks": 2, "addresses": 1025, "hostnames": 1, "invalid": 0}
+
+
+def test_iter_addresses_is_lazy_for_large_ranges():
+    """Test very large IPv6 ranges are planned without materializing addresses."""
+    plan = plan_targets(["2001:db8::/64"])
+    addresses = plan.iter_addresses()
+
+    assert next(addresses) == "2001:db8::"
+    assert plan.address_count == 2 ** 64
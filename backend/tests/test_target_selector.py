@@ -0,0 +1,38 @@
+import pytest
+from app.models.target import TargetSelector
+from app.services.target_selector import TargetSetNotFoundError, build_query, is_empty, iter_selected
+
+
+@pytest.mark.asyncio
+async def test_build_query_translates_tag_expressions(memory_db):
+    """Test all/any/exclude tags map onto one filter over the tags index."""
+    selector = TargetSelector(tags=["prod", "web"], anyTags=["eu", "us"], excludeTags=["fragile"])
+    query = await build_query(memory_db, selector)
+
+    assert query == {"tags": {"$all": ["prod", "web"], "$in": ["eu", "us"], "$nin": ["fragile"]}}
+    assert is_empty(TargetSelector()) and not is_empty(selector)
+
+
+@pytest.mark.asyncio
+async def test_build_query_narrows_saved_target_set(memory_db):
+    """Test inline tags are ANDed with the saved set's selector."""
+    await memory_db.target_sets.insert_one({"id": "set-1", "selector": {"anyTags": ["dmz", "lab"]}})
+    query = await build_query(memory_db, TargetSelector(targetSetId="set-1", excludeTags=["fragile"]))
+
+    assert query == {"$and": [{"tags": {"$in": ["dmz", "lab"]}}, {"tags": {"$nin": ["fragile"]}}]}
+
+    with pytest.raises(TargetSetNotFoundError):
+        await build_query(memory_db, TargetSelector(targetSetId="missing"))
+
+
+@pytest.mark.asyncio
+async def test_iter_selected_streams_values_in_batches(memory_db, record_calls):
+    """Test matching values are yielded in bounded batches."""
+    await memory_db.targets.insert_many([{"value": f"10.0.0.{i}", "tags": ["prod", "web"]} for i in range(5)])
+    await memory_db.targets.insert_one({"value": "10.0.1.1", "tags": ["staging"]})
+    queries = record_calls(memory_db.targets, "find")
+
+    batches = [batch async for batch in iter_selected(memory_db, TargetSelector(tags=["prod"]), batch_size=2)]
+
+    assert batches == [["10.0.0.0", "10.0.0.1"], ["10.0.0.2", "10.0.0.3"], ["10.0.0.4"]]
+    assert queries == [{"tags": {"$all": ["prod"]}}]
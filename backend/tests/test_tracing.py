@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import threading
+import time
+import httpx
+import pytest
+import structlog
+from fastapi import FastAPI, HTTPException
+from app.core import security, tracing
+from app.core.tracing import TracingMiddleware, current_trace, parse_traceparent
+from app.services.profiler import ProfilerBusyError, StackSampler
+
+
+class CommandEvent:
+    command_name = "find"
+    duration_micros = 250_000
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        # What pymongo calls on Motor's executor thread, which runs in a copy of our context
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(tracing.command_timing_listener.succeeded, CommandEvent()))
+        worker.start()
+        worker.join()
+        return {"traceId": structlog.contextvars.get_contextvars()["trace_id"]}
+
+    app.add_middleware(TracingMiddleware)
+    return app
+
+
+def test_parse_traceparent():
+    """Test valid W3C traceparent headers are continued and invalid ones ignored."""
+    trace_id, parent = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    assert parse_traceparent(f"00-{trace_id}-{parent}-01") == (trace_id, parent)
+    assert parse_traceparent(f"00-{'0' * 32}-{parent}-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+@pytest.mark.asyncio
+async def test_request_continues_trace_and_logs_db_breakdown(monkeypatch):
+    """Test trace ids reach the log context and slow requests split DB from handler time."""
+    monkeypatch.setattr(tracing.settings, "SLOW_REQUEST_SECONDS", 0)
+    logged = []
+    monkeypatch.setattr(tracing.logger, "warning", lambda event, **kw: logged.append((event, kw)))
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/items/1", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+    assert response.json() == {"traceId": trace_id}
+    assert response.headers["x-trace-id"] == trace_id
+    (event, fields), = logged
+    assert event == "Slow request" and fields["route"] == "/items/{item_id}"
+    assert fields["db_ms"] == 250.0 and fields["db_commands"] == 1 and fields["slowest_command"] == "find"
+    assert current_trace.get() is None and "trace_id" not in structlog.contextvars.get_contextvars()
+
+
+@pytest.mark.asyncio
+async def test_require_admin_rejects_other_users(monkeypatch):
+    """Test only configured admin users pass the admin dependency."""
+    monkeypatch.setattr(security.settings, "ADMIN_USER_IDS", ["root"])
+
+    assert await security.require_admin({"user_id": "root"}) == {"user_id": "root"}
+    with pytest.raises(HTTPException) as excinfo:
+        await security.require_admin({"user_id": "someone"})
+    assert excinfo.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profiler_folds_stacks_of_busy_threads():
+    """Test sampled stacks come back folded, and concurrent profiles are refused."""
+    def spin_for_profiler():
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            pass
+
+    sampler = StackSampler()
+    busy = threading.Thread(target=spin_for_profiler, name="busy")
+    busy.start()
+    try:
+        profile = sampler.profile(0.2, 0.005, all_threads=True)
+        task = asyncio.ensure_future(profile)
+        await asyncio.sleep(0)
+        with pytest.raises(ProfilerBusyError):
+            await sampler.profile(0.1, 0.005)
+        result = await task
+    finally:
+        busy.join()
+
+    assert result["samples"] > 0
+    busy_stacks = [line for line in result["folded"].splitlines() if line.startswith("busy;")]
+    assert busy_stacks and "spin_for_profiler" in busy_stacks[0]
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in result["folded"].splitlines())
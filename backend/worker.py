@@ -3,7 +3,7 @@ RQ Worker entry point.
 Run this script to start a worker that processes queued jobs.
 """
 from redis import Redis
-from rq import Worker, Queue, Connection
+from rq import Worker
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
 
@@ -22,9 +22,9 @@ def main():
 
     logger.info("Starting RQ worker", queue=settings.RQ_QUEUE_NAME)
 
-    with Connection(redis_conn):
-        worker = Worker([settings.RQ_QUEUE_NAME])
-        worker.work(with_scheduler=True)
+    # The scheduler is needed for delayed retries of failed scan shards
+    worker = Worker([settings.RQ_QUEUE_NAME], connection=redis_conn)
+    worker.work(with_scheduler=True)
 
 
 if __name__ == "__main__":